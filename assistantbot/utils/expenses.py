@@ -1,5 +1,5 @@
 import os
-from typing import Literal, Tuple
+from typing import Any, Dict, Literal, Optional, Tuple
 
 import requests
 from dotenv import load_dotenv
@@ -7,6 +7,45 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# The ETag and the JSON of the last response of every URL. The ETag is sent
+# back in If-None-Match, and the JSON is reused when the API answers that
+# it has not changed.
+RESPONSES_CACHE: Dict[str, Tuple[str, Any]] = {}
+
+
+def get_json(url: str, headers: Dict[str, str]) -> Tuple[int, Optional[Any]]:
+    """
+    This function requests a JSON from the expenses API with a conditional
+    GET, so the unchanged responses are not downloaded again.
+
+    Parameters
+    ----------
+    url : str
+        The URL of the endpoint.
+    headers : Dict[str, str]
+        The headers of the request.
+
+    Returns
+    -------
+    Tuple[int, Optional[Any]]
+        The status code, 200 if the cached JSON is still valid, and the
+        JSON. None if the request failed.
+    """
+    cached = RESPONSES_CACHE.get(url)
+    if cached is not None:
+        headers = {**headers, "If-None-Match": cached[0]}
+    response = requests.get(url, headers=headers)
+
+    if response.status_code == 304 and cached is not None:
+        return 200, cached[1]
+    if response.status_code != 200:
+        return response.status_code, None
+
+    json_response = response.json()
+    if "ETag" in response.headers:
+        RESPONSES_CACHE[url] = (response.headers["ETag"], json_response)
+    return response.status_code, json_response
+
 
 def get_expenses(
     timeframe: Literal["daily", "weekly", "partial_weekly", "monthly"]
@@ -29,14 +68,13 @@ def get_expenses(
         "Accept": "application/json",
         "Authorization": "Bearer " + os.getenv("API_EXPENSES_TOKEN"),
     }
-    response = requests.get(url, headers=headers)
+    status_code, expenses = get_json(url, headers)
 
     # Check if the response is correct
-    if response.status_code != 200:
+    if status_code != 200:
         return "Ups, something went wrong."
 
     # Convert the json to a string
-    expenses = response.json()
     expenses_str = ""
     for _, values_expenses in expenses.items():
         if values_expenses["name"]:
@@ -65,14 +103,12 @@ def get_expenses_a_day_like_today() -> Tuple[float, float]:
         "Accept": "application/json",
         "Authorization": "Bearer " + os.getenv("API_EXPENSES_TOKEN"),
     }
-    response = requests.get(url, headers=headers)
+    status_code, json_response = get_json(url, headers)
 
     # Check if the response is correct
-    if response.status_code != 200:
+    if status_code != 200:
         return 0, 0
 
-    # Get the json response
-    json_response = response.json()
     return (
         json_response["mean_number_of_purchases"],
         abs(json_response["median_amount_of_purchases"]),
@@ -1,26 +1,25 @@
 import os
 from typing import Literal, Tuple
 
-import pyodbc
 from dotenv import load_dotenv
 from fastapi import APIRouter, Depends
 from fastapi.exceptions import HTTPException
 
-from expenses.api.schemas import AddTransactionInfo
+from expenses.api.schemas import (
+    AddTransactionInfo,
+    FingerprintBackfillResult,
+    PopulateJobStatus,
+    RollupsCheckResult,
+    RollupsRebuildResult,
+)
 from expenses.api.security import check_access_token
+from expenses.api.storage import DATABASE_EXECUTOR_, get_repository
 from expenses.api.utils import (
-    get_cursor,
-    get_date_from_search,
-    get_query_to_insert_values,
-    get_transactions,
+    POPULATE_JOBS_,
+    RESPONSE_CACHE_,
+    JobConflictError,
 )
 
-# Emails to obtain the transactions from
-EMAILS_FROM_ = [
-    "alertasynotificaciones@notificacionesbancolombia.com",
-    "alertasynotificaciones@bancolombia.com.co",
-]
-
 router = APIRouter(prefix="/database")
 
 # Check if the file exists
@@ -29,27 +28,25 @@ if os.path.exists("expenses/.env"):
 
 
 # Function to insert the data into the database
-def insert_data_into_database(
-    cursor: pyodbc.Cursor, transaction: Tuple
-) -> str:
+def insert_data_into_database(transaction: Tuple) -> str:
     """
-    This function inserts the data into the database.
+    This function inserts the data into the database, unless there is a
+    transaction with the same fingerprint.
 
     Parameters
     ----------
-    cursor : pyodbc.Cursor
-        The cursor to the database.
     transaction : Tuple
         The transaction to insert.
     """
     try:
-        cursor.execute(
-            get_query_to_insert_values(), transaction + transaction[:-1]
-        )
-        cursor.commit()
+        inserted = get_repository().insert_transaction(transaction)
     except Exception:
         raise HTTPException(status_code=500, detail="Insertion failed.")
 
+    # The cached summaries no longer include every transaction
+    if inserted:
+        RESPONSE_CACHE_.invalidate()
+
     return "Operation completed successfully."
 
 
@@ -64,25 +61,103 @@ def test_connection() -> str:
         A message indicating the status of the connection.
     """
     try:
-        # Establish the connection
-        cursor = get_cursor()
-        # Obtain the rows
-        cursor.execute("SELECT TOP 1 * FROM transactions")
-        rows = cursor.fetchall()
-        cursor.close()
-        return f"Connection successful. This is the first row: {str(rows)}"
+        # Obtain the first row
+        row = get_repository().get_first_transaction()
+        return f"Connection successful. This is the first row: {str(row)}"
     except Exception:
         raise HTTPException(status_code=500, detail="Connection failed.")
 
 
-@router.post("/populate_table/", dependencies=[Depends(check_access_token)])
+@router.post(
+    "/backfill_fingerprints",
+    dependencies=[Depends(check_access_token)],
+    response_model=FingerprintBackfillResult,
+)
+def backfill_transactions_fingerprints() -> FingerprintBackfillResult:
+    """
+    This function fills the fingerprint of the transactions stored before
+    the fingerprint column existed. See
+    TransactionRepository.backfill_fingerprints.
+
+    Returns
+    -------
+    FingerprintBackfillResult
+        The number of transactions updated and left without fingerprint.
+    """
+    try:
+        updated, missing = get_repository().backfill_fingerprints()
+        return FingerprintBackfillResult(updated=updated, missing=missing)
+    except Exception:
+        raise HTTPException(status_code=500, detail="Backfill failed.")
+
+
+@router.post(
+    "/rebuild_rollups",
+    dependencies=[Depends(check_access_token)],
+    response_model=RollupsRebuildResult,
+)
+def rebuild_daily_rollups() -> RollupsRebuildResult:
+    """
+    This function computes again the daily rollups from the transactions.
+    See TransactionRepository.rebuild_rollups.
+
+    Returns
+    -------
+    RollupsRebuildResult
+        The number of rollups.
+    """
+    try:
+        return RollupsRebuildResult(
+            rollups=get_repository().rebuild_rollups()
+        )
+    except Exception:
+        raise HTTPException(status_code=500, detail="Rebuild failed.")
+
+
+@router.get(
+    "/check_rollups",
+    dependencies=[Depends(check_access_token)],
+    response_model=RollupsCheckResult,
+)
+def check_daily_rollups() -> RollupsCheckResult:
+    """
+    This function compares the daily rollups with the aggregates of the
+    transactions. See TransactionRepository.check_rollups.
+
+    Returns
+    -------
+    RollupsCheckResult
+        The number of aggregates missing in the rollups and of rollups that
+        do not match the transactions.
+    """
+    try:
+        missing, unexpected = get_repository().check_rollups()
+        return RollupsCheckResult(
+            consistent=missing == 0 and unexpected == 0,
+            missing=missing,
+            unexpected=unexpected,
+        )
+    except Exception:
+        raise HTTPException(status_code=500, detail="Check failed.")
+
+
+@router.post(
+    "/populate_table/",
+    dependencies=[Depends(check_access_token)],
+    response_model=PopulateJobStatus,
+    status_code=202,
+)
 def populate_table(
     timeframe: Literal[
         "daily", "weekly", "partial_weekly", "monthly", "from_origin"
     ]
-) -> str:
+) -> PopulateJobStatus:
     """
-    This function populates the transactions table.
+    This function starts a job that populates the transactions table in the
+    background and returns at once. Only the emails that arrived after the
+    last synchronization of every sender are processed, unless the
+    timeframe is "from_origin", which forces a full resync. Its progress is
+    reported by /database/jobs/{job_id}.
 
     Parameters
     ----------
@@ -92,8 +167,8 @@ def populate_table(
 
     Returns
     -------
-    str
-        A message indicating the status of the connection.
+    PopulateJobStatus
+        The job that was started.
     """
     # Check if the timeframe is valid
     if timeframe not in [
@@ -110,38 +185,76 @@ def populate_table(
         )
 
     try:
-        # Get the date to search
-        date_to_search = get_date_from_search(timeframe)
+        return POPULATE_JOBS_.start(timeframe).status_report()
+    except JobConflictError as error:
+        raise HTTPException(status_code=409, detail=str(error))
+    except Exception:
+        raise HTTPException(status_code=500, detail="Connection failed.")
 
-        # Establish the connection
-        cursor = get_cursor()
 
-        for email in EMAILS_FROM_:
-            # Process the transactions
-            transactions = get_transactions(
-                email_from=email, date_to_search=date_to_search
-            )
-            print(email, transactions)
-
-            for transaction in transactions:
-                insert_data_into_database(
-                    cursor,
-                    (
-                        transaction.transaction_type,
-                        transaction.amount,
-                        transaction.merchant,
-                        transaction.datetime.replace(tzinfo=None),
-                        transaction.paynment_method,
-                        transaction.email_log,
-                    ),
-                )
-
-        # Close the connection
-        cursor.close()
-        return "Operation completed successfully."
+@router.get(
+    "/jobs/{job_id}",
+    dependencies=[Depends(check_access_token)],
+    response_model=PopulateJobStatus,
+)
+def get_populate_job(job_id: str) -> PopulateJobStatus:
+    """
+    This function returns the progress of a job that populates the
+    transactions table: the emails scanned, the rows parsed and inserted,
+    the throughput and the estimated seconds left.
+
+    Parameters
+    ----------
+    job_id : str
+        The identifier of the job.
+
+    Returns
+    -------
+    PopulateJobStatus
+        The progress of the job.
+    """
+    try:
+        job = POPULATE_JOBS_.get(job_id)
     except Exception:
         raise HTTPException(status_code=500, detail="Connection failed.")
 
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job.status_report()
+
+
+@router.post(
+    "/jobs/{job_id}/resume",
+    dependencies=[Depends(check_access_token)],
+    response_model=PopulateJobStatus,
+    status_code=202,
+)
+def resume_populate_job(job_id: str) -> PopulateJobStatus:
+    """
+    This function runs again an interrupted or failed job that populates
+    the transactions table, from the last chunk it stored.
+
+    Parameters
+    ----------
+    job_id : str
+        The identifier of the job.
+
+    Returns
+    -------
+    PopulateJobStatus
+        The job, running again.
+    """
+    try:
+        job = POPULATE_JOBS_.resume(job_id)
+    except (JobConflictError, ValueError) as error:
+        raise HTTPException(status_code=409, detail=str(error))
+    except Exception:
+        raise HTTPException(status_code=500, detail="Connection failed.")
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job.status_report()
+
 
 @router.post("/add_transaction", dependencies=[Depends(check_access_token)])
 async def add_transaction(transaction: AddTransactionInfo) -> str:
@@ -159,9 +272,6 @@ async def add_transaction(transaction: AddTransactionInfo) -> str:
         A message indicating the status of the connection.
     """
     try:
-        # Establish the connection
-        cursor = get_cursor()
-
         if transaction.transaction_type != "Compra":
             raise HTTPException(
                 status_code=501,
@@ -169,8 +279,8 @@ async def add_transaction(transaction: AddTransactionInfo) -> str:
             )
 
         # Insert the data into the database
-        insert_data_into_database(
-            cursor,
+        await DATABASE_EXECUTOR_.run(
+            insert_data_into_database,
             (
                 transaction.transaction_type,
                 transaction.amount,
@@ -180,8 +290,6 @@ async def add_transaction(transaction: AddTransactionInfo) -> str:
                 transaction.email_log,
             ),
         )
-        # Close the connection
-        cursor.close()
         return "Operation completed successfully."
     except Exception:
         raise HTTPException(status_code=500, detail="Connection failed.")
@@ -2,55 +2,57 @@ import datetime
 from typing import List, Literal
 
 import pytz
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 
 from expenses.api.schemas import SummaryADayLikeToday, SummaryTransactionInfo
 from expenses.api.security import check_access_token
+from expenses.api.storage import DATABASE_EXECUTOR_
 from expenses.api.utils import (
+    RESPONSE_CACHE_,
+    RESPONSE_CACHE_TTLS_,
+    conditional_response,
     get_date_from_search,
     get_summary_a_day_like_today,
-    get_transactions,
+    get_transaction_totals,
+    get_transactions_async,
     get_transactions_from_database,
     process_transactions_api_expenses,
+    render_json,
+    summarize_transaction_totals,
 )
-from expenses.processors.schemas import TransactionInfo
+from expenses.constants import EMAILS_FROM_
+from expenses.processors.schemas import TransactionColumns, TransactionInfo
 
 router = APIRouter(prefix="/expenses")
 
-# Emails to obtain the transactions from
-EMAILS_FROM_ = [
-    "alertasynotificaciones@notificacionesbancolombia.com",
-    "alertasynotificaciones@bancolombia.com.co",
-]
 
 # Function to get the transactions from the database
-def get_gross_transactions(
+async def get_gross_transactions(
     timeframe: Literal["daily", "weekly", "partial_weekly", "monthly"]
-) -> List[TransactionInfo]:
+) -> TransactionColumns:
     """
     This function returns the full transactions of the current timeframe
 
     Returns
     -------
-    List[TransactionInfo]
-        The summary of the expenses of the day, week or month.
+    TransactionColumns
+        The transactions of the day, week or month, in columns.
     """
     # Get the date to search
     date_to_search = get_date_from_search(timeframe)
 
     # Search in the database for the transactions
-    transactions_from_db = get_transactions_from_database(date_to_search)
+    transactions_from_db = await DATABASE_EXECUTOR_.run(
+        get_transactions_from_database, date_to_search
+    )
 
     # If there are not transactions in the database, search in the API
     # and process the transactions.
     transactions = (
         transactions_from_db
         if len(transactions_from_db) > 0
-        else get_transactions(
-            email_from=EMAILS_FROM_[0], date_to_search=date_to_search
-        )
-        + get_transactions(
-            email_from=EMAILS_FROM_[1], date_to_search=date_to_search
+        else await get_transactions_async(
+            email_from=EMAILS_FROM_, date_to_search=date_to_search
         )
     )
 
@@ -65,8 +67,9 @@ def get_gross_transactions(
     dependencies=[Depends(check_access_token)],
 )
 async def get_expenses(
-    timeframe: Literal["daily", "weekly", "partial_weekly", "monthly"]
-) -> SummaryTransactionInfo:
+    timeframe: Literal["daily", "weekly", "partial_weekly", "monthly"],
+    request: Request,
+) -> Response:
     """
     This function returns the summary of the expenses of the day, week or
     month.
@@ -75,15 +78,49 @@ async def get_expenses(
     ----------
     timeframe : Literal["daily", "weekly", "partial_weekly", "monthly"]
         The timeframe to obtain the expenses from.
+    request : Request
+        The request, with the ETag the client holds in If-None-Match.
 
     Returns
     -------
-    SummaryTransactionInfo
-        The summary of the expenses of the day, week or month.
+    Response
+        The summary of the expenses of the day, week or month, or 304 if
+        the client holds the current one.
     """
-    return process_transactions_api_expenses(
-        get_gross_transactions(timeframe)
+    # Get the date to search
+    date_to_search = get_date_from_search(timeframe)
+
+    # Serve the rendered summary from the cache while it is valid
+    key = ("expenses", timeframe, date_to_search.date())
+    rendered = RESPONSE_CACHE_.get(key)
+    if rendered is not None:
+        return conditional_response(request, *rendered)
+    generation = RESPONSE_CACHE_.generation
+
+    # Read the totals from the daily rollups of the database
+    totals = await DATABASE_EXECUTOR_.run(
+        get_transaction_totals, date_to_search
     )
+    if len(totals) == 0:
+        # If there are not transactions in the database, search in the API
+        # and process the transactions. The summary is not cached, as the
+        # empty merchants, since it does not come from the database, whose
+        # inserts invalidate the cache.
+        summary = process_transactions_api_expenses(
+            await get_transactions_async(
+                email_from=EMAILS_FROM_, date_to_search=date_to_search
+            )
+        )
+        return conditional_response(request, *render_json(summary))
+
+    rendered = render_json(summarize_transaction_totals(totals))
+    RESPONSE_CACHE_.set(
+        key,
+        rendered,
+        ttl=RESPONSE_CACHE_TTLS_[timeframe],
+        generation=generation,
+    )
+    return conditional_response(request, *rendered)
 
 
 @router.get(
@@ -91,23 +128,31 @@ async def get_expenses(
     response_model=SummaryADayLikeToday,
     dependencies=[Depends(check_access_token)],
 )
-async def get_expenses_a_day_like_today() -> SummaryADayLikeToday:
+async def get_expenses_a_day_like_today(request: Request) -> Response:
     """
     This function returns the summary of the expenses of a day like today.
 
+    Parameters
+    ----------
+    request : Request
+        The request, with the ETag the client holds in If-None-Match.
+
     Returns
     -------
-    SummaryADayLikeToday
-        The summary of the expenses of a day like today.
+    Response
+        The summary of the expenses of a day like today, or 304 if the
+        client holds the current one.
     """
     # Return the summary
-    return SummaryADayLikeToday(
-        **get_summary_a_day_like_today(
+    summary = SummaryADayLikeToday(
+        **await DATABASE_EXECUTOR_.run(
+            get_summary_a_day_like_today,
             datetime.datetime.now()
             .astimezone(pytz.timezone("America/Bogota"))
-            .isoweekday()
+            .isoweekday(),
         )
     )
+    return conditional_response(request, *render_json(summary))
 
 
 # Create the endpoint to get all the transactions of the current day
@@ -116,13 +161,20 @@ async def get_expenses_a_day_like_today() -> SummaryADayLikeToday:
     response_model=List[TransactionInfo],
     dependencies=[Depends(check_access_token)],
 )
-async def get_full_transactions() -> List[TransactionInfo]:
+async def get_full_transactions(request: Request) -> Response:
     """
     This function returns the full transactions of the current day
 
+    Parameters
+    ----------
+    request : Request
+        The request, with the ETag the client holds in If-None-Match.
+
     Returns
     -------
-    List[TransactionInfo]
-        The summary of the expenses of the day, week or month.
+    Response
+        The transactions of the current day, or 304 if the client holds
+        the current ones.
     """
-    return get_gross_transactions("daily")
+    transactions = (await get_gross_transactions("daily")).to_transactions()
+    return conditional_response(request, *render_json(transactions))
@@ -1,10 +1,18 @@
 from typing import List, Literal
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 
 from expenses.api.schemas import SummaryMerchant
 from expenses.api.security import check_access_token
-from expenses.api.utils import get_date_from_search, get_merchants_values
+from expenses.api.storage import DATABASE_EXECUTOR_
+from expenses.api.utils import (
+    RESPONSE_CACHE_,
+    RESPONSE_CACHE_TTLS_,
+    conditional_response,
+    get_date_from_search,
+    get_merchants_values,
+    render_json,
+)
 
 router = APIRouter(prefix="/merchants")
 
@@ -15,8 +23,9 @@ router = APIRouter(prefix="/merchants")
     dependencies=[Depends(check_access_token)],
 )
 async def get_merchants(
-    timeframe: Literal["daily", "weekly", "partial_weekly", "monthly"]
-) -> List[SummaryMerchant]:
+    timeframe: Literal["daily", "weekly", "partial_weekly", "monthly"],
+    request: Request,
+) -> Response:
     """
     This function returns the merchants of the day, week or month.
 
@@ -24,13 +33,36 @@ async def get_merchants(
     ----------
     timeframe : str
         The timeframe to obtain the merchants from.
+    request : Request
+        The request, with the ETag the client holds in If-None-Match.
 
     Returns
     -------
-    SummaryMerchants
-        The merchants of the day, week or month.
+    Response
+        The merchants of the day, week or month, or 304 if the client
+        holds the current ones.
     """
     # Get the date to search
     date_to_search = get_date_from_search(timeframe)
 
-    return get_merchants_values(date_to_search)
+    # Serve the rendered merchants from the cache while they are valid
+    key = ("merchants", timeframe, date_to_search.date())
+    rendered = RESPONSE_CACHE_.get(key)
+    if rendered is not None:
+        return conditional_response(request, *rendered)
+    generation = RESPONSE_CACHE_.generation
+
+    # The empty lists are not cached, since they are also the result of a
+    # failed query
+    merchants = await DATABASE_EXECUTOR_.run(
+        get_merchants_values, date_to_search
+    )
+    rendered = render_json(merchants)
+    if len(merchants) > 0:
+        RESPONSE_CACHE_.set(
+            key,
+            rendered,
+            ttl=RESPONSE_CACHE_TTLS_[timeframe],
+            generation=generation,
+        )
+    return conditional_response(request, *rendered)
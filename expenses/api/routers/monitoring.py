@@ -7,12 +7,19 @@ import neptune
 from fastapi import APIRouter, Depends
 from fastapi.exceptions import HTTPException
 from numpy import where
-from pandas import read_sql, to_datetime
+from pandas import DataFrame, to_datetime
 from sklearn.ensemble import IsolationForest
 
-from expenses.api.schemas import AnomalyPredictionOutput
+from expenses.api.schemas import (
+    AnomalyPredictionOutput,
+    CacheMetrics,
+    ExecutorMetrics,
+    PoolMetrics,
+)
 from expenses.api.security import check_access_token
-from expenses.api.utils import get_cursor, get_model
+from expenses.api.storage import DATABASE_EXECUTOR_, get_repository
+from expenses.api.utils import RESPONSE_CACHE_, get_model
+from expenses.core.imap_pool import IMAP_EXECUTOR_, IMAP_POOL_
 
 router = APIRouter(prefix="/monitoring")
 
@@ -27,23 +34,11 @@ def retrain_anomaly_model(
     This function retrains the anomaly model with the current data
     and save the model as a pkl file
     """
-    conn, _ = get_cursor(return_conn=True)
-
     # Get the data from the database
-    query = """
-        SELECT
-            CAST(datetime AS DATE) AS date_,
-            (-1) * AVG(CAST(amount AS float)) AS avg_amount,
-            (-1) * MIN(CAST(amount AS float)) AS max_amount,
-            COUNT(DISTINCT id) AS total_trx
-        FROM [dbo].[transactions]
-        WHERE transaction_type = 'Compra' or
-              transaction_type = 'QR' or
-              transaction_type = 'Transferencia'
-        GROUP BY CAST(datetime AS DATE)
-        ORDER BY CAST(datetime AS DATE) DESC;
-        """
-    df = read_sql(query, conn)
+    df = DataFrame.from_records(
+        get_repository().get_daily_expenses(),
+        columns=["date_", "avg_amount", "max_amount", "total_trx"],
+    )
 
     # Make modifications to the data
     df["date_"] = to_datetime(df["date_"])
@@ -136,3 +131,91 @@ def predict_anomaly(
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get(
+    "/imap_pool",
+    response_model=PoolMetrics,
+    dependencies=[Depends(check_access_token)],
+)
+def get_imap_pool_metrics() -> PoolMetrics:
+    """
+    This function returns the metrics of the pool of IMAP connections.
+
+    Returns
+    -------
+    PoolMetrics
+        The size, hits, misses and checkout waits of the pool.
+    """
+    return PoolMetrics(**IMAP_POOL_.metrics())
+
+
+@router.get(
+    "/database_pool",
+    response_model=PoolMetrics,
+    dependencies=[Depends(check_access_token)],
+)
+def get_database_pool_metrics() -> PoolMetrics:
+    """
+    This function returns the metrics of the pool of database connections.
+
+    Returns
+    -------
+    PoolMetrics
+        The size, hits, misses and checkout waits of the pool.
+    """
+    return PoolMetrics(**get_repository().metrics())
+
+
+@router.get(
+    "/response_cache",
+    response_model=CacheMetrics,
+    dependencies=[Depends(check_access_token)],
+)
+def get_response_cache_metrics() -> CacheMetrics:
+    """
+    This function returns the metrics of the cache of the expenses and
+    merchants responses.
+
+    Returns
+    -------
+    CacheMetrics
+        The size, hits, misses and invalidations of the cache.
+    """
+    return CacheMetrics(**RESPONSE_CACHE_.metrics())
+
+
+@router.get(
+    "/database_executor",
+    response_model=ExecutorMetrics,
+    dependencies=[Depends(check_access_token)],
+)
+def get_database_executor_metrics() -> ExecutorMetrics:
+    """
+    This function returns the metrics of the threads that run the queries
+    of the asynchronous endpoints.
+
+    Returns
+    -------
+    ExecutorMetrics
+        The threads, queued and running queries, and queue waits.
+    """
+    return ExecutorMetrics(**DATABASE_EXECUTOR_.metrics())
+
+
+@router.get(
+    "/imap_executor",
+    response_model=ExecutorMetrics,
+    dependencies=[Depends(check_access_token)],
+)
+def get_imap_executor_metrics() -> ExecutorMetrics:
+    """
+    This function returns the metrics of the threads that run the IMAP
+    round trips of the asynchronous client.
+
+    Returns
+    -------
+    ExecutorMetrics
+        The threads, queued and running round trips, and queue waits.
+    """
+    return ExecutorMetrics(**IMAP_EXECUTOR_.metrics())
@@ -0,0 +1,92 @@
+import datetime
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.exceptions import HTTPException
+from fastapi.responses import StreamingResponse
+
+from expenses.api.security import check_access_token
+from expenses.api.storage import DATABASE_EXECUTOR_, get_repository
+from expenses.api.utils import (
+    EXPORT_BATCH_SIZE_,
+    EXPORT_MEDIA_TYPES_,
+    stream_export,
+)
+from expenses.processors.factory import TRANSACTIONS_PROCESSORS_
+
+# The transaction types as the processors store them, e.g. "Recepcion
+# Transferencia" for the "recepcion transferencia" alerts
+STORED_TRANSACTION_TYPES_ = {
+    processor.transaction_type
+    for processor in TRANSACTIONS_PROCESSORS_.values()
+}
+
+router = APIRouter(prefix="/transactions")
+
+
+@router.get("/export", dependencies=[Depends(check_access_token)])
+async def export_transactions(
+    date_from: Optional[datetime.date] = None,
+    date_to: Optional[datetime.date] = None,
+    transaction_type: Optional[List[str]] = Query(None),
+    export_format: Literal["ndjson", "csv"] = Query(
+        "ndjson", alias="format"
+    ),
+) -> StreamingResponse:
+    """
+    This function exports the stored transactions of a range of days, from
+    the oldest, as NDJSON or CSV. The rows are streamed from the database
+    in batches, so the memory does not grow with the range and the first
+    rows arrive before the query finishes.
+
+    Parameters
+    ----------
+    date_from : Optional[datetime.date], optional
+        The first day to export. None to start from the first transaction.
+    date_to : Optional[datetime.date], optional
+        The last day to export. None to end at the last transaction.
+    transaction_type : Optional[List[str]], optional
+        The transaction types to export, as they are stored, e.g.
+        ?transaction_type=Compra&transaction_type=Recepcion%20Transferencia.
+        None to export all of them.
+    export_format : Literal["ndjson", "csv"], optional
+        The format of the export, "ndjson" by default.
+
+    Returns
+    -------
+    StreamingResponse
+        The transactions, one per line.
+    """
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise HTTPException(
+            status_code=400,
+            detail="date_from must not be after date_to.",
+        )
+
+    unknown_types = set(transaction_type or []) - STORED_TRANSACTION_TYPES_
+    if unknown_types:
+        raise HTTPException(
+            status_code=400,
+            detail="Unknown transaction types: "
+            f"{', '.join(sorted(unknown_types))}.",
+        )
+
+    try:
+        repository = await DATABASE_EXECUTOR_.run(get_repository)
+    except Exception:
+        raise HTTPException(status_code=500, detail="Connection failed.")
+
+    batches = repository.iter_transaction_batches(
+        date_from=date_from,
+        date_to=date_to,
+        transaction_types=transaction_type,
+        batch_size=EXPORT_BATCH_SIZE_,
+    )
+    return StreamingResponse(
+        stream_export(batches, export_format),
+        media_type=EXPORT_MEDIA_TYPES_[export_format],
+        headers={
+            "Content-Disposition": "attachment; "
+            f'filename="transactions.{export_format}"'
+        },
+    )
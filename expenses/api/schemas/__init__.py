@@ -5,7 +5,14 @@ from .expenses import (
     SummaryADayLikeToday,
     SummaryTransactionInfo,
 )
+from .database import (
+    FingerprintBackfillResult,
+    PopulateJobStatus,
+    RollupsCheckResult,
+    RollupsRebuildResult,
+)
 from .merchants import SummaryMerchant
+from .monitoring import CacheMetrics, ExecutorMetrics, PoolMetrics
 
 __all__ = [
     "SummaryMerchant",
@@ -14,4 +21,11 @@ __all__ = [
     "AddTransactionInfo",
     "SummaryADayLikeToday",
     "AnomalyPredictionOutput",
+    "PoolMetrics",
+    "CacheMetrics",
+    "ExecutorMetrics",
+    "PopulateJobStatus",
+    "FingerprintBackfillResult",
+    "RollupsRebuildResult",
+    "RollupsCheckResult",
 ]
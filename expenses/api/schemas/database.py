@@ -0,0 +1,59 @@
+import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+
+class PopulateJobStatus(BaseModel):
+    """
+    This class represents the progress of a job that populates the
+    transactions table. The throughput and the estimated seconds left are
+    measured since the job was started or last resumed.
+    """
+
+    id: str
+    timeframe: str
+    status: Literal["running", "succeeded", "failed", "interrupted"]
+    created_at: datetime.datetime
+    started_at: datetime.datetime
+    finished_at: Optional[datetime.datetime]
+    emails_total: Optional[int]
+    emails_offset: int
+    emails_scanned: int
+    rows_parsed: int
+    rows_inserted: int
+    rows_skipped: int
+    checkpoint_uid: Optional[int]
+    emails_per_second: Optional[float]
+    rows_per_second: Optional[float]
+    eta_seconds: Optional[float]
+    error: Optional[str]
+
+
+class FingerprintBackfillResult(BaseModel):
+    """
+    This class represents the result of filling the fingerprints of the
+    stored transactions.
+    """
+
+    updated: int
+    missing: int
+
+
+class RollupsRebuildResult(BaseModel):
+    """
+    This class represents the result of computing again the daily rollups.
+    """
+
+    rollups: int
+
+
+class RollupsCheckResult(BaseModel):
+    """
+    This class represents the result of comparing the daily rollups with
+    the transactions.
+    """
+
+    consistent: bool
+    missing: int
+    unexpected: int
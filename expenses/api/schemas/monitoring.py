@@ -0,0 +1,53 @@
+from pydantic import BaseModel
+
+
+class PoolMetrics(BaseModel):
+    """
+    This class represents the metrics of a connection pool.
+    """
+
+    size: int
+    idle: int
+    max_size: int
+    max_overflow: int
+    hits: int
+    misses: int
+    reconnects: int
+    evictions: int
+    recycles: int
+    checkout_failures: int
+    avg_checkout_wait: float
+    max_checkout_wait: float
+
+
+class CacheMetrics(BaseModel):
+    """
+    This class represents the metrics of a response cache.
+    """
+
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    expirations: int
+    evictions: int
+    invalidations: int
+    hit_ratio: float
+
+
+class ExecutorMetrics(BaseModel):
+    """
+    This class represents the metrics of an executor of blocking functions.
+    """
+
+    max_workers: int
+    queued: int
+    max_queued: int
+    active: int
+    submitted: int
+    completed: int
+    failed: int
+    avg_queue_wait: float
+    max_queue_wait: float
+    avg_run_time: float
+    max_run_time: float
@@ -0,0 +1,68 @@
+import os
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+from expenses.api.storage.base import TransactionRepository
+from expenses.core.executor import BoundedExecutor
+
+# Check if the file exists
+if os.path.exists("expenses/.env"):
+    load_dotenv(dotenv_path="expenses/.env")
+
+# The backend of the storage: "sqlserver", or "sqlite" to run locally
+STORAGE_BACKEND_ = os.getenv("STORAGE_BACKEND", "sqlserver")
+
+# The database file of the SQLite backend
+SQLITE_PATH_ = os.getenv("SQLITE_PATH", "expenses/expenses.db")
+
+# Process-wide threads that run the blocking queries of the asynchronous
+# endpoints. By default there is one per connection of the pool, since the
+# rest would wait for a connection.
+DATABASE_EXECUTOR_ = BoundedExecutor(
+    max_workers=int(
+        os.getenv(
+            "DATABASE_EXECUTOR_WORKERS",
+            int(os.getenv("DATABASE_POOL_SIZE", 4))
+            + int(os.getenv("DATABASE_POOL_MAX_OVERFLOW", 4)),
+        )
+    ),
+    name="database",
+)
+
+
+@lru_cache(maxsize=None)
+def get_repository() -> TransactionRepository:
+    """
+    This function returns the repository of the configured backend. It is
+    created on the first call and shared by the whole process. The backends
+    are imported here, so the ODBC driver is only needed for SQL Server.
+
+    Returns
+    -------
+    TransactionRepository
+        The repository of the transactions.
+    """
+    if STORAGE_BACKEND_ == "sqlite":
+        from expenses.api.storage.sqlite import SQLiteRepository
+
+        return SQLiteRepository(SQLITE_PATH_)
+
+    if STORAGE_BACKEND_ == "sqlserver":
+        from expenses.api.storage.sqlserver import SQLServerRepository
+
+        return SQLServerRepository()
+
+    raise ValueError(
+        f"Unknown storage backend {STORAGE_BACKEND_}, it must be sqlserver "
+        "or sqlite."
+    )
+
+
+__all__ = [
+    "STORAGE_BACKEND_",
+    "SQLITE_PATH_",
+    "DATABASE_EXECUTOR_",
+    "TransactionRepository",
+    "get_repository",
+]
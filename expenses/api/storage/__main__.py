@@ -0,0 +1,33 @@
+import argparse
+import sys
+
+from expenses.api.storage import STORAGE_BACKEND_, get_repository
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Maintain the daily rollups of the configured storage."
+    )
+    parser.add_argument(
+        "command",
+        choices=["rebuild_rollups", "check_rollups"],
+        help="Compute again the rollups from the transactions, or compare "
+        "them with the transactions.",
+    )
+    args = parser.parse_args()
+
+    repository = get_repository()
+    try:
+        if args.command == "rebuild_rollups":
+            rollups = repository.rebuild_rollups()
+            print(f"{STORAGE_BACKEND_}: {rollups:,} rollups rebuilt")
+        else:
+            missing, unexpected = repository.check_rollups()
+            print(
+                f"{STORAGE_BACKEND_}: {missing:,} aggregates missing in the "
+                f"rollups, {unexpected:,} rollups unexpected"
+            )
+            # Exit with an error if the rollups are not consistent
+            if missing > 0 or unexpected > 0:
+                sys.exit(1)
+    finally:
+        repository.close()
@@ -0,0 +1,558 @@
+import datetime
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from expenses.core.dataclasses import MailboxState
+from expenses.core.pool import ConnectionPool
+from expenses.processors.schemas import TransactionColumns
+
+
+class TransactionRepository(ABC):
+    """
+    This class is the interface of the storage of the transactions: the
+    reads, the aggregates and the idempotent inserts, and the state of the
+    synchronization of the mailbox.
+
+    The connections are borrowed from a pool of DB-API connections with the
+    qmark parameter style. The queries that are plain SQL are implemented
+    here, and every backend implements the ones that need its own dialect.
+
+    The aggregates are read from the daily_rollups table, with the sum, the
+    count, the minimum and the maximum of the amounts of every day,
+    transaction type and merchant. Every backend updates it in the same
+    database transaction as the inserts, so the reads cost O(days) instead
+    of O(transactions).
+    """
+
+    # The expression of the day of the datetime column, in the dialect of
+    # the backend
+    date_expression: str
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """
+        This function borrows a connection from the pool for the duration of
+        the context. The changes that were not committed are rolled back
+        before the connection is returned.
+
+        Yields
+        ------
+        Any
+            The connection to the database.
+        """
+        with self.pool.connection() as conn:
+            try:
+                yield conn
+            finally:
+                conn.rollback()
+
+    @contextmanager
+    def cursor(self) -> Iterator[Any]:
+        """
+        This function opens a cursor on a connection borrowed from the pool
+        for the duration of the context.
+
+        Yields
+        ------
+        Any
+            The cursor to the database.
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        This function returns the metrics of the pool of connections.
+
+        Returns
+        -------
+        Dict[str, float]
+            The metrics of the pool. See ConnectionPool.metrics.
+        """
+        return self.pool.metrics()
+
+    def close(self) -> None:
+        """
+        This function closes the idle connections of the pool.
+        """
+        self.pool.close_all()
+
+    def get_transactions(
+        self, date_from: datetime.datetime
+    ) -> TransactionColumns:
+        """
+        This function returns the transactions since the day of a date.
+
+        Parameters
+        ----------
+        date_from : datetime.datetime
+            The date to search.
+
+        Returns
+        -------
+        TransactionColumns
+            The transactions, in columns.
+        """
+        with self.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT
+                    transaction_type,
+                    amount,
+                    merchant,
+                    datetime,
+                    payment_method,
+                    email_log_id
+                FROM transactions
+                WHERE datetime >= ?
+                """,
+                (date_from.date(),),
+            )
+            return TransactionColumns.from_rows(cursor.fetchall())
+
+    def iter_transaction_batches(
+        self,
+        date_from: Optional[datetime.date] = None,
+        date_to: Optional[datetime.date] = None,
+        transaction_types: Optional[List[str]] = None,
+        batch_size: int = 500,
+    ) -> Iterator[List[Tuple]]:
+        """
+        This function returns the transactions of a range of days, from the
+        oldest, as a stream of batches read with fetchmany. A connection of
+        the pool is held until the stream is exhausted or closed, and only
+        one batch is in memory at a time.
+
+        Parameters
+        ----------
+        date_from : Optional[datetime.date], optional
+            The first day of the range. None to start from the first
+            transaction.
+        date_to : Optional[datetime.date], optional
+            The last day of the range. None to end at the last transaction.
+        transaction_types : Optional[List[str]], optional
+            The transaction types to return. None to return all of them.
+        batch_size : int, optional
+            The number of rows of every batch.
+
+        Yields
+        ------
+        List[Tuple]
+            The rows of the transactions, with the fields in the order of
+            TransactionInfo.
+        """
+        conditions, parameters = [], []
+        if date_from is not None:
+            conditions.append("datetime >= ?")
+            parameters.append(date_from)
+        if date_to is not None:
+            conditions.append("datetime < ?")
+            parameters.append(date_to + datetime.timedelta(days=1))
+        if transaction_types:
+            conditions.append(
+                "transaction_type IN "
+                f"({', '.join('?' for _ in transaction_types)})"
+            )
+            parameters.extend(transaction_types)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT
+                    transaction_type,
+                    amount,
+                    merchant,
+                    datetime,
+                    payment_method,
+                    email_log_id
+                FROM transactions
+                {where}
+                ORDER BY datetime
+                """,
+                tuple(parameters),
+            )
+            yield from iter(lambda: cursor.fetchmany(batch_size), [])
+
+    def get_merchants(
+        self, date_from: datetime.datetime
+    ) -> List[Tuple[str, float, int]]:
+        """
+        This function returns the total amount and the number of purchases
+        of every merchant since the day of a date, from the highest amount.
+
+        Parameters
+        ----------
+        date_from : datetime.datetime
+            The date to search.
+
+        Returns
+        -------
+        List[Tuple[str, float, int]]
+            The merchant, the amount and the number of purchases.
+        """
+        with self.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT
+                    merchant,
+                    SUM(amount_sum) AS amount,
+                    SUM(trx_count) AS count
+                FROM daily_rollups
+                WHERE date_ >= ? AND transaction_type = 'Compra'
+                AND merchant != ''
+                GROUP BY merchant
+                ORDER BY amount DESC
+                """,
+                (date_from.date(),),
+            )
+            return [tuple(row) for row in cursor.fetchall()]
+
+    def get_transaction_totals(
+        self, date_from: datetime.datetime
+    ) -> List[Tuple[str, float, int]]:
+        """
+        This function returns the total amount and the number of
+        transactions of every transaction type since the day of a date.
+
+        Parameters
+        ----------
+        date_from : datetime.datetime
+            The date to search.
+
+        Returns
+        -------
+        List[Tuple[str, float, int]]
+            The transaction type, the amount and the number of
+            transactions.
+        """
+        with self.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT
+                    transaction_type,
+                    SUM(amount_sum) AS amount,
+                    SUM(trx_count) AS count
+                FROM daily_rollups
+                WHERE date_ >= ?
+                GROUP BY transaction_type
+                """,
+                (date_from.date(),),
+            )
+            return [tuple(row) for row in cursor.fetchall()]
+
+    def get_daily_expenses(self) -> List[Tuple]:
+        """
+        This function returns the aggregates of the expenses of every day,
+        from the most recent: the average and the maximum amount, as
+        positive numbers, and the number of transactions.
+
+        Returns
+        -------
+        List[Tuple]
+            The date, the average amount, the maximum amount and the
+            number of transactions.
+        """
+        with self.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT
+                    date_,
+                    (-1) * SUM(amount_sum) / SUM(trx_count) AS avg_amount,
+                    (-1) * MIN(amount_min) AS max_amount,
+                    SUM(trx_count) AS total_trx
+                FROM daily_rollups
+                WHERE transaction_type = 'Compra' or
+                      transaction_type = 'QR' or
+                      transaction_type = 'Transferencia'
+                GROUP BY date_
+                ORDER BY date_ DESC
+                """
+            )
+            return [tuple(row) for row in cursor.fetchall()]
+
+    def check_rollups(self, tolerance: float = 0.005) -> Tuple[int, int]:
+        """
+        This function compares the daily_rollups table with the aggregates
+        of the transactions table. The sums are accumulated in a different
+        order, so the FLOAT amounts are compared with a tolerance instead of
+        exactly, or rounded, which could still differ by a cent.
+
+        Parameters
+        ----------
+        tolerance : float, optional
+            The maximum difference between two amounts that are the same,
+            half a cent by default.
+
+        Returns
+        -------
+        Tuple[int, int]
+            The number of aggregates of the transactions that are missing
+            or different in the rollups, and the number of rollups that do
+            not match any aggregate of the transactions. Both are zero when
+            the rollups are consistent.
+        """
+        keys = " AND ".join(
+            f"rollups.{column} = raw.{column}"
+            for column in ["date_", "transaction_type", "merchant"]
+        )
+        differences = " OR ".join(
+            [
+                "rollups.trx_count <> raw.trx_count",
+                *(
+                    f"ABS(rollups.{column} - raw.{column}) > ?"
+                    for column in ["amount_sum", "amount_min", "amount_max"]
+                ),
+            ]
+        )
+        raw = self._get_query_to_aggregate()
+
+        with self.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT
+                    (
+                        SELECT COUNT(*)
+                        FROM ({raw}) AS raw
+                        LEFT JOIN daily_rollups AS rollups ON {keys}
+                        WHERE rollups.date_ IS NULL OR {differences}
+                    ),
+                    (
+                        SELECT COUNT(*)
+                        FROM daily_rollups AS rollups
+                        LEFT JOIN ({raw}) AS raw ON {keys}
+                        WHERE raw.date_ IS NULL OR {differences}
+                    )
+                """,
+                (tolerance,) * 6,
+            )
+            missing, unexpected = cursor.fetchone()
+        return int(missing), int(unexpected)
+
+    def _get_query_to_aggregate(self, table: str = "transactions") -> str:
+        """
+        This function returns the query that aggregates the transactions of
+        a table by day, transaction type and merchant, with the columns of
+        the daily_rollups table.
+
+        Parameters
+        ----------
+        table : str, optional
+            The table with the transactions.
+
+        Returns
+        -------
+        str
+            The query to aggregate the transactions.
+        """
+        return f"""
+            SELECT
+                {self.date_expression} AS date_,
+                transaction_type,
+                COALESCE(merchant, '') AS merchant,
+                SUM(CAST(amount AS FLOAT)) AS amount_sum,
+                COUNT(*) AS trx_count,
+                MIN(CAST(amount AS FLOAT)) AS amount_min,
+                MAX(CAST(amount AS FLOAT)) AS amount_max
+            FROM {table}
+            GROUP BY
+                {self.date_expression},
+                transaction_type,
+                COALESCE(merchant, '')
+            """
+
+    def get_mailbox_states(self, senders: List[str]) -> List[MailboxState]:
+        """
+        This function returns the state of the last synchronization of the
+        mailbox for every sender that has one.
+
+        Parameters
+        ----------
+        senders : List[str]
+            The email addresses of the senders.
+
+        Returns
+        -------
+        List[MailboxState]
+            The states of the senders that have been synchronized.
+        """
+        with self.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT uidvalidity, last_uid
+                FROM mailbox_sync_state
+                WHERE email_from IN ({", ".join("?" * len(senders))})
+                """,
+                tuple(senders),
+            )
+            return [
+                MailboxState(uidvalidity=int(row[0]), last_uid=int(row[1]))
+                for row in cursor.fetchall()
+            ]
+
+    def get_populate_job(self, job_id: str) -> Optional[str]:
+        """
+        This function returns a job that populates the transactions table.
+
+        Parameters
+        ----------
+        job_id : str
+            The identifier of the job.
+
+        Returns
+        -------
+        Optional[str]
+            The JSON of the job. None if there is no job with the id.
+        """
+        with self.cursor() as cursor:
+            cursor.execute(
+                "SELECT payload FROM populate_jobs WHERE id = ?", (job_id,)
+            )
+            row = cursor.fetchone()
+        return str(row[0]) if row is not None else None
+
+    @abstractmethod
+    def get_first_transaction(self) -> Optional[Tuple]:
+        """
+        This function returns any row of the transactions table, to test
+        the connection.
+
+        Returns
+        -------
+        Optional[Tuple]
+            The row. None if the table is empty.
+        """
+
+    @abstractmethod
+    def get_daily_purchases(self, weekday: int) -> List[Tuple]:
+        """
+        This function returns the total amount and the number of purchases
+        of every day that was the given day of the week, from the rollups.
+
+        Parameters
+        ----------
+        weekday : int
+            The ISO day of the week, from 1 (Monday) to 7 (Sunday).
+
+        Returns
+        -------
+        List[Tuple]
+            The date, the amount and the number of purchases.
+        """
+
+    @abstractmethod
+    def insert_transaction(self, transaction: Tuple) -> bool:
+        """
+        This function inserts a transaction, unless there is a transaction
+        with the same fingerprint, and adds it to the rollups.
+
+        Parameters
+        ----------
+        transaction : Tuple
+            The fields of the transaction, in the order of TransactionInfo.
+
+        Returns
+        -------
+        bool
+            True if the transaction was inserted, False if it was a
+            duplicate.
+        """
+
+    @abstractmethod
+    def insert_transactions(
+        self, transactions: TransactionColumns
+    ) -> Tuple[int, int]:
+        """
+        This function inserts a batch of transactions in a single database
+        transaction, skipping the fingerprints already stored, and adds the
+        inserted ones to the rollups.
+
+        Parameters
+        ----------
+        transactions : TransactionColumns
+            The transactions to insert, in columns.
+
+        Returns
+        -------
+        Tuple[int, int]
+            The number of rows inserted and the number of rows skipped
+            because they were duplicates.
+        """
+
+    @abstractmethod
+    def update_mailbox_state(
+        self, senders: List[str], state: MailboxState
+    ) -> None:
+        """
+        This function persists the state of the synchronization of the
+        mailbox for the senders.
+
+        Parameters
+        ----------
+        senders : List[str]
+            The email addresses of the senders.
+        state : MailboxState
+            The state of the synchronization.
+        """
+
+    @abstractmethod
+    def backfill_fingerprints(
+        self, batch_size: int = 1000
+    ) -> Tuple[int, int]:
+        """
+        This function fills the fingerprint of the transactions stored
+        before the fingerprint column existed. When several transactions
+        have the same fingerprint only the oldest one receives it.
+
+        Parameters
+        ----------
+        batch_size : int, optional
+            The number of transactions updated at once.
+
+        Returns
+        -------
+        Tuple[int, int]
+            The number of transactions updated and the number of
+            transactions left without fingerprint.
+        """
+
+    @abstractmethod
+    def rebuild_rollups(self) -> int:
+        """
+        This function computes again the daily_rollups table from the
+        transactions table, creating it if it does not exist. The inserts
+        wait until it finishes, so no transaction is counted twice.
+
+        Returns
+        -------
+        int
+            The number of rollups.
+        """
+
+    @abstractmethod
+    def save_populate_job(
+        self, job_id: str, timeframe: str, status: str, payload: str
+    ) -> None:
+        """
+        This function persists the progress of a job that populates the
+        transactions table, so it can be resumed after an interruption.
+
+        Parameters
+        ----------
+        job_id : str
+            The identifier of the job.
+        timeframe : str
+            The timeframe the job populates.
+        status : str
+            The status of the job.
+        payload : str
+            The JSON of the job.
+        """
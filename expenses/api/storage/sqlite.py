@@ -0,0 +1,380 @@
+import datetime
+import os
+import sqlite3
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from expenses.api.storage.base import TransactionRepository
+from expenses.core.dataclasses import MailboxState
+from expenses.core.pool import ConnectionPool
+from expenses.processors.schemas import (
+    TransactionColumns,
+    get_transaction_fingerprint,
+)
+
+# Check if the file exists
+if os.path.exists("expenses/.env"):
+    load_dotenv(dotenv_path="expenses/.env")
+
+# The datetimes are stored as ISO 8601 text without time zone, as the
+# local times of SQL Server, and read back as datetimes and dates in the
+# columns declared as TIMESTAMP and DATE
+sqlite3.register_adapter(
+    datetime.datetime,
+    lambda value: value.replace(tzinfo=None).isoformat(" "),
+)
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_converter(
+    "TIMESTAMP",
+    lambda value: datetime.datetime.fromisoformat(value.decode()),
+)
+sqlite3.register_converter(
+    "DATE", lambda value: datetime.date.fromisoformat(value.decode())
+)
+
+# The tables of the database, with the same columns as in SQL Server
+SCHEMA_ = """
+    CREATE TABLE IF NOT EXISTS transactions (
+        id INTEGER PRIMARY KEY,
+        transaction_type TEXT NOT NULL,
+        amount REAL NOT NULL,
+        merchant TEXT,
+        datetime TIMESTAMP NOT NULL,
+        payment_method TEXT,
+        email_log_id TEXT,
+        fingerprint TEXT UNIQUE
+    );
+
+    CREATE INDEX IF NOT EXISTS ix_transactions_datetime
+        ON transactions (datetime);
+
+    CREATE TABLE IF NOT EXISTS mailbox_sync_state (
+        email_from TEXT PRIMARY KEY,
+        uidvalidity INTEGER NOT NULL,
+        last_uid INTEGER NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS daily_rollups (
+        date_ DATE NOT NULL,
+        transaction_type TEXT NOT NULL,
+        merchant TEXT NOT NULL,
+        amount_sum REAL NOT NULL,
+        trx_count INTEGER NOT NULL,
+        amount_min REAL NOT NULL,
+        amount_max REAL NOT NULL,
+        PRIMARY KEY (date_, transaction_type, merchant)
+    );
+
+    CREATE TABLE IF NOT EXISTS populate_jobs (
+        id TEXT PRIMARY KEY,
+        timeframe TEXT NOT NULL,
+        status TEXT NOT NULL,
+        updated_at TIMESTAMP NOT NULL,
+        payload TEXT NOT NULL
+    );
+
+    CREATE TRIGGER IF NOT EXISTS tr_transactions_daily_rollups
+    AFTER INSERT ON transactions
+    BEGIN
+        INSERT INTO daily_rollups
+        (
+            date_,
+            transaction_type,
+            merchant,
+            amount_sum,
+            trx_count,
+            amount_min,
+            amount_max
+        )
+        VALUES (
+            date(NEW.datetime),
+            NEW.transaction_type,
+            COALESCE(NEW.merchant, ''),
+            NEW.amount,
+            1,
+            NEW.amount,
+            NEW.amount
+        )
+        ON CONFLICT (date_, transaction_type, merchant) DO UPDATE SET
+            amount_sum = amount_sum + excluded.amount_sum,
+            trx_count = trx_count + 1,
+            amount_min = MIN(amount_min, excluded.amount_min),
+            amount_max = MAX(amount_max, excluded.amount_max);
+    END;
+    """
+
+
+def connect_sqlite(path: str) -> sqlite3.Connection:
+    """
+    This function opens a connection to a SQLite database in WAL mode, so
+    the readers do not block the writer.
+
+    Parameters
+    ----------
+    path : str
+        The path of the database file.
+
+    Returns
+    -------
+    sqlite3.Connection
+        The connection to the database.
+    """
+    conn = sqlite3.connect(
+        path,
+        timeout=30,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        check_same_thread=False,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def ping_sqlite(conn: sqlite3.Connection) -> bool:
+    """
+    This function checks if the connection is usable with a trivial query.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        The connection to check.
+
+    Returns
+    -------
+    bool
+        True if the query succeeded, False otherwise.
+    """
+    return conn.execute("SELECT 1").fetchone()[0] == 1
+
+
+class SQLiteRepository(TransactionRepository):
+    """
+    This class stores the transactions in an embedded SQLite database, to
+    run the API locally without external services. The tables are created
+    if they do not exist. The rollups are updated by a trigger on the
+    inserts, so the rows skipped as duplicates are never counted.
+    """
+
+    date_expression = "date(datetime)"
+
+    def __init__(self, path: str):
+        self.path = path
+        super().__init__(
+            ConnectionPool(
+                connect=lambda: connect_sqlite(path),
+                ping=ping_sqlite,
+                close=lambda conn: conn.close(),
+                max_size=int(os.getenv("DATABASE_POOL_SIZE", 4)),
+                max_overflow=int(os.getenv("DATABASE_POOL_MAX_OVERFLOW", 4)),
+                idle_timeout=float(
+                    os.getenv("DATABASE_POOL_IDLE_TIMEOUT", 300)
+                ),
+                checkout_timeout=float(
+                    os.getenv("DATABASE_POOL_CHECKOUT_TIMEOUT", 30)
+                ),
+            )
+        )
+
+        with self.connection() as conn:
+            has_rollups = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'daily_rollups'"
+            ).fetchone()
+            conn.executescript(SCHEMA_)
+
+        # The rollups of a database created before them are computed once
+        if has_rollups is None:
+            self.rebuild_rollups()
+
+    def get_first_transaction(self) -> Optional[Tuple]:
+        with self.cursor() as cursor:
+            cursor.execute("SELECT * FROM transactions LIMIT 1")
+            row = cursor.fetchone()
+        return tuple(row) if row is not None else None
+
+    def get_daily_purchases(self, weekday: int) -> List[Tuple]:
+        # %w is 0 on Sunday, so it is shifted to the ISO day of the week
+        with self.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT date_,
+                        SUM(amount_sum) AS amount_sum,
+                        SUM(trx_count) AS total_count
+                FROM daily_rollups
+                WHERE transaction_type = 'Compra' AND
+                        (CAST(strftime('%w', date_) AS INTEGER) + 6) % 7
+                        + 1 = ?
+                GROUP BY date_
+                """,
+                (weekday,),
+            )
+            return cursor.fetchall()
+
+    def insert_transaction(self, transaction: Tuple) -> bool:
+        with self.connection() as conn:
+            inserted = conn.execute(
+                """
+                INSERT INTO transactions
+                (
+                    transaction_type,
+                    amount,
+                    merchant,
+                    datetime,
+                    payment_method,
+                    email_log_id,
+                    fingerprint
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (fingerprint) DO NOTHING
+                """,
+                transaction
+                + (get_transaction_fingerprint(*transaction[:5]),),
+            ).rowcount
+            conn.commit()
+        return inserted > 0
+
+    def insert_transactions(
+        self, transactions: TransactionColumns
+    ) -> Tuple[int, int]:
+        """
+        The rows are inserted with a single executemany, which ignores the
+        fingerprints already stored or repeated in the batch.
+        """
+        rows = list(transactions.fingerprint_rows())
+        if not rows:
+            return 0, 0
+
+        with self.connection() as conn:
+            inserted = conn.executemany(
+                """
+                INSERT INTO transactions
+                (
+                    transaction_type,
+                    amount,
+                    merchant,
+                    datetime,
+                    payment_method,
+                    email_log_id,
+                    fingerprint
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (fingerprint) DO NOTHING
+                """,
+                rows,
+            ).rowcount
+            conn.commit()
+
+        return inserted, len(rows) - inserted
+
+    def update_mailbox_state(
+        self, senders: List[str], state: MailboxState
+    ) -> None:
+        with self.connection() as conn:
+            conn.executemany(
+                """
+                INSERT INTO mailbox_sync_state
+                    (email_from, uidvalidity, last_uid)
+                VALUES (?, ?, ?)
+                ON CONFLICT (email_from) DO UPDATE SET
+                    uidvalidity = excluded.uidvalidity,
+                    last_uid = excluded.last_uid
+                """,
+                [
+                    (sender, state.uidvalidity, state.last_uid)
+                    for sender in senders
+                ],
+            )
+            conn.commit()
+
+    def backfill_fingerprints(
+        self, batch_size: int = 1000
+    ) -> Tuple[int, int]:
+        """
+        The transactions without fingerprint are read from the oldest, so
+        the oldest of the duplicates receives the fingerprint, and updated
+        with one executemany per batch.
+        """
+        with self.connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT
+                    id,
+                    transaction_type,
+                    amount,
+                    merchant,
+                    datetime,
+                    payment_method
+                FROM transactions
+                WHERE fingerprint IS NULL
+                ORDER BY datetime, id
+                """
+            ).fetchall()
+
+            updated = 0
+            for start in range(0, len(rows), batch_size):
+                end = start + batch_size
+                updates = []
+                for row in rows[start:end]:
+                    fingerprint = get_transaction_fingerprint(*row[1:])
+                    updates.append((fingerprint, row[0], fingerprint))
+                updated += conn.executemany(
+                    """
+                    UPDATE transactions
+                    SET fingerprint = ?
+                    WHERE id = ? AND NOT EXISTS (
+                        SELECT 1 FROM transactions WHERE fingerprint = ?
+                    )
+                    """,
+                    updates,
+                ).rowcount
+                conn.commit()
+
+            missing = conn.execute(
+                "SELECT COUNT(*) FROM transactions WHERE fingerprint IS NULL"
+            ).fetchone()[0]
+
+        return updated, missing
+
+    def rebuild_rollups(self) -> int:
+        """
+        The rollups are computed with a single statement in an immediate
+        transaction, which holds the lock of the writers until the commit.
+        """
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM daily_rollups")
+            rollups = conn.execute(
+                f"""
+                INSERT INTO daily_rollups
+                (
+                    date_,
+                    transaction_type,
+                    merchant,
+                    amount_sum,
+                    trx_count,
+                    amount_min,
+                    amount_max
+                )
+                {self._get_query_to_aggregate()}
+                """
+            ).rowcount
+            conn.commit()
+        return rollups
+
+    def save_populate_job(
+        self, job_id: str, timeframe: str, status: str, payload: str
+    ) -> None:
+        with self.connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO populate_jobs
+                    (id, timeframe, status, updated_at, payload)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    status = excluded.status,
+                    updated_at = excluded.updated_at,
+                    payload = excluded.payload
+                """,
+                (job_id, timeframe, status, payload),
+            )
+            conn.commit()
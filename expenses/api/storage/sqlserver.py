@@ -0,0 +1,789 @@
+import os
+from typing import List, Optional, Tuple
+
+import pyodbc
+from dotenv import load_dotenv
+
+from expenses.api.storage.base import TransactionRepository
+from expenses.core.dataclasses import MailboxState
+from expenses.core.pool import ConnectionPool
+from expenses.processors.schemas import (
+    TransactionColumns,
+    get_transaction_fingerprint,
+)
+
+# Check if the file exists
+if os.path.exists("expenses/.env"):
+    load_dotenv(dotenv_path="expenses/.env")
+
+
+def connect_database() -> pyodbc.Connection:
+    """
+    This function opens a new connection to the database.
+
+    Returns
+    -------
+    pyodbc.Connection
+        The connection to the database.
+    """
+    return pyodbc.connect(
+        f"""DRIVER=ODBC Driver 18 for SQL Server;\
+        SERVER={os.getenv("SERVER")};\
+        DATABASE={os.getenv("DATABASE")};\
+        UID={os.getenv("USERNAME")};\
+        PWD={os.getenv("PASSWORD")}"""
+    )
+
+
+def ping_database(conn: pyodbc.Connection) -> bool:
+    """
+    This function checks if the connection is alive with a trivial query.
+
+    Parameters
+    ----------
+    conn : pyodbc.Connection
+        The connection to check.
+
+    Returns
+    -------
+    bool
+        True if the query succeeded, False otherwise.
+    """
+    cursor = conn.cursor()
+    try:
+        return cursor.execute("SELECT 1").fetchone()[0] == 1
+    finally:
+        cursor.close()
+
+
+def close_database(conn: pyodbc.Connection) -> None:
+    """
+    This function closes a connection to the database.
+
+    Parameters
+    ----------
+    conn : pyodbc.Connection
+        The connection to close.
+    """
+    conn.close()
+
+
+def get_query_to_insert_values() -> str:
+    """
+    This function returns the query to insert a transaction in the database
+    if there is no transaction with the same fingerprint. The fingerprint
+    column has a unique index, so the duplicate check is a single seek.
+
+    Returns
+    -------
+    str
+        The query to insert the values in the database.
+    """
+    return """
+        MERGE transactions WITH (HOLDLOCK) AS target
+        USING (
+            SELECT
+                ? AS transaction_type,
+                ? AS amount,
+                ? AS merchant,
+                ? AS datetime,
+                ? AS payment_method,
+                ? AS email_log_id,
+                ? AS fingerprint
+        ) AS source
+        ON target.fingerprint = source.fingerprint
+        WHEN NOT MATCHED THEN
+            INSERT (
+                transaction_type,
+                amount,
+                merchant,
+                datetime,
+                payment_method,
+                email_log_id,
+                fingerprint
+            )
+            VALUES (
+                source.transaction_type,
+                source.amount,
+                source.merchant,
+                source.datetime,
+                source.payment_method,
+                source.email_log_id,
+                source.fingerprint
+            );
+        """
+
+
+def get_query_to_create_staging_table() -> str:
+    """
+    This function returns the query to create the staging table of the bulk
+    insertions. It is a temporary table of the session with the columns of
+    the transactions table and the order of arrival of the rows. The rows
+    that are inserted in the transactions table are copied to another
+    temporary table, to add them to the rollups.
+
+    Returns
+    -------
+    str
+        The query to create the staging table.
+    """
+    return """
+        IF OBJECT_ID('tempdb..#staging_transactions') IS NOT NULL
+            DROP TABLE #staging_transactions;
+
+        SELECT TOP 0
+            IDENTITY(INT, 1, 1) AS row_id,
+            transaction_type,
+            amount,
+            merchant,
+            datetime,
+            payment_method,
+            email_log_id,
+            fingerprint
+        INTO #staging_transactions
+        FROM transactions;
+
+        IF OBJECT_ID('tempdb..#inserted_transactions') IS NOT NULL
+            DROP TABLE #inserted_transactions;
+
+        SELECT TOP 0
+            transaction_type,
+            amount,
+            merchant,
+            datetime
+        INTO #inserted_transactions
+        FROM transactions;
+        """
+
+
+def get_query_to_insert_staging_values() -> str:
+    """
+    This function returns the query to insert the values in the staging
+    table.
+
+    Returns
+    -------
+    str
+        The query to insert the values in the staging table.
+    """
+    return """
+        INSERT INTO #staging_transactions
+        (
+            transaction_type,
+            amount,
+            merchant,
+            datetime,
+            payment_method,
+            email_log_id,
+            fingerprint
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+
+
+def get_query_to_insert_staging_into_transactions() -> str:
+    """
+    This function returns the query to insert the rows of the staging table
+    whose fingerprint is not in the transactions table. Only the first of
+    the rows with the same fingerprint in the staging table is inserted,
+    and the inserted rows are copied to #inserted_transactions.
+
+    Returns
+    -------
+    str
+        The query to insert the staging table into the transactions table.
+    """
+    return """
+        MERGE transactions WITH (HOLDLOCK) AS target
+        USING (
+            SELECT *
+            FROM (
+                SELECT
+                    *,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY fingerprint ORDER BY row_id
+                    ) AS duplicate_number
+                FROM #staging_transactions
+            ) AS numbered
+            WHERE duplicate_number = 1
+        ) AS source
+        ON target.fingerprint = source.fingerprint
+        WHEN NOT MATCHED THEN
+            INSERT (
+                transaction_type,
+                amount,
+                merchant,
+                datetime,
+                payment_method,
+                email_log_id,
+                fingerprint
+            )
+            VALUES (
+                source.transaction_type,
+                source.amount,
+                source.merchant,
+                source.datetime,
+                source.payment_method,
+                source.email_log_id,
+                source.fingerprint
+            )
+        OUTPUT
+            inserted.transaction_type,
+            inserted.amount,
+            inserted.merchant,
+            inserted.datetime
+        INTO #inserted_transactions;
+        """
+
+
+def get_query_to_create_rollups_table() -> str:
+    """
+    This function returns the query to create the daily_rollups table if it
+    does not exist.
+
+    Returns
+    -------
+    str
+        The query to create the rollups table.
+    """
+    return """
+        IF OBJECT_ID('daily_rollups') IS NULL
+            CREATE TABLE daily_rollups (
+                date_ DATE NOT NULL,
+                transaction_type NVARCHAR(50) NOT NULL,
+                merchant NVARCHAR(255) NOT NULL,
+                amount_sum FLOAT NOT NULL,
+                trx_count INT NOT NULL,
+                amount_min FLOAT NOT NULL,
+                amount_max FLOAT NOT NULL,
+                CONSTRAINT pk_daily_rollups
+                    PRIMARY KEY (date_, transaction_type, merchant)
+            );
+        """
+
+
+def get_query_to_create_mailbox_state_table() -> str:
+    """
+    This function returns the query to create the mailbox_sync_state table
+    if it does not exist. It holds the last UID synchronized of every
+    sender.
+
+    Returns
+    -------
+    str
+        The query to create the mailbox state table.
+    """
+    return """
+        IF OBJECT_ID('mailbox_sync_state') IS NULL
+            CREATE TABLE mailbox_sync_state (
+                email_from NVARCHAR(255) NOT NULL PRIMARY KEY,
+                uidvalidity BIGINT NOT NULL,
+                last_uid BIGINT NOT NULL
+            );
+        """
+
+
+def get_query_to_create_jobs_table() -> str:
+    """
+    This function returns the query to create the populate_jobs table if it
+    does not exist.
+
+    Returns
+    -------
+    str
+        The query to create the jobs table.
+    """
+    return """
+        IF OBJECT_ID('populate_jobs') IS NULL
+            CREATE TABLE populate_jobs (
+                id NVARCHAR(36) NOT NULL PRIMARY KEY,
+                timeframe NVARCHAR(20) NOT NULL,
+                status NVARCHAR(20) NOT NULL,
+                updated_at DATETIME2 NOT NULL,
+                payload NVARCHAR(MAX) NOT NULL
+            );
+        """
+
+
+def get_queries_to_add_fingerprints() -> List[str]:
+    """
+    This function returns the queries to add the fingerprint column to the
+    transactions table and its unique index, if they do not exist. They
+    must run in separate batches, since a batch cannot use a column it
+    adds. The index is filtered, so the rows without fingerprint do not
+    collide until backfill_fingerprints fills them, which
+    SQLServerRepository does right after.
+
+    Returns
+    -------
+    List[str]
+        The queries to add the fingerprints, in order.
+    """
+    return [
+        """
+        IF COL_LENGTH('transactions', 'fingerprint') IS NULL
+            ALTER TABLE transactions ADD fingerprint CHAR(64) NULL;
+        """,
+        """
+        IF NOT EXISTS (
+            SELECT 1 FROM sys.indexes
+            WHERE name = 'ux_transactions_fingerprint'
+                AND object_id = OBJECT_ID('transactions')
+        )
+            CREATE UNIQUE INDEX ux_transactions_fingerprint
+                ON transactions (fingerprint)
+                WHERE fingerprint IS NOT NULL;
+        """,
+    ]
+
+
+def get_query_to_merge_rollups(source: str) -> str:
+    """
+    This function returns the query to add the aggregates of some new
+    transactions to the daily_rollups table.
+
+    Parameters
+    ----------
+    source : str
+        The query of the aggregates, with the columns of the rollups table.
+
+    Returns
+    -------
+    str
+        The query to merge the aggregates into the rollups table.
+    """
+    return f"""
+        MERGE daily_rollups WITH (HOLDLOCK) AS target
+        USING ({source}) AS source
+        ON target.date_ = source.date_
+            AND target.transaction_type = source.transaction_type
+            AND target.merchant = source.merchant
+        WHEN MATCHED THEN
+            UPDATE SET
+                amount_sum = target.amount_sum + source.amount_sum,
+                trx_count = target.trx_count + source.trx_count,
+                amount_min = CASE
+                    WHEN source.amount_min < target.amount_min
+                    THEN source.amount_min
+                    ELSE target.amount_min
+                END,
+                amount_max = CASE
+                    WHEN source.amount_max > target.amount_max
+                    THEN source.amount_max
+                    ELSE target.amount_max
+                END
+        WHEN NOT MATCHED THEN
+            INSERT (
+                date_,
+                transaction_type,
+                merchant,
+                amount_sum,
+                trx_count,
+                amount_min,
+                amount_max
+            )
+            VALUES (
+                source.date_,
+                source.transaction_type,
+                source.merchant,
+                source.amount_sum,
+                source.trx_count,
+                source.amount_min,
+                source.amount_max
+            );
+        """
+
+
+class SQLServerRepository(TransactionRepository):
+    """
+    This class stores the transactions in SQL Server, through the ODBC
+    driver. The connections are borrowed from a pool configured with the
+    DATABASE_POOL_* environment variables, and the ones whose link broke
+    while borrowed are discarded, so the next checkout reconnects.
+
+    The rollups are updated by the same database transaction that inserts
+    the transactions, from the rows that were actually inserted. The
+    rollups table is created and filled on the first use, as the tables of
+    the state of the mailbox and of the populate jobs, and the fingerprint
+    column of the transactions and its unique index. The fingerprints of
+    the transactions stored before the column existed are filled before
+    the repository can insert, so their MERGE never duplicates them.
+    """
+
+    date_expression = "CAST(datetime AS DATE)"
+
+    def __init__(self):
+        super().__init__(
+            ConnectionPool(
+                connect=connect_database,
+                ping=ping_database,
+                close=close_database,
+                max_size=int(os.getenv("DATABASE_POOL_SIZE", 4)),
+                max_overflow=int(os.getenv("DATABASE_POOL_MAX_OVERFLOW", 4)),
+                max_lifetime=float(
+                    os.getenv("DATABASE_POOL_MAX_LIFETIME", 1800)
+                ),
+                idle_timeout=float(
+                    os.getenv("DATABASE_POOL_IDLE_TIMEOUT", 300)
+                ),
+                checkout_timeout=float(
+                    os.getenv("DATABASE_POOL_CHECKOUT_TIMEOUT", 30)
+                ),
+                discard_on=(pyodbc.OperationalError, pyodbc.InterfaceError),
+            )
+        )
+
+        with self.cursor() as cursor:
+            for query in get_queries_to_add_fingerprints():
+                cursor.execute(query)
+            cursor.execute(get_query_to_create_mailbox_state_table())
+            cursor.execute(get_query_to_create_jobs_table())
+            cursor.execute("SELECT OBJECT_ID('daily_rollups')")
+            has_rollups = cursor.fetchone()[0] is not None
+            cursor.commit()
+
+        # The MERGE of the inserts only finds the stored transactions by
+        # their fingerprint, so the transactions stored before the column
+        # existed must have it before the repository is used
+        self.backfill_fingerprints()
+
+        if not has_rollups:
+            self.rebuild_rollups()
+
+    def get_first_transaction(self) -> Optional[Tuple]:
+        with self.cursor() as cursor:
+            cursor.execute("SELECT TOP 1 * FROM transactions")
+            row = cursor.fetchone()
+        return tuple(row) if row is not None else None
+
+    def get_daily_purchases(self, weekday: int) -> List[Tuple]:
+        with self.cursor() as cursor:
+            cursor.execute(
+                """
+                    SET DATEFIRST 1;
+                    SELECT date_,
+                            SUM(amount_sum) AS amount_sum,
+                            SUM(trx_count) AS total_count
+                    FROM daily_rollups
+                    WHERE transaction_type = 'Compra' AND
+                            DATEPART(weekday, date_) = ?
+                    GROUP BY date_
+                """,
+                weekday,
+            )
+            return [tuple(row) for row in cursor.fetchall()]
+
+    def insert_transaction(self, transaction: Tuple) -> bool:
+        with self.cursor() as cursor:
+            cursor.execute(
+                get_query_to_insert_values(),
+                transaction
+                + (get_transaction_fingerprint(*transaction[:5]),),
+            )
+            inserted = cursor.rowcount
+            if inserted > 0:
+                cursor.execute(
+                    get_query_to_merge_rollups(
+                        """
+                        SELECT
+                            CAST(datetime AS DATE) AS date_,
+                            transaction_type,
+                            COALESCE(merchant, '') AS merchant,
+                            amount AS amount_sum,
+                            1 AS trx_count,
+                            amount AS amount_min,
+                            amount AS amount_max
+                        FROM (
+                            SELECT
+                                ? AS transaction_type,
+                                CAST(? AS FLOAT) AS amount,
+                                ? AS merchant,
+                                ? AS datetime
+                        ) AS inserted_transaction
+                        """
+                    ),
+                    transaction[:4],
+                )
+            cursor.commit()
+        return inserted > 0
+
+    def insert_transactions(
+        self, transactions: TransactionColumns
+    ) -> Tuple[int, int]:
+        """
+        The rows are sent at once to a staging table with fast_executemany
+        and then inserted with one set-based statement.
+        """
+        rows = list(transactions.fingerprint_rows())
+        if not rows:
+            return 0, 0
+
+        with self.cursor() as cursor:
+            try:
+                cursor.execute(get_query_to_create_staging_table())
+                cursor.fast_executemany = True
+                cursor.executemany(
+                    get_query_to_insert_staging_values(), rows
+                )
+                cursor.execute(
+                    get_query_to_insert_staging_into_transactions()
+                )
+                inserted = cursor.rowcount
+                cursor.execute(
+                    get_query_to_merge_rollups(
+                        self._get_query_to_aggregate(
+                            "#inserted_transactions"
+                        )
+                    )
+                )
+                cursor.execute(
+                    """
+                    DROP TABLE #staging_transactions;
+                    DROP TABLE #inserted_transactions;
+                    """
+                )
+                cursor.commit()
+            finally:
+                cursor.fast_executemany = False
+
+        return inserted, len(rows) - inserted
+
+    def update_mailbox_state(
+        self, senders: List[str], state: MailboxState
+    ) -> None:
+        with self.cursor() as cursor:
+            for sender in senders:
+                cursor.execute(
+                    """
+                    MERGE mailbox_sync_state AS target
+                    USING (
+                        SELECT
+                            ? AS email_from,
+                            ? AS uidvalidity,
+                            ? AS last_uid
+                    ) AS source
+                    ON target.email_from = source.email_from
+                    WHEN MATCHED THEN
+                        UPDATE SET
+                            uidvalidity = source.uidvalidity,
+                            last_uid = source.last_uid
+                    WHEN NOT MATCHED THEN
+                        INSERT (email_from, uidvalidity, last_uid)
+                        VALUES (
+                            source.email_from,
+                            source.uidvalidity,
+                            source.last_uid
+                        );
+                    """,
+                    sender,
+                    state.uidvalidity,
+                    state.last_uid,
+                )
+            cursor.commit()
+
+    def backfill_fingerprints(
+        self, batch_size: int = 1000
+    ) -> Tuple[int, int]:
+        """
+        The distinct transactions without fingerprint are read at once,
+        their fingerprints are computed with get_transaction_fingerprint and
+        written back with one set-based update per batch. It can be run
+        again safely, e.g. after an interruption.
+        """
+        with self.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT DISTINCT
+                    transaction_type,
+                    amount,
+                    merchant,
+                    datetime,
+                    payment_method
+                FROM transactions
+                WHERE fingerprint IS NULL
+                """
+            )
+            keys = cursor.fetchall()
+
+            updated = 0
+            for start in range(0, len(keys), batch_size):
+                end = start + batch_size
+                updated += self._update_fingerprints(
+                    cursor,
+                    [
+                        tuple(key) + (get_transaction_fingerprint(*key),)
+                        for key in keys[start:end]
+                    ],
+                )
+
+            cursor.execute(
+                "SELECT COUNT(*) FROM transactions WHERE fingerprint IS NULL"
+            )
+            return updated, int(cursor.fetchone()[0])
+
+    def rebuild_rollups(self) -> int:
+        """
+        The transactions table is locked in shared mode first, so the
+        inserts wait until the rollups are computed again with a single
+        statement.
+        """
+        with self.cursor() as cursor:
+            cursor.execute(get_query_to_create_rollups_table())
+            cursor.execute(
+                "SELECT COUNT(*) FROM transactions WITH (TABLOCK, HOLDLOCK)"
+            )
+            cursor.fetchone()
+            cursor.execute("DELETE FROM daily_rollups")
+            cursor.execute(
+                f"""
+                INSERT INTO daily_rollups
+                (
+                    date_,
+                    transaction_type,
+                    merchant,
+                    amount_sum,
+                    trx_count,
+                    amount_min,
+                    amount_max
+                )
+                {self._get_query_to_aggregate()}
+                """
+            )
+            rollups = cursor.rowcount
+            cursor.commit()
+        return rollups
+
+    def save_populate_job(
+        self, job_id: str, timeframe: str, status: str, payload: str
+    ) -> None:
+        with self.cursor() as cursor:
+            cursor.execute(
+                """
+                MERGE populate_jobs WITH (HOLDLOCK) AS target
+                USING (
+                    SELECT
+                        ? AS id,
+                        ? AS timeframe,
+                        ? AS status,
+                        ? AS payload
+                ) AS source
+                ON target.id = source.id
+                WHEN MATCHED THEN
+                    UPDATE SET
+                        status = source.status,
+                        updated_at = SYSUTCDATETIME(),
+                        payload = source.payload
+                WHEN NOT MATCHED THEN
+                    INSERT (id, timeframe, status, updated_at, payload)
+                    VALUES (
+                        source.id,
+                        source.timeframe,
+                        source.status,
+                        SYSUTCDATETIME(),
+                        source.payload
+                    );
+                """,
+                job_id,
+                timeframe,
+                status,
+                payload,
+            )
+            cursor.commit()
+
+    @staticmethod
+    def _update_fingerprints(
+        cursor: pyodbc.Cursor, rows: List[Tuple]
+    ) -> int:
+        """
+        This function writes the fingerprints of a batch of transactions.
+
+        Parameters
+        ----------
+        cursor : pyodbc.Cursor
+            The cursor to the database.
+        rows : List[Tuple]
+            The type, amount, merchant, datetime and payment method of the
+            transactions, and their fingerprint.
+
+        Returns
+        -------
+        int
+            The number of transactions updated.
+        """
+        try:
+            cursor.execute(
+                """
+                IF OBJECT_ID('tempdb..#staging_fingerprints') IS NOT NULL
+                    DROP TABLE #staging_fingerprints;
+
+                SELECT TOP 0
+                    transaction_type,
+                    amount,
+                    merchant,
+                    datetime,
+                    payment_method,
+                    fingerprint
+                INTO #staging_fingerprints
+                FROM transactions;
+                """
+            )
+            cursor.fast_executemany = True
+            cursor.executemany(
+                """
+                INSERT INTO #staging_fingerprints
+                (
+                    transaction_type,
+                    amount,
+                    merchant,
+                    datetime,
+                    payment_method,
+                    fingerprint
+                )
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            cursor.execute(
+                """
+                WITH numbered AS (
+                    SELECT
+                        transactions.fingerprint,
+                        staging.fingerprint AS new_fingerprint,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY staging.fingerprint
+                            ORDER BY transactions.datetime
+                        ) AS duplicate_number
+                    FROM transactions
+                    -- INTERSECT compares the NULLs as equal, so the rows
+                    -- without merchant or payment method are matched too
+                    INNER JOIN #staging_fingerprints AS staging ON EXISTS (
+                        SELECT
+                            transactions.transaction_type,
+                            transactions.amount,
+                            transactions.merchant,
+                            transactions.datetime,
+                            transactions.payment_method
+                        INTERSECT
+                        SELECT
+                            staging.transaction_type,
+                            staging.amount,
+                            staging.merchant,
+                            staging.datetime,
+                            staging.payment_method
+                    )
+                    WHERE transactions.fingerprint IS NULL
+                )
+                UPDATE numbered
+                SET fingerprint = new_fingerprint
+                WHERE duplicate_number = 1 AND NOT EXISTS (
+                    SELECT 1 FROM transactions
+                    WHERE transactions.fingerprint = numbered.new_fingerprint
+                )
+                """
+            )
+            updated = cursor.rowcount
+            cursor.execute("DROP TABLE #staging_fingerprints")
+            cursor.commit()
+        finally:
+            cursor.fast_executemany = False
+        return updated
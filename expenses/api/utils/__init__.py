@@ -1,25 +1,61 @@
 from expenses.api.utils.anomaly import get_model
+from expenses.api.utils.cache import RESPONSE_CACHE_, RESPONSE_CACHE_TTLS_
 from expenses.api.utils.database import (
-    get_cursor,
+    get_mailbox_state,
     get_merchants_values,
-    get_query_to_insert_values,
     get_summary_a_day_like_today,
+    get_transaction_totals,
     get_transactions_from_database,
+    update_mailbox_state,
 )
 from expenses.api.utils.dates import get_date_from_search
+from expenses.api.utils.export import (
+    EXPORT_BATCH_SIZE_,
+    EXPORT_FIELDS_,
+    EXPORT_MEDIA_TYPES_,
+    encode_csv,
+    encode_ndjson,
+    stream_export,
+)
+from expenses.api.utils.jobs import (
+    POPULATE_JOBS_,
+    JobConflictError,
+    PopulateJob,
+    insert_chunk_into_database,
+)
+from expenses.api.utils.responses import conditional_response, render_json
 from expenses.api.utils.transactions import (
-    get_transactions,
+    get_transactions_async,
+    iter_new_transactions,
     process_transactions_api_expenses,
+    summarize_transaction_totals,
 )
 
 __all__ = [
     "get_date_from_search",
-    "get_transactions",
+    "get_transactions_async",
+    "iter_new_transactions",
     "process_transactions_api_expenses",
-    "get_cursor",
+    "summarize_transaction_totals",
     "get_transactions_from_database",
+    "get_transaction_totals",
     "get_merchants_values",
-    "get_query_to_insert_values",
     "get_summary_a_day_like_today",
+    "get_mailbox_state",
+    "update_mailbox_state",
     "get_model",
+    "RESPONSE_CACHE_",
+    "RESPONSE_CACHE_TTLS_",
+    "render_json",
+    "conditional_response",
+    "PopulateJob",
+    "JobConflictError",
+    "POPULATE_JOBS_",
+    "insert_chunk_into_database",
+    "EXPORT_BATCH_SIZE_",
+    "EXPORT_FIELDS_",
+    "EXPORT_MEDIA_TYPES_",
+    "encode_ndjson",
+    "encode_csv",
+    "stream_export",
 ]
@@ -0,0 +1,27 @@
+import os
+from typing import Dict
+
+from dotenv import load_dotenv
+
+from expenses.core.cache import TTLCache
+
+# Check if the file exists
+if os.path.exists("expenses/.env"):
+    load_dotenv(dotenv_path="expenses/.env")
+
+# Seconds the summaries and the merchants of every timeframe are cached.
+# The shorter timeframes change more often with the new transactions.
+RESPONSE_CACHE_TTLS_: Dict[str, float] = {
+    "daily": float(os.getenv("RESPONSE_CACHE_TTL_DAILY", 60)),
+    "weekly": float(os.getenv("RESPONSE_CACHE_TTL_WEEKLY", 300)),
+    "partial_weekly": float(os.getenv("RESPONSE_CACHE_TTL_WEEKLY", 300)),
+    "monthly": float(os.getenv("RESPONSE_CACHE_TTL_MONTHLY", 900)),
+}
+
+# Process-wide cache of the rendered responses of the expenses and
+# merchants endpoints, their JSON body and ETag. It is invalidated when new
+# transactions are stored.
+RESPONSE_CACHE_ = TTLCache(
+    max_size=int(os.getenv("RESPONSE_CACHE_SIZE", 256)),
+    default_ttl=RESPONSE_CACHE_TTLS_["daily"],
+)
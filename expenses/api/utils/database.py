@@ -1,53 +1,42 @@
 import datetime
-import os
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
-import pyodbc
-from dotenv import load_dotenv
 
 from expenses.api.schemas import SummaryMerchant
-from expenses.processors.schemas import TransactionInfo
+from expenses.api.storage import get_repository
+from expenses.core.dataclasses import MailboxState
+from expenses.processors.schemas import TransactionColumns
 
-# Check if the file exists
-if os.path.exists("expenses/.env"):
-    load_dotenv(dotenv_path="expenses/.env")
 
-
-def get_cursor(return_conn: bool = False) -> Union[pyodbc.Cursor, None]:
+def get_transactions_from_database(
+    date_from: datetime.datetime,
+) -> TransactionColumns:
     """
-    This function creates a connection to the database.
+    Searches for the transactions in the database given a date.
 
     Parameters
     ----------
-    return_conn : bool, optional
-        If True, the function returns the connection to the database,
-        by default False.
+    date_from : datetime.datetime
+        The date to search.
+
     Returns
     -------
-    pyodbc.Connection
-        The connection to the database.
+    TransactionColumns
+        The transactions, in columns.
     """
     try:
-        # Establish the connection
-        conn = pyodbc.connect(
-            f"""DRIVER=ODBC Driver 18 for SQL Server;\
-            SERVER={os.getenv("SERVER")};\
-            DATABASE={os.getenv("DATABASE")};\
-            UID={os.getenv("USERNAME")};\
-            PWD={os.getenv("PASSWORD")}"""
-        )
-        cursor = conn.cursor()
-        return cursor if not return_conn else (conn, cursor)
+        return get_repository().get_transactions(date_from)
     except Exception:
-        return None
+        return TransactionColumns()
 
 
-def get_transactions_from_database(
+def get_transaction_totals(
     date_from: datetime.datetime,
-) -> List[TransactionInfo]:
+) -> List[Tuple[str, float, int]]:
     """
-    Searches for the transactions in the database given a date.
+    This function returns the total amount and the number of transactions
+    of every transaction type since the day of a date, from the rollups.
 
     Parameters
     ----------
@@ -56,49 +45,11 @@ def get_transactions_from_database(
 
     Returns
     -------
-    List[TransactionInfo]
-        The list of transactions.
+    List[Tuple[str, float, int]]
+        The transaction type, the amount and the number of transactions.
     """
     try:
-        cursor = get_cursor()
-
-        # Get the transactions
-        cursor.execute(
-            """
-            SELECT
-                transaction_type,
-                amount,
-                merchant,
-                datetime,
-                payment_method,
-                email_log_id
-            FROM transactions
-            WHERE datetime >= ?
-            """,
-            date_from.date(),
-        )
-        transactions_from_db = cursor.fetchall()
-
-        # Close the connection
-        cursor.close()
-
-        # Get the transactions with the correct type
-        if len(transactions_from_db) > 0:
-            transactions = [
-                TransactionInfo(
-                    transaction_type=str(transaction[0]),
-                    amount=transaction[1],
-                    merchant=str(transaction[2]),
-                    datetime=transaction[3],
-                    paynment_method=str(transaction[4]),
-                    email_log=transaction[5],
-                )
-                for transaction in transactions_from_db
-            ]
-        else:
-            transactions = []
-
-        return transactions
+        return get_repository().get_transaction_totals(date_from)
     except Exception:
         return []
 
@@ -115,29 +66,8 @@ def get_merchants_values(
         The date to search.
     """
     try:
-        cursor = get_cursor()
-
-        # Get the transactions
-        cursor.execute(
-            """
-            SELECT
-                merchant,
-                SUM(amount) AS amount,
-                COUNT(*) AS count
-            FROM transactions
-            WHERE datetime >= ? AND transaction_type = 'Compra'
-            AND merchant != ''
-            GROUP BY merchant
-            ORDER BY amount DESC
-            """,
-            date_from,
-        )
-
         # Get the merchants
-        merchants_inform = cursor.fetchall()
-
-        # Close the connection
-        cursor.close()
+        merchants_inform = get_repository().get_merchants(date_from)
 
         # Get the transactions with the correct type
         if len(merchants_inform) > 0:
@@ -157,36 +87,64 @@ def get_merchants_values(
         return []
 
 
-def get_query_to_insert_values() -> str:
+def get_mailbox_state(
+    email_from: Union[str, List[str]]
+) -> Optional[MailboxState]:
     """
-    This function returns the query to insert the values in the database.
+    This function returns the state of the last synchronization of the
+    mailbox for the specified email addresses. When several addresses are
+    synchronized together, the oldest state is returned, so none of their
+    emails are missed.
+
+    Parameters
+    ----------
+    email_from : Union[str, List[str]]
+        The email address or addresses of the senders.
 
     Returns
     -------
-    str
-        The query to insert the values in the database.
+    Optional[MailboxState]
+        The state of the last synchronization. None if some sender has never
+        been synchronized or the senders were synchronized with different
+        UIDVALIDITY values.
+
+    Raises
+    ------
+    Exception
+        If the state cannot be read. The error is not turned into None, so
+        a failing database does not force a full resynchronization.
+    """
+    senders = [email_from] if isinstance(email_from, str) else email_from
+    states = get_repository().get_mailbox_states(senders)
+
+    if (
+        len(states) != len(senders)
+        or len({state.uidvalidity for state in states}) != 1
+    ):
+        return None
+
+    return MailboxState(
+        uidvalidity=states[0].uidvalidity,
+        last_uid=min(state.last_uid for state in states),
+    )
+
+
+def update_mailbox_state(
+    email_from: Union[str, List[str]], state: MailboxState
+) -> None:
     """
-    return """
-        INSERT INTO transactions
-        (
-            transaction_type,
-            amount,
-            merchant,
-            datetime,
-            payment_method,
-            email_log_id
-        )
-        SELECT ?, ?, ?, ?, ?, ?
-        WHERE NOT EXISTS (
-            SELECT 1 FROM transactions
-            WHERE
-                transaction_type = ? AND
-                amount = ? AND
-                merchant = ? AND
-                datetime = ? AND
-                payment_method = ?
-        )
-        """
+    This function persists the state of the synchronization of the mailbox
+    for the specified email addresses.
+
+    Parameters
+    ----------
+    email_from : Union[str, List[str]]
+        The email address or addresses of the senders.
+    state : MailboxState
+        The state of the synchronization.
+    """
+    senders = [email_from] if isinstance(email_from, str) else email_from
+    get_repository().update_mailbox_state(senders, state)
 
 
 def get_summary_a_day_like_today(weekday: int) -> Dict:
@@ -205,27 +163,8 @@ def get_summary_a_day_like_today(weekday: int) -> Dict:
         The summary of all the transactions of a day like today.
     """
     try:
-        cursor = get_cursor()
-        # Get the transactions
-        cursor.execute(
-            """
-                SET DATEFIRST 1;
-                SELECT CAST(datetime AS DATE),
-                        SUM(amount) AS amount_sum,
-                        COUNT(*) AS total_count
-                FROM transactions
-                WHERE transaction_type = 'Compra' AND
-                        DATEPART(weekday, datetime) = ?
-                GROUP BY CAST(datetime AS DATE)
-            """,
-            weekday,
-        )
-
         # Get the summary
-        transactions = cursor.fetchall()
-
-        # Close the connection
-        cursor.close()
+        transactions = get_repository().get_daily_purchases(weekday)
     except Exception:
         return {}
 
@@ -0,0 +1,150 @@
+import asyncio
+import csv
+import datetime
+import decimal
+import io
+import json
+import os
+import threading
+from typing import Any, AsyncIterator, Iterator, List, Literal, Tuple
+
+from dotenv import load_dotenv
+
+from expenses.api.storage import DATABASE_EXECUTOR_
+from expenses.processors.schemas import TransactionInfo
+
+# Check if the file exists
+if os.path.exists("expenses/.env"):
+    load_dotenv(dotenv_path="expenses/.env")
+
+# Number of rows read from the database and sent in every piece of an
+# export
+EXPORT_BATCH_SIZE_ = int(os.getenv("EXPORT_BATCH_SIZE", 500))
+
+# The fields of every exported transaction, in the order of the rows
+EXPORT_FIELDS_ = list(TransactionInfo.__fields__)
+
+# The media type of every export format
+EXPORT_MEDIA_TYPES_ = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value: Any) -> Any:
+    """
+    This function converts the values of the rows that are not JSON
+    serializable: the datetimes to ISO 8601, as FastAPI does, and the
+    decimals of the drivers to floats.
+    """
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode_ndjson(rows: List[Tuple]) -> bytes:
+    """
+    This function encodes a batch of transactions as NDJSON, one object per
+    line.
+
+    Parameters
+    ----------
+    rows : List[Tuple]
+        The rows of the transactions, with the fields in EXPORT_FIELDS_.
+
+    Returns
+    -------
+    bytes
+        The lines of the transactions.
+    """
+    return "".join(
+        json.dumps(
+            dict(zip(EXPORT_FIELDS_, row)),
+            default=_json_default,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        + "\n"
+        for row in rows
+    ).encode("utf-8")
+
+
+def encode_csv(rows: List[Tuple]) -> bytes:
+    """
+    This function encodes a batch of transactions as CSV rows.
+
+    Parameters
+    ----------
+    rows : List[Tuple]
+        The rows of the transactions, with the fields in EXPORT_FIELDS_.
+
+    Returns
+    -------
+    bytes
+        The CSV rows of the transactions.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [
+            value.isoformat()
+            if isinstance(value, (datetime.datetime, datetime.date))
+            else value
+            for value in row
+        ]
+        for row in rows
+    )
+    return buffer.getvalue().encode("utf-8")
+
+
+async def stream_export(
+    batches: Iterator[List[Tuple]],
+    export_format: Literal["ndjson", "csv"],
+) -> AsyncIterator[bytes]:
+    """
+    This function encodes the batches of transactions read from the
+    database as they arrive, so the first ones are sent while the rest are
+    read. Every batch is read in the database executor, and the stream is
+    closed there too, releasing its connection, when it is exhausted or the
+    client disconnects.
+
+    Parameters
+    ----------
+    batches : Iterator[List[Tuple]]
+        The batches of transactions. See
+        TransactionRepository.iter_transaction_batches.
+    export_format : Literal["ndjson", "csv"]
+        The format of the export.
+
+    Yields
+    ------
+    bytes
+        The encoded batches, after the header of the CSV.
+    """
+    # The batches are read and closed in different threads, never at once
+    lock = threading.Lock()
+
+    def fetch() -> List[Tuple]:
+        with lock:
+            return next(batches, [])
+
+    def close() -> None:
+        with lock:
+            batches.close()
+
+    encode = encode_ndjson if export_format == "ndjson" else encode_csv
+    try:
+        if export_format == "csv":
+            yield encode_csv([EXPORT_FIELDS_])
+
+        while True:
+            rows = await DATABASE_EXECUTOR_.run(fetch)
+            if not rows:
+                break
+            yield encode(rows)
+    finally:
+        # A disconnection cancels the stream, but the connection must
+        # still be returned to the pool
+        await asyncio.shield(DATABASE_EXECUTOR_.run(close))
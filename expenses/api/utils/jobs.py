@@ -0,0 +1,406 @@
+import dataclasses
+import datetime
+import json
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from expenses.api.schemas import PopulateJobStatus
+from expenses.api.storage import get_repository
+from expenses.api.utils.cache import RESPONSE_CACHE_
+from expenses.api.utils.database import (
+    get_mailbox_state,
+    update_mailbox_state,
+)
+from expenses.api.utils.dates import get_date_from_search
+from expenses.api.utils.transactions import iter_new_transactions
+from expenses.constants import EMAILS_FROM_
+from expenses.core.dataclasses import MailboxState
+from expenses.processors.schemas import TransactionColumns
+
+# Number of emails processed and stored before the high-water mark and the
+# progress of the job are persisted
+POPULATE_CHUNK_SIZE_ = 100
+
+
+class JobConflictError(Exception):
+    """
+    This exception is raised when a job is started or resumed while another
+    job is running.
+    """
+
+
+@dataclass
+class PopulateJob:
+    """
+    This class represents a job that populates the transactions table in
+    the background. The checkpoint is the state of the mailbox after the
+    last stored chunk, where an interrupted job resumes.
+    """
+
+    id: str
+    timeframe: str
+    status: str
+    created_at: datetime.datetime
+    started_at: datetime.datetime
+    finished_at: Optional[datetime.datetime] = None
+    emails_total: Optional[int] = None
+    emails_offset: int = 0
+    emails_scanned: int = 0
+    rows_offset: int = 0
+    rows_parsed: int = 0
+    rows_inserted: int = 0
+    rows_skipped: int = 0
+    checkpoint: Optional[MailboxState] = None
+    error: Optional[str] = None
+
+    def dumps(self) -> str:
+        """
+        This function serializes the job as JSON, to persist it.
+
+        Returns
+        -------
+        str
+            The JSON of the job.
+        """
+        return json.dumps(dataclasses.asdict(self), default=str)
+
+    @classmethod
+    def loads(cls, payload: str) -> "PopulateJob":
+        """
+        This function deserializes a job persisted as JSON.
+
+        Parameters
+        ----------
+        payload : str
+            The JSON of the job.
+
+        Returns
+        -------
+        PopulateJob
+            The job.
+        """
+        fields = json.loads(payload)
+        for name in ["created_at", "started_at", "finished_at"]:
+            if fields[name] is not None:
+                fields[name] = datetime.datetime.fromisoformat(fields[name])
+        if fields["checkpoint"] is not None:
+            fields["checkpoint"] = MailboxState(**fields["checkpoint"])
+        return cls(**fields)
+
+    def status_report(self) -> PopulateJobStatus:
+        """
+        This function returns the progress of the job, with the throughput
+        and the estimated time left of the current run.
+
+        Returns
+        -------
+        PopulateJobStatus
+            The progress of the job.
+        """
+        end = self.finished_at or datetime.datetime.now()
+        elapsed = (end - self.started_at).total_seconds()
+        emails_per_second = rows_per_second = eta_seconds = None
+        if elapsed > 0:
+            emails_per_second = (
+                self.emails_scanned - self.emails_offset
+            ) / elapsed
+            rows_per_second = (self.rows_parsed - self.rows_offset) / elapsed
+        if (
+            self.status == "running"
+            and self.emails_total is not None
+            and emails_per_second
+        ):
+            eta_seconds = (
+                max(self.emails_total - self.emails_scanned, 0)
+                / emails_per_second
+            )
+
+        fields = dataclasses.asdict(self)
+        del fields["checkpoint"], fields["rows_offset"]
+        return PopulateJobStatus(
+            **fields,
+            checkpoint_uid=self.checkpoint.last_uid
+            if self.checkpoint is not None
+            else None,
+            emails_per_second=emails_per_second,
+            rows_per_second=rows_per_second,
+            eta_seconds=eta_seconds,
+        )
+
+
+def insert_chunk_into_database(
+    transactions: TransactionColumns,
+    state: Optional[MailboxState],
+) -> Tuple[int, int]:
+    """
+    This function inserts a chunk of transactions into the database in bulk
+    and then persists the high-water mark of the mailbox, so an interrupted
+    populate resumes after the last stored chunk.
+
+    Parameters
+    ----------
+    transactions : TransactionColumns
+        The transactions to insert, in columns.
+    state : Optional[MailboxState]
+        The state of the mailbox after the last email of the chunk.
+
+    Returns
+    -------
+    Tuple[int, int]
+        The number of transactions inserted and skipped as duplicates.
+    """
+    inserted, skipped = get_repository().insert_transactions(transactions)
+
+    # The cached summaries no longer include every transaction
+    if inserted > 0:
+        RESPONSE_CACHE_.invalidate()
+
+    if state is not None:
+        update_mailbox_state(EMAILS_FROM_, state)
+
+    return inserted, skipped
+
+
+class PopulateJobManager:
+    """
+    This class runs the jobs that populate the transactions table, each in
+    a background thread, so the requests return at once with the id of the
+    job. Only one job runs at a time, whatever its timeframe, since all of
+    them read and write the state of the synchronization of the mailbox.
+
+    The progress of every job is persisted after every chunk. A job stopped
+    by a shutdown, or whose process died, is reported as interrupted and
+    can be resumed from its checkpoint.
+    """
+
+    def __init__(self, chunk_size: int = POPULATE_CHUNK_SIZE_):
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+        # The jobs of this process, and the running job and its thread
+        self._jobs: Dict[str, PopulateJob] = {}
+        self._running: Optional[PopulateJob] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _save(self, job: PopulateJob) -> None:
+        """
+        This function persists the progress of a job.
+        """
+        get_repository().save_populate_job(
+            job.id, job.timeframe, job.status, job.dumps()
+        )
+
+    def _launch(self, job: PopulateJob) -> None:
+        """
+        This function registers a job as the running job and starts its
+        thread.
+
+        Parameters
+        ----------
+        job : PopulateJob
+            The job to run.
+        """
+        with self._lock:
+            if self._running is not None:
+                raise JobConflictError(
+                    f"The job {self._running.id} of the "
+                    f"{self._running.timeframe} timeframe is running."
+                )
+            self._running = job
+            self._jobs[job.id] = job
+
+        try:
+            self._save(job)
+        except Exception:
+            with self._lock:
+                self._running = None
+                del self._jobs[job.id]
+            raise
+
+        thread = threading.Thread(
+            target=self._run,
+            args=(job,),
+            name=f"populate-{job.timeframe}",
+            daemon=True,
+        )
+        with self._lock:
+            self._thread = thread
+        thread.start()
+
+    def _run(self, job: PopulateJob) -> None:
+        """
+        This function processes the new emails of all the senders as a
+        stream, storing them in chunks while the rest are downloaded, and
+        records the progress of the job after every chunk.
+
+        Parameters
+        ----------
+        job : PopulateJob
+            The job to run.
+        """
+
+        def on_search(emails: int) -> None:
+            job.emails_total = job.emails_offset + emails
+
+        try:
+            if job.checkpoint is not None:
+                state = job.checkpoint
+            elif job.timeframe != "from_origin":
+                state = get_mailbox_state(EMAILS_FROM_)
+            else:
+                state = None
+
+            for chunk, state, emails in iter_new_transactions(
+                email_from=EMAILS_FROM_,
+                date_to_search=get_date_from_search(job.timeframe),
+                state=state,
+                chunk_size=self.chunk_size,
+                on_search=on_search,
+            ):
+                inserted, skipped = insert_chunk_into_database(chunk, state)
+                job.emails_scanned += emails
+                job.rows_parsed += len(chunk)
+                job.rows_inserted += inserted
+                job.rows_skipped += skipped
+                job.checkpoint = state
+                self._save(job)
+
+                # The chunk is stored, so the job can stop here
+                if self._stopping.is_set():
+                    job.status = "interrupted"
+                    break
+            else:
+                job.status = "succeeded"
+        except Exception as error:
+            job.status = "failed"
+            job.error = f"{type(error).__name__}: {error}"
+        finally:
+            job.finished_at = datetime.datetime.now()
+            try:
+                self._save(job)
+            except Exception:
+                pass
+            with self._lock:
+                self._running = None
+                self._thread = None
+
+    def start(self, timeframe: str) -> PopulateJob:
+        """
+        This function starts a job that populates the transactions table.
+        Only the emails that arrived after the last synchronization of
+        every sender are processed, unless the timeframe is "from_origin",
+        which forces a full resync.
+
+        Parameters
+        ----------
+        timeframe : str
+            The timeframe to obtain the expenses from.
+
+        Returns
+        -------
+        PopulateJob
+            The job, already running.
+        """
+        now = datetime.datetime.now()
+        job = PopulateJob(
+            id=str(uuid.uuid4()),
+            timeframe=timeframe,
+            status="running",
+            created_at=now,
+            started_at=now,
+        )
+        self._launch(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[PopulateJob]:
+        """
+        This function returns a job of this process or a persisted one. A
+        persisted job that is running but not in this process was
+        interrupted.
+
+        Parameters
+        ----------
+        job_id : str
+            The identifier of the job.
+
+        Returns
+        -------
+        Optional[PopulateJob]
+            The job. None if there is no job with the id.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+
+        payload = get_repository().get_populate_job(job_id)
+        if payload is None:
+            return None
+
+        job = PopulateJob.loads(payload)
+        if job.status == "running":
+            job.status = "interrupted"
+        return job
+
+    def resume(self, job_id: str) -> Optional[PopulateJob]:
+        """
+        This function runs again an interrupted or failed job from its
+        checkpoint, keeping its counters.
+
+        Parameters
+        ----------
+        job_id : str
+            The identifier of the job.
+
+        Returns
+        -------
+        Optional[PopulateJob]
+            The job, running again. None if there is no job with the id.
+
+        Raises
+        ------
+        ValueError
+            If the job is not interrupted or failed.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return None
+        if job.status not in ["interrupted", "failed"]:
+            raise ValueError(f"The job is {job.status}.")
+
+        job = dataclasses.replace(
+            job,
+            status="running",
+            started_at=datetime.datetime.now(),
+            finished_at=None,
+            emails_total=None,
+            emails_offset=job.emails_scanned,
+            rows_offset=job.rows_parsed,
+            error=None,
+        )
+        self._launch(job)
+        return job
+
+    def stop(self, timeout: float = 30) -> None:
+        """
+        This function asks the running job to stop after its current chunk,
+        e.g. when the application shuts down, and waits for it. It is
+        persisted as interrupted.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The seconds to wait for the running job.
+        """
+        self._stopping.set()
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+
+# Process-wide manager of the populate jobs
+POPULATE_JOBS_ = PopulateJobManager()
@@ -0,0 +1,68 @@
+import hashlib
+import json
+from typing import Any, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+
+def render_json(content: Any) -> Tuple[bytes, str]:
+    """
+    This function serializes the content of a response as FastAPI does and
+    computes its strong ETag, a hash of the body.
+
+    Parameters
+    ----------
+    content : Any
+        The content of the response, e.g. a pydantic model or a list.
+
+    Returns
+    -------
+    Tuple[bytes, str]
+        The JSON body and its ETag.
+    """
+    body = json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def conditional_response(
+    request: Request, body: bytes, etag: str
+) -> Response:
+    """
+    This function answers 304 Not Modified, without a body, if the client
+    sent the ETag of the body in If-None-Match, and the JSON body otherwise.
+    The clients must revalidate before reusing the response.
+
+    Parameters
+    ----------
+    request : Request
+        The request of the client.
+    body : bytes
+        The JSON body of the response.
+    etag : str
+        The ETag of the body.
+
+    Returns
+    -------
+    Response
+        The response to the client.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    # If-None-Match uses the weak comparison, so W/ is ignored
+    if_none_match = request.headers.get("If-None-Match", "")
+    tags = [
+        tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+    ]
+    if "*" in tags or etag in tags:
+        return Response(status_code=304, headers=headers)
+
+    return Response(
+        content=body, media_type="application/json", headers=headers
+    )
@@ -1,114 +1,220 @@
 import datetime
+import itertools
 import os
-from collections import defaultdict
-from typing import List
+from collections import defaultdict, deque
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from expenses.api.schemas.expenses import (
     BaseTransactionInfo,
     SummaryTransactionInfo,
 )
+from expenses.core.async_client import AsyncGmailClient
 from expenses.core.client import GmailClient
-from expenses.core.transaction_email import TransactionEmail
+from expenses.core.dataclasses import MailboxState
+from expenses.core.imap_pool import IMAP_POOL_
 from expenses.processors.factory import EmailProcessorFactory
-from expenses.processors.schemas import TransactionInfo
+from expenses.processors.parallel import (
+    PARSE_CHUNK_SIZE_,
+    PARSE_WORKERS_,
+    parse_email_chunks,
+    process_emails,
+)
+from expenses.processors.schemas import TransactionColumns
 
 
-def get_transactions(
-    email_from: str,
+async def get_transactions_async(
+    email_from: Union[str, List[str]],
     date_to_search: datetime.datetime,
-) -> List[TransactionInfo]:
+    batch_size: int = PARSE_CHUNK_SIZE_,
+    gmail_client: Optional[AsyncGmailClient] = None,
+) -> TransactionColumns:
     """
-    This function obtains the transactions from the specified email address
-    and returns the list of the information for all the transactions.
+    This function obtains the transactions from the specified email
+    addresses. The emails are downloaded and processed in batches in the
+    threads of the IMAP executor, so neither blocks the event loop.
 
     Parameters
     ----------
-    email_from : str
-        The email address to obtain the transactions from.
+    email_from : Union[str, List[str]]
+        The email address or addresses to obtain the transactions from.
 
     date_to_search : datetime.datetime
         The date to obtain the transactions from.
 
+    batch_size : int, optional
+        The number of emails processed at once.
+
+    gmail_client : AsyncGmailClient, optional
+        The client to download the emails with. None to use the pool and
+        the executor of the process.
+
     Returns
     -------
-    List[TransactionInfo]
-        The list of the information for all the transactions.
+    TransactionColumns
+        The information for all the transactions, in columns.
     """
-    gmail_client = GmailClient(os.getenv("EMAIL"))
-    emails_list = gmail_client.obtain_emails(
+    if gmail_client is None:
+        gmail_client = AsyncGmailClient(os.getenv("EMAIL"))
+    executor = gmail_client.executor
+
+    transactions, batch = TransactionColumns(), []
+    processor_factory = EmailProcessorFactory()
+    async for email in gmail_client.iter_emails(
         email_from,
         most_recents_first=True,
         limit=None,
         date_to_search=date_to_search,
-    )
-    if len(emails_list) > 0:
-        print(email_from, TransactionEmail(emails_list[0]))
-
-    transactions = []
-    processor_factory = EmailProcessorFactory()
-    for email in emails_list:
-        try:
-            transactions.append(
-                processor_factory.get_processor(
-                    TransactionEmail(email)
-                ).process()
+    ):
+        batch.append(email)
+        if len(batch) >= batch_size:
+            transactions.extend(
+                await executor.run(process_emails, processor_factory, batch)
             )
-        except ValueError:
-            continue
+            batch = []
 
+    transactions.extend(
+        await executor.run(process_emails, processor_factory, batch)
+    )
     return transactions
 
 
-def process_transactions_api_expenses(
-    transactions: List[TransactionInfo],
+def iter_new_transactions(
+    email_from: Union[str, List[str]],
+    date_to_search: datetime.datetime,
+    state: Optional[MailboxState] = None,
+    workers: int = PARSE_WORKERS_,
+    chunk_size: int = PARSE_CHUNK_SIZE_,
+    on_search: Optional[Callable[[int], None]] = None,
+) -> Iterator[Tuple[TransactionColumns, MailboxState, int]]:
+    """
+    This function obtains, as a stream, only the transactions of the emails
+    that arrived after the last synchronization of the specified email
+    addresses. If there is no state or the UIDVALIDITY of the inbox
+    changed, all the emails since date_to_search are processed.
+
+    The emails are processed in chunks, in parallel with
+    expenses.processors.parallel when there are enough of them, e.g. in a
+    full resync.
+
+    Parameters
+    ----------
+    email_from : Union[str, List[str]]
+        The email address or addresses to obtain the transactions from.
+
+    date_to_search : datetime.datetime
+        The date to obtain the transactions from in a full resync.
+
+    state : MailboxState, optional
+        The state of the last synchronization.
+
+    workers : int, optional
+        The number of processes that parse the emails.
+
+    chunk_size : int, optional
+        The number of emails of every chunk.
+
+    on_search : Callable[[int], None], optional
+        The function called with the number of new emails, before they are
+        downloaded.
+
+    Yields
+    ------
+    Tuple[TransactionColumns, MailboxState, int]
+        The transactions of every chunk of new emails, the state to
+        persist once they are stored and the number of emails of the chunk.
+    """
+    # The states and sizes of the chunks sent to the parser and not yielded
+    # yet. The parser yields one result per chunk in order, so they are
+    # aligned.
+    states = deque()
+
+    def iter_chunks(gmail_client: GmailClient):
+        emails = gmail_client.sync_emails(
+            email_from,
+            state=state,
+            date_to_search=date_to_search,
+            on_search=on_search,
+        )
+        for chunk in iter(
+            lambda: list(itertools.islice(emails, chunk_size)), []
+        ):
+            states.append((chunk[-1][1], len(chunk)))
+            yield [email for email, _ in chunk]
+
+    with IMAP_POOL_.connection() as conn:
+        gmail_client = GmailClient(os.getenv("EMAIL"), conn=conn)
+        for columns in parse_email_chunks(
+            iter_chunks(gmail_client), workers=workers
+        ):
+            yield (columns, *states.popleft())
+
+
+def summarize_transaction_totals(
+    totals: Iterable[Tuple[str, float, int]],
 ) -> SummaryTransactionInfo:
     """
-    This function processes the transactions and returns the summary of the
-    transactions.
+    This function returns the summary of the transactions from the total
+    amount and the number of transactions of every transaction type.
 
     Parameters
     ----------
-    transactions : List[TransactionInfo]
-        The list of the information for all the transactions.
+    totals : Iterable[Tuple[str, float, int]]
+        The transaction type, the amount and the number of transactions.
 
     Returns
     -------
     SummaryTransactionInfo
         The summary of the transactions.
     """
-
-    summary = SummaryTransactionInfo(
-        purchases=BaseTransactionInfo(name="", amount=0, count=0),
-        withdrawals=BaseTransactionInfo(name="", amount=0, count=0),
-        transfer_reception=BaseTransactionInfo(name="", amount=0, count=0),
-        transfer_qr=BaseTransactionInfo(name="", amount=0, count=0),
-        payment=BaseTransactionInfo(name="", amount=0, count=0),
-        transfer=BaseTransactionInfo(name="", amount=0, count=0),
-    )
-
     transaction_summary = defaultdict(
         lambda: BaseTransactionInfo(name="", amount=0, count=0)
     )
 
-    for transaction in transactions:
-        transaction_summary[
-            transaction.transaction_type
-        ].name = transaction.transaction_type
+    for transaction_type, amount, count in totals:
+        transaction_summary[transaction_type].name = transaction_type
+        transaction_summary[transaction_type].amount += amount
+        transaction_summary[transaction_type].count += count
 
-        transaction_summary[
-            transaction.transaction_type
-        ].amount += transaction.amount
+    # Set the values of the summary
+    return SummaryTransactionInfo(
+        purchases=transaction_summary["Compra"],
+        withdrawals=transaction_summary["Retiro"],
+        transfer_reception=transaction_summary["Recepcion Transferencia"],
+        transfer_qr=transaction_summary["QR"],
+        payment=transaction_summary["Pago"],
+        transfer=transaction_summary["Transferencia"],
+    )
 
-        transaction_summary[transaction.transaction_type].count += 1
 
-    # Set the values of the summary
-    summary.purchases = transaction_summary["Compra"]
-    summary.withdrawals = transaction_summary["Retiro"]
-    summary.transfer_reception = transaction_summary[
-        "Recepcion Transferencia"
-    ]
-    summary.transfer_qr = transaction_summary["QR"]
-    summary.payment = transaction_summary["Pago"]
-    summary.transfer = transaction_summary["Transferencia"]
-
-    return summary
+def process_transactions_api_expenses(
+    transactions: TransactionColumns,
+) -> SummaryTransactionInfo:
+    """
+    This function processes the transactions and returns the summary of the
+    transactions.
+
+    Parameters
+    ----------
+    transactions : TransactionColumns
+        The information for all the transactions, in columns.
+
+    Returns
+    -------
+    SummaryTransactionInfo
+        The summary of the transactions.
+    """
+    return summarize_transaction_totals(
+        zip(
+            transactions.transaction_type,
+            transactions.amount,
+            itertools.repeat(1),
+        )
+    )
@@ -0,0 +1,24 @@
+from expenses.benchmarks.checks import (
+    check_amounts,
+    check_classifier,
+    check_html_extractors,
+)
+from expenses.benchmarks.corpus import GoldenEmail, generate_corpus
+from expenses.benchmarks.pipeline import (
+    StageResult,
+    check_corpus,
+    find_regressions,
+    run_benchmarks,
+)
+
+__all__ = [
+    "check_amounts",
+    "check_classifier",
+    "check_html_extractors",
+    "GoldenEmail",
+    "generate_corpus",
+    "StageResult",
+    "check_corpus",
+    "find_regressions",
+    "run_benchmarks",
+]
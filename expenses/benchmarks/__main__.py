@@ -0,0 +1,120 @@
+import argparse
+import json
+import sys
+
+from expenses.benchmarks.checks import (
+    check_amounts,
+    check_classifier,
+    check_html_extractors,
+)
+from expenses.benchmarks.corpus import generate_corpus
+from expenses.benchmarks.pipeline import (
+    check_corpus,
+    find_regressions,
+    generate_amounts,
+    run_benchmarks,
+)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the parsing pipeline over a synthetic corpus "
+        "of Bancolombia alerts."
+    )
+    parser.add_argument(
+        "--size", type=int, default=2000, help="The number of emails."
+    )
+    parser.add_argument(
+        "--amounts",
+        type=int,
+        default=1_000_000,
+        help="The number of string amounts.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="The number of timed runs of every stage.",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="The seed of the corpus."
+    )
+    parser.add_argument(
+        "--baseline",
+        default=None,
+        help="The JSON file with the items per second of every stage.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="The fraction of the baseline throughput a stage can lose.",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Write the results to the baseline file instead of comparing.",
+    )
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.size, seed=args.seed)
+
+    # The transactions must be the expected ones before measuring anything
+    mismatches = check_corpus(corpus)
+    if mismatches:
+        print(f"{len(mismatches)} transactions differ from the corpus:")
+        for mismatch in mismatches[:20]:
+            print(f"  {mismatch}")
+        sys.exit(1)
+
+    # The fast paths must give the same results as the reference ones
+    for name, check in [
+        ("html extraction", lambda: check_html_extractors(corpus)),
+        ("classification", lambda: check_classifier(corpus, seed=args.seed)),
+        ("amount parsing", lambda: check_amounts(seed=args.seed)),
+    ]:
+        mismatches = check()
+        if mismatches:
+            print(f"{len(mismatches)} mismatches of the {name}:")
+            for mismatch in mismatches[:20]:
+                print(f"  {mismatch}")
+            sys.exit(1)
+
+    results = run_benchmarks(
+        corpus, generate_amounts(args.amounts, seed=args.seed), args.repeat
+    )
+
+    print(f"{'stage':<28}{'items':>10}{'items/s':>14}{'peak B/item':>14}")
+    for result in results.values():
+        print(
+            f"{result.name:<28}{result.items:>10,}"
+            f"{result.items_per_second:>14,.0f}"
+            f"{result.peak_bytes_per_item:>14,.0f}"
+        )
+
+    if args.baseline is None:
+        sys.exit(0)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(
+                {
+                    name: result.items_per_second
+                    for name, result in results.items()
+                },
+                file,
+                indent=4,
+            )
+        print(f"Baseline saved to {args.baseline}")
+        sys.exit(0)
+
+    with open(args.baseline) as file:
+        regressions = find_regressions(
+            results, json.load(file), args.tolerance
+        )
+    if regressions:
+        print("Throughput regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+    print("No throughput regressions.")
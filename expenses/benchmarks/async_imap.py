@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import sys
+import time
+from typing import List, Tuple
+
+from expenses.api.utils.transactions import get_transactions_async
+from expenses.benchmarks.corpus import generate_corpus
+from expenses.benchmarks.fake_imap import FakeIMAPServer
+from expenses.constants import EMAILS_FROM_
+from expenses.core.async_client import AsyncGmailClient
+from expenses.core.executor import BoundedExecutor
+from expenses.core.imap_pool import close_imap, ping_imap
+from expenses.core.pool import ConnectionPool
+from expenses.processors.factory import EmailProcessorFactory
+from expenses.processors.parallel import process_emails
+
+
+async def measure_heartbeat(
+    clients: List[AsyncGmailClient],
+    requests_count: int,
+    batch_size: int,
+    interval: float,
+) -> Tuple[List[int], List[float], float]:
+    """
+    This function runs concurrent get_transactions_async calls, as the
+    fallback of the expenses endpoints, while a heartbeat task wakes up at
+    a fixed interval and measures how late it is. A heartbeat that wakes up
+    late means something blocked the event loop.
+
+    Parameters
+    ----------
+    clients : List[AsyncGmailClient]
+        The clients of the calls, used in turn.
+    requests_count : int
+        The number of concurrent calls.
+    batch_size : int
+        The number of emails processed at once.
+    interval : float
+        The seconds between two heartbeats.
+
+    Returns
+    -------
+    Tuple[List[int], List[float], float]
+        The number of transactions of every call, the lags of the
+        heartbeats in seconds and the seconds of the calls.
+    """
+    lags = []
+    done = asyncio.Event()
+
+    async def heartbeat() -> None:
+        while not done.is_set():
+            due = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            lags.append(max(time.perf_counter() - due, 0.0))
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            get_transactions_async(
+                EMAILS_FROM_,
+                None,
+                batch_size=batch_size,
+                gmail_client=clients[index % len(clients)],
+            )
+            for index in range(requests_count)
+        )
+    )
+    seconds = time.perf_counter() - start
+    done.set()
+    await heartbeat_task
+    return [len(result) for result in results], lags, seconds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check that concurrent downloads and parses of the "
+        "asynchronous IMAP client, against a local fake IMAP server, do not "
+        "block the event loop."
+    )
+    parser.add_argument(
+        "--emails",
+        type=int,
+        default=1000,
+        help="The number of emails of the corpus.",
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=8,
+        help="The number of concurrent downloads of the corpus.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=2,
+        help="The number of threads of the executor and connections.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=200,
+        help="The number of emails processed at once.",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.005,
+        help="The seconds the server waits before answering a command.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.01,
+        help="The seconds between two heartbeats of the event loop.",
+    )
+    parser.add_argument(
+        "--max-lag",
+        type=float,
+        default=0.1,
+        help="The maximum seconds a heartbeat can be late.",
+    )
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.emails)
+    expected = len(
+        process_emails(
+            EmailProcessorFactory(), (golden.message for golden in corpus)
+        )
+    )
+    with FakeIMAPServer(
+        [golden.message.as_bytes() for golden in corpus],
+        latency=args.latency,
+    ) as server:
+        pool = ConnectionPool(
+            connect=server.connect,
+            ping=ping_imap,
+            close=close_imap,
+            max_size=args.workers,
+        )
+        executor = BoundedExecutor(max_workers=args.workers, name="bench")
+        clients = [
+            AsyncGmailClient(
+                "benchmark", fetch_mode="full", pool=pool, executor=executor
+            )
+            for _ in range(args.requests)
+        ]
+        counts, lags, seconds = asyncio.run(
+            measure_heartbeat(
+                clients, args.requests, args.batch_size, args.interval
+            )
+        )
+        pool_metrics = pool.metrics()
+        executor_metrics = executor.metrics()
+        pool.close_all()
+        executor.shutdown()
+
+    lags.sort()
+    print(
+        f"{args.requests} downloads of {args.emails:,} emails in "
+        f"{seconds:.2f} s, {executor_metrics['submitted']:,} functions in "
+        f"the executor"
+    )
+    print(
+        f"Heartbeat lag: {len(lags):,} beats, "
+        f"p50 {lags[len(lags) // 2] * 1000:.1f} ms, "
+        f"max {lags[-1] * 1000:.1f} ms"
+    )
+
+    errors = []
+    for index, count in enumerate(counts):
+        if count != expected:
+            errors.append(
+                f"download {index}: {count} transactions, "
+                f"{expected} expected"
+            )
+    if lags[-1] > args.max_lag:
+        errors.append(
+            f"The event loop was blocked for {lags[-1] * 1000:.1f} ms, more "
+            f"than {args.max_lag * 1000:.1f} ms."
+        )
+    if pool_metrics["misses"] > args.workers:
+        errors.append(
+            f"{pool_metrics['misses']} connections were opened, more than "
+            f"{args.workers} sessions."
+        )
+
+    if errors:
+        for error in errors:
+            print(error)
+        sys.exit(1)
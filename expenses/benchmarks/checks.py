@@ -0,0 +1,303 @@
+import math
+import random
+from typing import Callable, Dict, List
+
+from expenses.benchmarks.corpus import GoldenEmail
+from expenses.constants import (
+    FX_RATES_,
+    TRANSACTION_MESSAGES_TYPES_,
+    TRANSACTION_TYPES_,
+)
+from expenses.core.html_extractors import (
+    extract_with_beautiful_soup,
+    extract_with_html_parser,
+)
+from expenses.core.transaction_email import TransactionEmail
+from expenses.processors.amounts import (
+    convert_amount_to_float,
+    parse_amounts,
+)
+from expenses.processors.classifier import (
+    TRANSACTION_CLASSIFIER_,
+    Classification,
+)
+
+# Rewrites of the html of the alerts that the extraction engines must treat
+# the same way. The alert of the template is the only text delimited by
+# "&nbsp;".
+HTML_VARIANTS_: Dict[str, Callable[[str], str]] = {
+    "original": lambda body: body,
+    "literal_nbsp": lambda body: body.replace("&nbsp;", "\xa0"),
+    "inline_tags": lambda body: body.replace(
+        "<td>&nbsp;", "<td><span>&nbsp;</span><b>", 1
+    ).replace("&nbsp;</td>", "</b>&nbsp;</td>", 1),
+    "preformatted": lambda body: body.replace(
+        "<td>&nbsp;", "<td><pre>&nbsp;", 1
+    ).replace("&nbsp;</td>", "&nbsp;</pre></td>", 1),
+    "script_before": lambda body: body.replace(
+        "<body>",
+        '<body><script>var alert = "&nbsp;Bancolombia: no&nbsp;";</script>',
+        1,
+    ),
+    "extra_whitespace": lambda body: body.replace("\n", "\n \t\n"),
+    "without_alert": lambda body: body.replace("&nbsp;", " "),
+}
+
+
+def check_html_extractors(corpus: List[GoldenEmail]) -> List[str]:
+    """
+    This function extracts the transaction message of every html part of
+    the corpus, and of the variants in HTML_VARIANTS_, with the html parser
+    and with BeautifulSoup, the reference, and compares them.
+
+    Parameters
+    ----------
+    corpus : List[GoldenEmail]
+        The emails of the corpus.
+
+    Returns
+    -------
+    List[str]
+        The description of every mismatch. Empty if both engines always
+        extract the same message.
+    """
+    mismatches = []
+    for index, golden in enumerate(corpus):
+        for part in golden.message.walk():
+            if part.get_content_type() != "text/html":
+                continue
+
+            charset = part.get_content_charset()
+            body = part.get_payload(decode=True).decode(charset)
+            for name, variant in HTML_VARIANTS_.items():
+                html = variant(body).encode(charset)
+                expected = extract_with_beautiful_soup(html, charset)
+                message = extract_with_html_parser(html, charset)
+                if message != expected:
+                    mismatches.append(
+                        f"html #{index} ({name}): {message!r}, "
+                        f"{expected!r} expected"
+                    )
+
+    return mismatches
+
+
+def classify_with_dispatcher(text: str) -> Classification:
+    """
+    This function classifies a transaction message as the factory and the
+    processors did before TransactionClassifier: the text is scanned once
+    per transaction type to find the first one declared in
+    TRANSACTION_TYPES_, and once per keyword to validate the email. It is
+    the reference of the classifier.
+
+    Parameters
+    ----------
+    text : str
+        The transaction message.
+
+    Returns
+    -------
+    Classification
+        The transaction type and the validity flags of the message.
+    """
+
+    def has_valid_messages(messages: List[str]) -> bool:
+        return any(
+            (message in text) or (message.lower() in text.lower())
+            for message in messages
+        )
+
+    transaction_type = next(
+        (
+            transaction_type
+            for transaction_type in TRANSACTION_TYPES_
+            if transaction_type.lower() in text.lower()
+        ),
+        None,
+    )
+    return Classification(
+        transaction_type=transaction_type,
+        has_valid_message_type=has_valid_messages(
+            TRANSACTION_MESSAGES_TYPES_
+        ),
+        has_valid_transaction_type=has_valid_messages(
+            list(TRANSACTION_TYPES_)
+        ),
+        has_valid_amount="$" in text,
+    )
+
+
+def generate_keyword_texts(size: int, seed: int = 0) -> List[str]:
+    """
+    This function generates random texts made of the keywords of the
+    classifier, in random case, cut and joined with random separators, so
+    they overlap and contain each other in every possible way.
+
+    Parameters
+    ----------
+    size : int
+        The number of texts.
+    seed : int, optional
+        The seed of the random generator.
+
+    Returns
+    -------
+    List[str]
+        The texts.
+    """
+    rng = random.Random(seed)
+    keywords = [*TRANSACTION_TYPES_, *TRANSACTION_MESSAGES_TYPES_, "$"]
+    separators = ["", " ", "  ", "x", "\xa0", ". "]
+
+    texts = []
+    for _ in range(size):
+        pieces = []
+        for _ in range(rng.randint(0, 6)):
+            keyword = rng.choice(keywords)
+            if rng.random() < 0.2:
+                # A prefix or a suffix of the keyword
+                cut = rng.randint(0, len(keyword))
+                keyword = (
+                    keyword[:cut] if rng.random() < 0.5 else keyword[cut:]
+                )
+            keyword = "".join(
+                char.upper() if rng.random() < 0.3 else char
+                for char in keyword
+            )
+            pieces.extend([keyword, rng.choice(separators)])
+        texts.append("".join(pieces))
+    return texts
+
+
+def check_classifier(
+    corpus: List[GoldenEmail], size: int = 20_000, seed: int = 0
+) -> List[str]:
+    """
+    This function classifies the messages of the corpus and random keyword
+    texts with TRANSACTION_CLASSIFIER_ and with the previous dispatcher,
+    and compares them.
+
+    Parameters
+    ----------
+    corpus : List[GoldenEmail]
+        The emails of the corpus.
+    size : int, optional
+        The number of random keyword texts.
+    seed : int, optional
+        The seed of the random keyword texts.
+
+    Returns
+    -------
+    List[str]
+        The description of every mismatch. Empty if both always give the
+        same classification.
+    """
+    texts = [
+        TransactionEmail(golden.message).str_message for golden in corpus
+    ]
+    texts.extend(generate_keyword_texts(size, seed=seed))
+
+    mismatches = []
+    for text in texts:
+        classification = TRANSACTION_CLASSIFIER_.classify(text)
+        expected = classify_with_dispatcher(text)
+        if classification != expected:
+            mismatches.append(
+                f"classifier {text!r}: {classification}, {expected} expected"
+            )
+
+    return mismatches
+
+
+def generate_amount_strings(size: int, seed: int = 0) -> List[str]:
+    """
+    This function generates random strings that look like amounts: made
+    mostly of digits, commas, dots and "$", some of them with characters
+    that float reads or rejects, and some too long to be parsed exactly in
+    the vectorized path.
+
+    Parameters
+    ----------
+    size : int
+        The number of strings.
+    seed : int, optional
+        The seed of the random generator.
+
+    Returns
+    -------
+    List[str]
+        The strings.
+    """
+    rng = random.Random(seed)
+    alphabet = "0123456789" * 3 + ",,..$"
+    noise = " -+_eE\xa0a\u0663"
+
+    values = []
+    for _ in range(size):
+        length = rng.choice([rng.randint(0, 12), rng.randint(13, 40)])
+        value = "".join(rng.choice(alphabet) for _ in range(length))
+        if value and rng.random() < 0.2:
+            position = rng.randint(0, len(value))
+            value = value[:position] + rng.choice(noise) + value[position:]
+        values.append(value)
+    return values
+
+
+def check_amounts(
+    size: int = 200_000,
+    seed: int = 0,
+    fx_rates: Dict[str, float] = FX_RATES_,
+) -> List[str]:
+    """
+    This function converts random amount strings with parse_amounts and
+    one by one with convert_amount_to_float, the reference, and compares
+    the amounts and the currencies. The strings that the scalar function
+    rejects must be NaN, without currency.
+
+    The scalar function does not return the currency, so it is recovered
+    by converting the amount with a unit rate and with a negative one for
+    USD: the sign only flips for the amounts in USD.
+
+    Parameters
+    ----------
+    size : int, optional
+        The number of random amount strings.
+    seed : int, optional
+        The seed of the random amount strings.
+    fx_rates : Dict[str, float], optional
+        The rates to convert the amounts to COP, by currency.
+
+    Returns
+    -------
+    List[str]
+        The description of every mismatch. Empty if both always give the
+        same amount and currency.
+    """
+    unit_rates = {"COP": 1.0, "USD": 1.0}
+    probe_rates = {"COP": 1.0, "USD": -1.0}
+    values = generate_amount_strings(size, seed=seed)
+    amounts, currencies = parse_amounts(values, fx_rates)
+
+    mismatches = []
+    for value, amount, currency in zip(values, amounts, currencies):
+        try:
+            expected = convert_amount_to_float(value, fx_rates)
+            is_usd = math.copysign(
+                1, convert_amount_to_float(value, unit_rates)
+            ) != math.copysign(
+                1, convert_amount_to_float(value, probe_rates)
+            )
+            expected_currency = "USD" if is_usd else "COP"
+        except ValueError:
+            expected, expected_currency = math.nan, ""
+
+        same_amount = amount == expected or (
+            math.isnan(amount) and math.isnan(expected)
+        )
+        if not same_amount or currency != expected_currency:
+            mismatches.append(
+                f"amount {value!r}: {amount} {currency!r}, "
+                f"{expected} {expected_currency!r} expected"
+            )
+
+    return mismatches
@@ -0,0 +1,332 @@
+import argparse
+import asyncio
+import datetime
+import math
+import os
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from expenses.api.storage.sqlite import SQLiteRepository
+from expenses.api.utils.transactions import get_transactions_async
+from expenses.benchmarks.corpus import generate_corpus
+from expenses.benchmarks.fake_imap import FakeIMAPServer
+from expenses.constants import EMAILS_FROM_
+from expenses.core.async_client import AsyncGmailClient
+from expenses.core.executor import BoundedExecutor
+from expenses.core.imap_pool import IMAP_POOL_, close_imap, ping_imap
+from expenses.core.pool import ConnectionPool
+from expenses.processors.factory import EmailProcessorFactory
+from expenses.processors.parallel import process_emails
+
+# The work that runs in the background while the cheap queries are sent. It
+# receives the function that runs a blocking function as the queries do.
+Background = Callable[[Callable[..., Awaitable]], Awaitable]
+
+# A query that keeps SQLite busy for a while, counting up to a number
+SLOW_QUERY_ = """
+    WITH RECURSIVE counter(n) AS (
+        SELECT 1
+        UNION ALL
+        SELECT n + 1 FROM counter WHERE n < ?
+    )
+    SELECT COUNT(*) FROM counter
+    """
+
+
+def run_slow_query(repository: SQLiteRepository, size: int) -> int:
+    """
+    This function runs the slow query on a connection of the repository.
+
+    Parameters
+    ----------
+    repository : SQLiteRepository
+        The repository to query.
+    size : int
+        The number the query counts up to.
+
+    Returns
+    -------
+    int
+        The result of the query.
+    """
+    with repository.cursor() as cursor:
+        cursor.execute(SLOW_QUERY_, (size,))
+        return cursor.fetchone()[0]
+
+
+async def measure_latencies(
+    repository: SQLiteRepository,
+    executor: BoundedExecutor,
+    on_event_loop: bool,
+    background: Optional[Background],
+    duration: float,
+    interval: float,
+) -> List[float]:
+    """
+    This function sends cheap queries at a fixed rate, as the requests of
+    the clients, while some work runs in the background, e.g. a slow query,
+    and measures their latencies from the time they were due. The queries
+    run either directly on the event loop, as a synchronous driver called
+    from an async endpoint, or in the executor.
+
+    Parameters
+    ----------
+    repository : SQLiteRepository
+        The repository to query.
+    executor : BoundedExecutor
+        The executor of the queries.
+    on_event_loop : bool
+        Whether the queries block the event loop.
+    background : Optional[Background]
+        The work that runs while the queries are sent. None to run none.
+    duration : float
+        The seconds the cheap queries are sent.
+    interval : float
+        The seconds between two cheap queries.
+
+    Returns
+    -------
+    List[float]
+        The latencies of the cheap queries in seconds.
+    """
+    date_from = datetime.datetime.now() - datetime.timedelta(days=7)
+    latencies = []
+
+    async def call(function, *args):
+        if on_event_loop:
+            return function(*args)
+        return await executor.run(function, *args)
+
+    async def cheap(due: float) -> None:
+        await call(repository.get_transaction_totals, date_from)
+        latencies.append(time.perf_counter() - due)
+
+    async def run_background() -> None:
+        # The background work starts once the cheap queries are flowing
+        await asyncio.sleep(duration / 4)
+        await background(call)
+
+    background_task = (
+        asyncio.create_task(run_background())
+        if background is not None
+        else None
+    )
+    tasks = []
+    start = time.perf_counter()
+    for index in range(int(duration / interval)):
+        due = start + index * interval
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(cheap(due)))
+
+    await asyncio.gather(*tasks)
+    if background_task is not None:
+        await background_task
+    return latencies
+
+
+async def download_all(
+    clients: List[AsyncGmailClient], expected: int
+) -> None:
+    """
+    This function downloads and processes the emails of the mailbox with
+    every client at once, as concurrent requests that fall back to the
+    mailbox.
+
+    Parameters
+    ----------
+    clients : List[AsyncGmailClient]
+        The clients, one per download.
+    expected : int
+        The number of transactions of the mailbox.
+
+    Raises
+    ------
+    AssertionError
+        If a download does not return all the transactions.
+    """
+    results = await asyncio.gather(
+        *(
+            get_transactions_async(EMAILS_FROM_, None, gmail_client=client)
+            for client in clients
+        )
+    )
+    for result in results:
+        assert (
+            len(result) == expected
+        ), f"{len(result)} transactions downloaded, {expected} expected"
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    """
+    This function returns a percentile of the values, by the nearest rank.
+    """
+    values = sorted(values)
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the latency of cheap queries while a slow "
+        "query or concurrent IMAP downloads run, on the event loop and in "
+        "the executor of the API."
+    )
+    parser.add_argument(
+        "--emails",
+        type=int,
+        default=2000,
+        help="The number of emails of the corpus seeded in the database "
+        "and served by the fake IMAP server.",
+    )
+    parser.add_argument(
+        "--slow-size",
+        type=int,
+        default=5_000_000,
+        help="The number the slow query counts up to.",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=3.0,
+        help="The seconds the cheap queries are sent.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.01,
+        help="The seconds between two cheap queries.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="The number of threads of the executor.",
+    )
+    parser.add_argument(
+        "--downloads",
+        type=int,
+        default=4,
+        help="The number of concurrent IMAP downloads.",
+    )
+    parser.add_argument(
+        "--max-p99",
+        type=float,
+        default=0.1,
+        help="The maximum p99 latency in seconds of the cheap queries in "
+        "the executor, and the maximum time they wait in its queue.",
+    )
+    args = parser.parse_args()
+
+    corpus = [golden.message for golden in generate_corpus(args.emails)]
+    transactions = process_emails(EmailProcessorFactory(), corpus)
+    with tempfile.TemporaryDirectory() as directory, FakeIMAPServer(
+        [message.as_bytes() for message in corpus], latency=0.005
+    ) as server:
+        repository = SQLiteRepository(os.path.join(directory, "bench.db"))
+        repository.insert_transactions(transactions)
+        executor = BoundedExecutor(max_workers=args.workers, name="bench")
+
+        # The IMAP round trips run in their own executor, as in the API
+        imap_pool = ConnectionPool(
+            connect=server.connect,
+            ping=ping_imap,
+            close=close_imap,
+            max_size=IMAP_POOL_.max_size,
+        )
+        imap_executor = BoundedExecutor(
+            max_workers=imap_pool.max_size, name="bench-imap"
+        )
+        clients = [
+            AsyncGmailClient(
+                "benchmark",
+                fetch_mode="full",
+                pool=imap_pool,
+                executor=imap_executor,
+            )
+            for _ in range(args.downloads)
+        ]
+
+        start = time.perf_counter()
+        run_slow_query(repository, args.slow_size)
+        print(f"Slow query: {time.perf_counter() - start:.2f} s alone")
+
+        def slow_query(call):
+            return call(run_slow_query, repository, args.slow_size)
+
+        def imap_downloads(call):
+            return download_all(clients, len(transactions))
+
+        results: Dict[str, List[float]] = {}
+        for name, on_event_loop, background in [
+            ("event loop, idle", True, None),
+            ("event loop, slow query", True, slow_query),
+            ("executor, idle", False, None),
+            ("executor, slow query", False, slow_query),
+            ("executor, IMAP downloads", False, imap_downloads),
+        ]:
+            results[name] = asyncio.run(
+                measure_latencies(
+                    repository,
+                    executor,
+                    on_event_loop,
+                    background,
+                    args.duration,
+                    args.interval,
+                )
+            )
+
+        metrics = executor.metrics()
+        executor.shutdown()
+        imap_executor.shutdown()
+        imap_pool.close_all()
+        repository.close()
+
+    print(
+        f"{'scenario':<28}{'queries':>10}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for name, latencies in results.items():
+        print(
+            f"{name:<28}{len(latencies):>10,}"
+            f"{_percentile(latencies, 0.50) * 1000:>10.1f}"
+            f"{_percentile(latencies, 0.95) * 1000:>10.1f}"
+            f"{_percentile(latencies, 0.99) * 1000:>10.1f}"
+        )
+    print(
+        f"Executor: {metrics['submitted']:,} queries, "
+        f"{metrics['avg_queue_wait'] * 1000:.2f} ms average queue wait, "
+        f"{metrics['max_queue_wait'] * 1000:.2f} ms maximum, "
+        f"{metrics['max_queued']} queued at most"
+    )
+
+    # The cheap queries in the executor must stay flat whatever runs in the
+    # background, and its queue must not grow. The parses of the downloads
+    # hold the GIL, so a few queries can wait for a thread, but never more
+    # than one round of them.
+    errors = []
+    for name, latencies in results.items():
+        p99 = _percentile(latencies, 0.99)
+        if name.startswith("executor") and p99 > args.max_p99:
+            errors.append(
+                f"{name}: p99 of {p99 * 1000:.1f} ms, more than "
+                f"{args.max_p99 * 1000:.1f} ms"
+            )
+    if metrics["max_queue_wait"] > args.max_p99:
+        errors.append(
+            f"A query waited {metrics['max_queue_wait'] * 1000:.1f} ms in "
+            f"the queue of the executor, more than "
+            f"{args.max_p99 * 1000:.1f} ms"
+        )
+    if metrics["max_queued"] > 2 * args.workers:
+        errors.append(
+            f"{metrics['max_queued']} queries were queued at once, more "
+            f"than twice the {args.workers} threads of the executor"
+        )
+
+    if errors:
+        for error in errors:
+            print(error)
+        sys.exit(1)
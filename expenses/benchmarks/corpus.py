@@ -0,0 +1,370 @@
+import datetime
+import html
+import random
+from dataclasses import dataclass
+from email.message import Message
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import format_datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pytz
+
+from expenses.constants import EMAILS_FROM_, FX_RATES_
+
+# Merchants, ATMs and people of the alerts. Some of them have non ASCII
+# characters, to exercise the charsets of the emails.
+MERCHANTS_ = [
+    "EXITO COLOMBIA",
+    "D1 SAS",
+    "RAPPI*RESTAURANTE",
+    "PANADERIA LA ESPAÑOLA",
+    "CARULLA 123",
+    "TIENDA D.C.",
+    "DROGUERÍA SAN JOSÉ",
+    "UBER TRIP",
+]
+ATMS_ = ["CAJERO", "CAJERO UNICENTRO", "ATM 24 HORAS"]
+PEOPLE_ = ["PEDRO PEREZ", "MARIA GOMEZ", "JOSÉ MUÑOZ"]
+
+# Formats of the amounts. Every format receives the amount in pesos, or in
+# dollars for USD, and returns the string of the alert and the expected
+# amount in COP.
+AMOUNT_FORMATS_: Dict[str, Callable[[int], Tuple[str, float]]] = {
+    "comma_thousands_dot_decimals": lambda value: (
+        f"${value:,}.00",
+        float(value),
+    ),
+    "dot_thousands_comma_decimals": lambda value: (
+        "$" + f"{value:,}".replace(",", ".") + ",00",
+        float(value),
+    ),
+    "comma_thousands": lambda value: (f"${value:,}", float(value)),
+    "dot_thousands": lambda value: (
+        "$" + f"{value:,}".replace(",", "."),
+        float(value),
+    ),
+    "usd": lambda value: (
+        f"${value % 1000},{value % 100:02d}",
+        (value % 1000 * 100 + value % 100) / 100 * FX_RATES_["USD"],
+    ),
+}
+
+# Date headers of the emails, as sent by the different mail servers
+DATE_FORMATS_: Dict[str, Callable[[datetime.datetime], str]] = {
+    "utc": lambda date: format_datetime(date.astimezone(pytz.utc))
+    + " (UTC)",
+    "edt": lambda date: format_datetime(
+        date.astimezone(pytz.timezone("America/New_York"))
+    )
+    + " (EDT)",
+}
+
+# Template of the html of the alerts. The alert is delimited by
+# non-breaking spaces, as in the emails of Bancolombia.
+HTML_TEMPLATE_ = """<!DOCTYPE html>
+<html>
+<head>
+<meta http-equiv="Content-Type" content="text/html; charset={charset}">
+<style type="text/css">
+td {{ font-family: Arial, sans-serif; font-size: 14px; }}
+</style>
+</head>
+<body>
+<table width="600" cellpadding="0" cellspacing="0" border="0">
+<tr><td><img src="https://www.bancolombia.com/logo.png" alt="Logo"></td></tr>
+<tr><td><p>Hola,</p></td></tr>
+<tr><td>&nbsp;{alert}&nbsp;</td></tr>
+<tr><td>
+<p>Este correo es generado autom&aacute;ticamente, por favor no lo
+respondas.</p>
+<p>Bancolombia S.A. Establecimiento bancario.</p>
+</td></tr>
+</table>
+</body>
+</html>
+"""
+
+
+@dataclass
+class GoldenEmail:
+    """
+    This class represents a synthetic email and the transaction that must
+    be extracted from it. The transaction type is None if the email is not
+    a transaction.
+    """
+
+    message: Message
+    kind: str
+    transaction_type: Optional[str]
+    amount: Optional[float] = None
+    merchant: Optional[str] = None
+    paynment_method: Optional[str] = None
+    datetime: Optional["datetime.datetime"] = None
+    is_valid: bool = True
+
+
+def _purchase(
+    rng: random.Random, amount: str, date: datetime.datetime
+) -> Tuple[str, Dict]:
+    """
+    This function builds the alert of a purchase.
+    """
+    merchant = rng.choice(MERCHANTS_)
+    card = f"{rng.randint(0, 9999):04d}"
+    payment_method = rng.choice(
+        [
+            f"T.Cred *{card}",
+            f"T.Deb *{card}",
+            f"compra afiliada a T.Cred *{card}",
+            None,
+        ]
+    )
+    alert = (
+        f"Bancolombia le informa {rng.choice(['Compra', 'compra'])} por "
+        f"{amount} en {merchant} {date:%H:%M}. {date:%d/%m/%Y}"
+        + (f" {payment_method}" if payment_method else "")
+        + ". Inquietudes al 6045109095/018000931987."
+    )
+    return alert, {
+        "transaction_type": "Compra",
+        "merchant": merchant,
+        "paynment_method": payment_method,
+    }
+
+
+def _withdrawal(
+    rng: random.Random, amount: str, date: datetime.datetime
+) -> Tuple[str, Dict]:
+    """
+    This function builds the alert of a withdrawal.
+    """
+    atm = rng.choice(ATMS_)
+    card = f"{rng.randint(0, 9999):04d}"
+    alert = (
+        f"Bancolombia le informa Retiro por {amount} en {atm}. Hora "
+        f"{date:%H:%M} {date:%d/%m/%Y} T.Deb *{card}. Inquietudes al "
+        "6045109095/018000931987."
+    )
+    # The pattern keeps the dot that ends the name of the ATM
+    return alert, {
+        "transaction_type": "Retiro",
+        "merchant": f"{atm}.",
+        "paynment_method": f"T.Deb *{card}",
+    }
+
+
+def _payment(
+    rng: random.Random, amount: str, date: datetime.datetime
+) -> Tuple[str, Dict]:
+    """
+    This function builds the alert of a payment.
+    """
+    merchant = rng.choice(MERCHANTS_)
+    product = f"{rng.randint(0, 9999):04d}"
+    alert = (
+        f"Bancolombia te informa Pago por {amount} a {merchant} desde "
+        f"producto *{product}. {date:%d/%m/%Y} {date:%H:%M}. Inquietudes "
+        "al 6045109095/018000931987."
+    )
+    return alert, {
+        "transaction_type": "Pago",
+        "merchant": merchant,
+        "paynment_method": product,
+    }
+
+
+def _transfer_reception(
+    rng: random.Random, amount: str, date: datetime.datetime
+) -> Tuple[str, Dict]:
+    """
+    This function builds the alert of a received transfer.
+    """
+    person = rng.choice(PEOPLE_)
+    account = f"{rng.randint(0, 9999):04d}"
+    alert = (
+        f"Bancolombia te informa recepcion transferencia de {person} por "
+        f"{amount} en la cuenta *{account}. {date:%d/%m/%Y} {date:%H:%M}. "
+        "Dudas 018000931987"
+    )
+    return alert, {
+        "transaction_type": "Recepcion Transferencia",
+        "merchant": person,
+        "paynment_method": account,
+    }
+
+
+def _transfer_qr(
+    rng: random.Random, amount: str, date: datetime.datetime
+) -> Tuple[str, Dict]:
+    """
+    This function builds the alert of a QR transfer.
+    """
+    origin = f"{rng.randint(0, 9999):04d}"
+    destination = f"{rng.randint(0, 9999):04d}"
+    alert = (
+        f"Realizaste una transferencia con QR por {amount}, desde cta "
+        f"{origin} a cta {destination}. {date:%d/%m/%Y %H:%M}. Dudas al "
+        "018000931987. Bancolombia"
+    )
+    return alert, {
+        "transaction_type": "QR",
+        "merchant": destination,
+        "paynment_method": origin,
+    }
+
+
+def _transfer(
+    rng: random.Random, amount: str, date: datetime.datetime
+) -> Tuple[str, Dict]:
+    """
+    This function builds the alert of a transfer.
+    """
+    origin = f"{rng.randint(0, 9999):04d}"
+    destination = f"{rng.randint(0, 10 ** 12 - 1):012d}"
+    alert = (
+        f"Bancolombia le informa Transferencia por {amount} desde cta "
+        f"*{origin} a cta {destination}. {date:%d/%m/%Y} {date:%H:%M}. "
+        "Inquietudes al 6045109095/018000931987."
+    )
+    return alert, {
+        "transaction_type": "Transferencia",
+        "merchant": destination,
+        "paynment_method": origin,
+    }
+
+
+# Builders of the alerts of every transaction type and whether the type is
+# an income
+ALERT_BUILDERS_: Dict[str, Tuple[Callable, bool]] = {
+    "purchase": (_purchase, False),
+    "withdrawal": (_withdrawal, False),
+    "payment": (_payment, False),
+    "transfer_reception": (_transfer_reception, True),
+    "transfer_qr": (_transfer_qr, False),
+    "transfer": (_transfer, False),
+}
+
+# Alerts that are not transactions
+NON_TRANSACTION_ALERTS_ = [
+    "Bancolombia te informa que tu clave principal fue cambiada "
+    "exitosamente. Si no fuiste tu, comunicate con nosotros.",
+    "Bancolombia te recuerda que tu extracto de este mes ya esta "
+    "disponible en la Sucursal Virtual Personas.",
+]
+
+
+def _build_message(
+    rng: random.Random, alert: str, date: datetime.datetime
+) -> Message:
+    """
+    This function builds the MIME email of an alert, with a random charset,
+    transfer encoding, date format and structure.
+
+    Parameters
+    ----------
+    rng : random.Random
+        The random generator.
+    alert : str
+        The alert.
+    date : datetime.datetime
+        The date of the email.
+
+    Returns
+    -------
+    Message
+        The email.
+    """
+    charset = rng.choice(["utf-8", "iso-8859-1"])
+    body = HTML_TEMPLATE_.format(charset=charset, alert=html.escape(alert))
+    html_part = MIMEText(body, "html", charset)
+
+    # Half of the emails also have a plain text version
+    if rng.random() < 0.5:
+        message = MIMEMultipart("alternative")
+        message.attach(MIMEText(alert, "plain", charset))
+        message.attach(html_part)
+    else:
+        message = html_part
+
+    message["From"] = rng.choice(EMAILS_FROM_)
+    message["Subject"] = "Alertas y Notificaciones"
+    message["Date"] = rng.choice(list(DATE_FORMATS_.values()))(date)
+    return message
+
+
+def generate_corpus(size: int, seed: int = 0) -> List[GoldenEmail]:
+    """
+    This function generates a corpus of synthetic Bancolombia alerts of
+    every transaction type, amount format and edge case, with the
+    transaction that must be extracted from every email. The same seed
+    always generates the same corpus.
+
+    These are the edge cases:
+        - The alerts without "$", which are logged as not valid.
+        - The alerts that are not transactions.
+        - The purchases without payment method, which are rejected.
+        - The emails in latin-1, with a plain text part or with the date
+          in EDT.
+
+    Parameters
+    ----------
+    size : int
+        The number of emails.
+    seed : int, optional
+        The seed of the random generator.
+
+    Returns
+    -------
+    List[GoldenEmail]
+        The emails of the corpus.
+    """
+    rng = random.Random(seed)
+    bogota = pytz.timezone("America/Bogota")
+    start = datetime.datetime(2023, 1, 1, tzinfo=pytz.utc)
+
+    corpus = []
+    for _ in range(size):
+        date = start + datetime.timedelta(
+            seconds=rng.randint(0, 365 * 24 * 3600)
+        )
+        local_date = date.astimezone(bogota)
+
+        if rng.random() < 0.05:
+            message = _build_message(
+                rng, rng.choice(NON_TRANSACTION_ALERTS_), date
+            )
+            corpus.append(GoldenEmail(message, "non_transaction", None))
+            continue
+
+        kind = rng.choice(list(ALERT_BUILDERS_))
+        builder, is_income = ALERT_BUILDERS_[kind]
+        amount_format = rng.choice(list(AMOUNT_FORMATS_))
+        amount_str, amount = AMOUNT_FORMATS_[amount_format](
+            rng.randint(0, 5_000_000)
+        )
+
+        # Some alerts have no "$", so they are not valid
+        is_valid = rng.random() >= 0.02
+        if not is_valid:
+            amount_str, amount = amount_str.replace("$", ""), 0.0
+
+        alert, expected = builder(rng, amount_str, local_date)
+        if not is_valid:
+            expected.update(merchant="unknown", paynment_method="unknown")
+        elif expected["paynment_method"] is None:
+            # The valid alerts without payment method are rejected
+            expected.update(transaction_type=None)
+
+        corpus.append(
+            GoldenEmail(
+                message=_build_message(rng, alert, date),
+                kind=f"{kind}/{amount_format}",
+                amount=amount if is_income else -amount,
+                datetime=local_date,
+                is_valid=is_valid,
+                **expected,
+            )
+        )
+
+    return corpus
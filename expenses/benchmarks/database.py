@@ -0,0 +1,256 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from typing import List, Tuple
+
+from expenses.benchmarks.corpus import generate_corpus
+from expenses.processors.factory import EmailProcessorFactory
+from expenses.processors.parallel import process_emails
+
+# SQLite versions of the queries of expenses.api.utils.database. The
+# transactions table and the dedupe rules are the same as in SQL Server.
+CREATE_TABLE_ = """
+    CREATE TABLE transactions (
+        id INTEGER PRIMARY KEY,
+        transaction_type TEXT,
+        amount REAL,
+        merchant TEXT,
+        datetime TEXT,
+        payment_method TEXT,
+        email_log_id TEXT,
+        fingerprint TEXT UNIQUE
+    )
+    """
+INSERT_ROW_LEGACY_ = """
+    INSERT INTO transactions
+    (
+        transaction_type,
+        amount,
+        merchant,
+        datetime,
+        payment_method,
+        email_log_id
+    )
+    SELECT ?, ?, ?, ?, ?, ?
+    WHERE NOT EXISTS (
+        SELECT 1 FROM transactions
+        WHERE
+            transaction_type = ? AND
+            amount = ? AND
+            merchant = ? AND
+            datetime = ? AND
+            payment_method = ?
+    )
+    """
+INSERT_ROW_ = """
+    INSERT INTO transactions
+    (
+        transaction_type,
+        amount,
+        merchant,
+        datetime,
+        payment_method,
+        email_log_id,
+        fingerprint
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (fingerprint) DO NOTHING
+    """
+CREATE_STAGING_TABLE_ = """
+    CREATE TEMP TABLE staging_transactions (
+        row_id INTEGER PRIMARY KEY,
+        transaction_type TEXT,
+        amount REAL,
+        merchant TEXT,
+        datetime TEXT,
+        payment_method TEXT,
+        email_log_id TEXT,
+        fingerprint TEXT
+    )
+    """
+INSERT_STAGING_ROW_ = """
+    INSERT INTO staging_transactions
+    (
+        transaction_type,
+        amount,
+        merchant,
+        datetime,
+        payment_method,
+        email_log_id,
+        fingerprint
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+INSERT_STAGING_INTO_TRANSACTIONS_ = """
+    INSERT INTO transactions
+    (
+        transaction_type,
+        amount,
+        merchant,
+        datetime,
+        payment_method,
+        email_log_id,
+        fingerprint
+    )
+    SELECT
+        staging.transaction_type,
+        staging.amount,
+        staging.merchant,
+        staging.datetime,
+        staging.payment_method,
+        staging.email_log_id,
+        staging.fingerprint
+    FROM (
+        SELECT
+            *,
+            ROW_NUMBER() OVER (
+                PARTITION BY fingerprint ORDER BY row_id
+            ) AS duplicate_number
+        FROM staging_transactions
+    ) AS staging
+    WHERE staging.duplicate_number = 1 AND NOT EXISTS (
+        SELECT 1 FROM transactions
+        WHERE transactions.fingerprint = staging.fingerprint
+    )
+    """
+
+
+def generate_rows(size: int, seed: int = 0) -> List[Tuple]:
+    """
+    This function generates the rows to insert from the synthetic corpus, as
+    returned by TransactionColumns.fingerprint_rows.
+
+    Parameters
+    ----------
+    size : int
+        The number of emails of the corpus.
+    seed : int, optional
+        The seed of the corpus.
+
+    Returns
+    -------
+    List[Tuple]
+        The rows of the transactions, with the datetimes in ISO format.
+    """
+    corpus = generate_corpus(size, seed=seed)
+    columns = process_emails(
+        EmailProcessorFactory(), (golden.message for golden in corpus)
+    )
+    return [
+        row[:3] + (row[3].isoformat(),) + row[4:]
+        for row in columns.fingerprint_rows()
+    ]
+
+
+def _connect(path: str, existing_rows: List[Tuple]) -> sqlite3.Connection:
+    """
+    This function creates a database with the transactions table filled
+    with the existing rows.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    connection = sqlite3.connect(path)
+    connection.execute(CREATE_TABLE_)
+    connection.executemany(INSERT_ROW_, existing_rows)
+    connection.commit()
+    return connection
+
+
+def insert_row_by_row_legacy(
+    connection: sqlite3.Connection, rows: List[Tuple]
+) -> Tuple[int, int]:
+    """
+    This function inserts the rows one by one, with a commit per row and
+    the five columns duplicate check, as the populate did before the bulk
+    insertion and the fingerprints.
+    """
+    inserted = 0
+    for row in rows:
+        cursor = connection.execute(INSERT_ROW_LEGACY_, row[:6] + row[:5])
+        connection.commit()
+        inserted += cursor.rowcount
+    return inserted, len(rows) - inserted
+
+
+def insert_row_by_row(
+    connection: sqlite3.Connection, rows: List[Tuple]
+) -> Tuple[int, int]:
+    """
+    This function inserts the rows one by one, with a commit per row and
+    the duplicate check by fingerprint, as insert_data_into_database.
+    """
+    inserted = 0
+    for row in rows:
+        cursor = connection.execute(INSERT_ROW_, row)
+        connection.commit()
+        inserted += cursor.rowcount
+    return inserted, len(rows) - inserted
+
+
+def insert_in_bulk(
+    connection: sqlite3.Connection, rows: List[Tuple]
+) -> Tuple[int, int]:
+    """
+    This function inserts the rows through the staging table, as
+    insert_transactions_in_bulk.
+    """
+    connection.execute(CREATE_STAGING_TABLE_)
+    connection.executemany(INSERT_STAGING_ROW_, rows)
+    inserted = connection.execute(INSERT_STAGING_INTO_TRANSACTIONS_).rowcount
+    connection.execute("DROP TABLE staging_transactions")
+    connection.commit()
+    return inserted, len(rows) - inserted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the insertion of the transactions of a "
+        "populate against a local SQLite stand-in of the database."
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=5000,
+        help="The number of emails of the corpus.",
+    )
+    parser.add_argument(
+        "--existing",
+        type=float,
+        default=0.5,
+        help="The fraction of the rows already in the table.",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="The seed of the corpus."
+    )
+    args = parser.parse_args()
+
+    rows = generate_rows(args.size, seed=args.seed)
+    existing_rows = rows[: int(len(rows) * args.existing)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "transactions.db")
+        results = {}
+        for name, insert in (
+            ("legacy", insert_row_by_row_legacy),
+            ("row_by_row", insert_row_by_row),
+            ("bulk", insert_in_bulk),
+        ):
+            connection = _connect(path, existing_rows)
+            start = time.perf_counter()
+            inserted, skipped = insert(connection, rows)
+            seconds = time.perf_counter() - start
+            total = connection.execute(
+                "SELECT COUNT(*) FROM transactions"
+            ).fetchone()[0]
+            connection.close()
+            results[name] = (inserted, skipped, total)
+            print(
+                f"{name:<12}{len(rows):>8,} rows{seconds:>10.3f} s"
+                f"{len(rows) / seconds:>12,.0f} rows/s"
+                f"{inserted:>8,} inserted{skipped:>8,} skipped"
+            )
+
+    if len(set(results.values())) != 1:
+        raise SystemExit("The insertions stored different transactions.")
@@ -0,0 +1,196 @@
+import imaplib
+import re
+import socketserver
+import threading
+import time
+from collections import Counter
+from typing import List, Tuple
+
+# Regex of the "UID n:*" criterion of the incremental searches
+UID_RANGE_CRITERION_ = re.compile(r"UID (?P<min_uid>\d+):\*")
+
+
+def parse_message_set(message_set: str) -> List[int]:
+    """
+    This function expands an IMAP message set of UIDs, e.g. "1:3,7" to
+    [1, 2, 3, 7].
+
+    Parameters
+    ----------
+    message_set : str
+        The message set.
+
+    Returns
+    -------
+    List[int]
+        The UIDs of the message set.
+    """
+    uids = []
+    for item in message_set.split(","):
+        start, _, end = item.partition(":")
+        uids.extend(range(int(start), int(end or start) + 1))
+    return uids
+
+
+class _FakeIMAPHandler(socketserver.StreamRequestHandler):
+    """
+    This class answers the commands of an IMAP session with the emails of
+    the FakeIMAPServer. Only the commands used by GmailClient in the "full"
+    fetch mode are implemented.
+    """
+
+    def _send(self, *lines: bytes) -> None:
+        self.wfile.write(b"".join(line + b"\r\n" for line in lines))
+
+    def handle(self) -> None:
+        fake: "FakeIMAPServer" = self.server.fake
+        self._send(b"* OK [CAPABILITY IMAP4rev1] Fake IMAP server ready")
+
+        for line in self.rfile:
+            tag, command, *rest = line.decode().rstrip("\r\n").split(" ", 2)
+            command = command.upper()
+            arguments = rest[0] if rest else ""
+            if command == "UID":
+                command, _, arguments = arguments.partition(" ")
+                command = command.upper()
+
+            fake.record(command)
+            if command == "LOGOUT":
+                self._send(
+                    b"* BYE Logging out", f"{tag} OK Completed".encode()
+                )
+                return
+            untagged, status = fake.answer(command, arguments)
+            self._send(*untagged, f"{tag} {status}".encode())
+
+
+class FakeIMAPServer:
+    """
+    This class is a local IMAP server over TCP that serves a fixed list of
+    emails, with UIDs from 1, to measure the IMAP client without a network.
+    Every command waits the latency before it is answered, as a round trip
+    to a remote server, and is counted by name.
+    """
+
+    def __init__(
+        self, messages: List[bytes], latency: float = 0.0, uidvalidity=1
+    ):
+        self.messages = messages
+        self.latency = latency
+        self.uidvalidity = uidvalidity
+        self.commands: Counter = Counter()
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(
+            ("127.0.0.1", 0), _FakeIMAPHandler
+        )
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """
+        This property is the host and the port of the server.
+        """
+        return self._server.server_address
+
+    def __enter__(self) -> "FakeIMAPServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def record(self, command: str) -> None:
+        """
+        This function counts a command and waits the latency.
+
+        Parameters
+        ----------
+        command : str
+            The name of the command.
+        """
+        with self._lock:
+            self.commands[command] += 1
+        time.sleep(self.latency)
+
+    def reset(self) -> None:
+        """
+        This function resets the count of the commands.
+        """
+        with self._lock:
+            self.commands.clear()
+
+    def connect(self) -> imaplib.IMAP4:
+        """
+        This function opens a new authenticated connection to the server.
+
+        Returns
+        -------
+        imaplib.IMAP4
+            The connection to the server.
+        """
+        conn = imaplib.IMAP4(*self.address)
+        conn.login("benchmark", "token")
+        return conn
+
+    def answer(
+        self, command: str, arguments: str
+    ) -> Tuple[List[bytes], str]:
+        """
+        This function builds the untagged responses and the status of the
+        tagged response of a command.
+
+        Parameters
+        ----------
+        command : str
+            The name of the command, e.g. "SEARCH" for "UID SEARCH".
+        arguments : str
+            The arguments of the command.
+
+        Returns
+        -------
+        Tuple[List[bytes], str]
+            The untagged responses and the status sent after the tag.
+        """
+        if command in ["LOGIN", "NOOP"]:
+            return [], "OK Completed"
+
+        if command == "CAPABILITY":
+            return [b"* CAPABILITY IMAP4rev1"], "OK Completed"
+
+        if command == "SELECT":
+            return [
+                f"* {len(self.messages)} EXISTS".encode(),
+                f"* OK [UIDVALIDITY {self.uidvalidity}] UIDs valid".encode(),
+            ], "OK [READ-WRITE] SELECT completed"
+
+        if command == "SEARCH":
+            uids = range(1, len(self.messages) + 1)
+            match = UID_RANGE_CRITERION_.search(arguments)
+            if match:
+                # The range "n:*" always contains the last message
+                min_uid = int(match.group("min_uid"))
+                uids = [uid for uid in uids if uid >= min_uid] or [
+                    len(self.messages)
+                ]
+            search = " ".join(["* SEARCH", *map(str, uids)])
+            return [search.encode()], "OK Completed"
+
+        if command == "FETCH" and "RFC822" in arguments:
+            message_set, _, _ = arguments.partition(" ")
+            lines = []
+            for uid in parse_message_set(message_set):
+                if not 1 <= uid <= len(self.messages):
+                    continue
+                message = self.messages[uid - 1]
+                header = (
+                    f"* {uid} FETCH (UID {uid} RFC822 {{{len(message)}}}"
+                )
+                lines.append(header.encode() + b"\r\n" + message + b")")
+            return lines, "OK Completed"
+
+        return [], "BAD Not implemented"
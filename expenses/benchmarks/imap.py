@@ -0,0 +1,119 @@
+import argparse
+import math
+import sys
+import time
+from typing import List, Tuple
+
+from expenses.benchmarks.corpus import generate_corpus
+from expenses.benchmarks.fake_imap import FakeIMAPServer
+from expenses.constants import EMAILS_FROM_
+from expenses.core.client import GmailClient
+
+
+def download_emails(
+    server: FakeIMAPServer, batch_size: int
+) -> Tuple[List[bytes], int, float]:
+    """
+    This function downloads all the emails of the fake server with the
+    GmailClient, requesting batch_size emails in every FETCH command.
+
+    Parameters
+    ----------
+    server : FakeIMAPServer
+        The server with the emails.
+    batch_size : int
+        The number of emails requested in every FETCH command.
+
+    Returns
+    -------
+    Tuple[List[bytes], int, float]
+        The emails, the number of FETCH round trips and the seconds of the
+        download.
+    """
+    conn = server.connect()
+    try:
+        client = GmailClient(
+            "benchmark", fetch_mode="full", conn=conn, store=None
+        )
+        server.reset()
+        start = time.perf_counter()
+        messages = [
+            message.as_bytes()
+            for message in client.iter_emails(
+                EMAILS_FROM_, False, batch_size=batch_size
+            )
+        ]
+        seconds = time.perf_counter() - start
+    finally:
+        conn.logout()
+    return messages, server.commands["FETCH"], seconds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Count the round trips of the IMAP client to download "
+        "the corpus from a local fake IMAP server, one email per FETCH and "
+        "in batches."
+    )
+    parser.add_argument(
+        "--emails",
+        type=int,
+        default=1000,
+        help="The number of emails of the corpus.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=200,
+        help="The number of emails requested in every batched FETCH.",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.005,
+        help="The seconds the server waits before answering a command.",
+    )
+    args = parser.parse_args()
+
+    corpus = [
+        golden.message.as_bytes() for golden in generate_corpus(args.emails)
+    ]
+    with FakeIMAPServer(corpus, latency=args.latency) as server:
+        results = {
+            batch_size: download_emails(server, batch_size)
+            for batch_size in [1, args.batch_size]
+        }
+
+    print(
+        f"{'batch size':<12}{'emails':>10}{'round trips':>14}"
+        f"{'per 1,000':>12}{'seconds':>10}"
+    )
+    for batch_size, (messages, round_trips, seconds) in results.items():
+        print(
+            f"{batch_size:<12}{len(messages):>10,}{round_trips:>14,}"
+            f"{round_trips * 1000 / max(len(messages), 1):>12,.1f}"
+            f"{seconds:>10.2f}"
+        )
+
+    # Both modes must download every email, unchanged, with one round trip
+    # per batch
+    errors = []
+    for batch_size, (messages, round_trips, _) in results.items():
+        if len(messages) != len(corpus):
+            errors.append(
+                f"batch size {batch_size}: {len(messages)} emails, "
+                f"{len(corpus)} expected"
+            )
+        expected_round_trips = math.ceil(len(corpus) / batch_size)
+        if round_trips != expected_round_trips:
+            errors.append(
+                f"batch size {batch_size}: {round_trips} round trips, "
+                f"{expected_round_trips} expected"
+            )
+    if results[1][0] != results[args.batch_size][0]:
+        errors.append("The batched download differs from the one by one.")
+
+    if errors:
+        for error in errors:
+            print(error)
+        sys.exit(1)
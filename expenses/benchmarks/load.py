@@ -0,0 +1,261 @@
+import argparse
+import datetime
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import pytz
+import requests
+
+from expenses.benchmarks.corpus import generate_corpus
+from expenses.processors.factory import EmailProcessorFactory
+from expenses.processors.parallel import process_emails
+
+# Endpoints of the load and their weight in the mix of requests
+READ_ENDPOINTS_: Dict[str, int] = {
+    "/expenses/daily": 4,
+    "/expenses/weekly": 3,
+    "/expenses/monthly": 2,
+    "/expenses/a_day_like_today/": 1,
+    "/expenses/get_full_transactions_day/": 2,
+    "/merchants/daily": 2,
+    "/merchants/monthly": 2,
+    "/database/test_connection": 1,
+}
+
+
+def seed_database(size: int, days: int, seed: int = 0) -> int:
+    """
+    This function fills the configured storage with the transactions of the
+    synthetic corpus, spread over the last days up to now, so the endpoints
+    find them in the database instead of searching the mailbox.
+
+    Parameters
+    ----------
+    size : int
+        The number of emails of the corpus.
+    days : int
+        The number of days the transactions are spread over.
+    seed : int, optional
+        The seed of the corpus and the dates.
+
+    Returns
+    -------
+    int
+        The number of transactions inserted.
+    """
+    from expenses.api.storage import get_repository
+
+    rng = random.Random(seed)
+    now = datetime.datetime.now(pytz.timezone("America/Bogota"))
+    columns = process_emails(
+        EmailProcessorFactory(),
+        (golden.message for golden in generate_corpus(size, seed=seed)),
+    )
+    columns.datetime = sorted(
+        now - datetime.timedelta(seconds=rng.randint(0, days * 24 * 3600))
+        for _ in range(len(columns))
+    )
+    inserted, _ = get_repository().insert_transactions(columns)
+    return inserted
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    """
+    This function returns a percentile of the values, by the nearest rank.
+    """
+    values = sorted(values)
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def run_load(
+    base_url: str,
+    token: str,
+    requests_count: int,
+    concurrency: int,
+    write_ratio: float,
+    seed: int = 0,
+) -> Tuple[Dict[str, List[float]], Dict[str, int], float]:
+    """
+    This function sends a mix of read and write requests to the API from
+    several threads.
+
+    Parameters
+    ----------
+    base_url : str
+        The URL of the API.
+    token : str
+        The access token.
+    requests_count : int
+        The number of requests.
+    concurrency : int
+        The number of threads sending requests.
+    write_ratio : float
+        The fraction of the requests that add a transaction.
+    seed : int, optional
+        The seed of the mix of requests.
+
+    Returns
+    -------
+    Tuple[Dict[str, List[float]], Dict[str, int], float]
+        The latencies in seconds and the number of errors of every
+        endpoint, and the seconds of the whole load.
+    """
+    rng = random.Random(seed)
+    endpoints = list(READ_ENDPOINTS_)
+    weights = list(READ_ENDPOINTS_.values())
+    plan = [
+        "/database/add_transaction"
+        if rng.random() < write_ratio
+        else rng.choices(endpoints, weights)[0]
+        for _ in range(requests_count)
+    ]
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    local = threading.local()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def send(index: int, endpoint: str) -> None:
+        # Every thread keeps its own HTTP session
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+
+        start = time.perf_counter()
+        if endpoint == "/database/add_transaction":
+            response = local.session.post(
+                base_url + endpoint,
+                headers=headers,
+                json={
+                    "transaction_type": "Compra",
+                    "amount": -float(1_000 + index * 997 % 500_000),
+                    "merchant": f"LOAD TEST {index}",
+                    "datetime": datetime.datetime.now(
+                        pytz.timezone("America/Bogota")
+                    ).isoformat(),
+                    "paynment_method": "T.Cred *0000",
+                    "email_log": "",
+                },
+            )
+        else:
+            response = local.session.get(
+                base_url + endpoint, headers=headers
+            )
+        elapsed = time.perf_counter() - start
+
+        with lock:
+            latencies[endpoint].append(elapsed)
+            if response.status_code != 200:
+                errors[endpoint] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(send, range(len(plan)), plan))
+    return latencies, errors, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the API on the SQLite backend and measure it under "
+        "a concurrent mix of requests, without external services."
+    )
+    parser.add_argument(
+        "--emails",
+        type=int,
+        default=5000,
+        help="The number of emails of the corpus seeded in the database.",
+    )
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=60,
+        help="The number of days the seeded transactions are spread over.",
+    )
+    parser.add_argument(
+        "--requests", type=int, default=2000, help="The number of requests."
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=16,
+        help="The number of threads sending requests.",
+    )
+    parser.add_argument(
+        "--write-ratio",
+        type=float,
+        default=0.05,
+        help="The fraction of the requests that add a transaction.",
+    )
+    parser.add_argument(
+        "--port", type=int, default=5055, help="The port of the API."
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="The seed of the load."
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # The backend is read when the storage is imported, so it is set
+        # before importing the application
+        os.environ["STORAGE_BACKEND"] = "sqlite"
+        os.environ["SQLITE_PATH"] = os.path.join(directory, "load.db")
+
+        import uvicorn
+        from jose import jwt
+
+        from expenses.main import app
+
+        seeded = seed_database(args.emails, args.days, seed=args.seed)
+        print(f"{seeded:,} transactions seeded")
+
+        server = uvicorn.Server(
+            uvicorn.Config(
+                app, host="127.0.0.1", port=args.port, log_level="warning"
+            )
+        )
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+
+        try:
+            latencies, errors, seconds = run_load(
+                f"http://127.0.0.1:{args.port}",
+                jwt.encode({"user": "load-test"}, key="load-test"),
+                args.requests,
+                args.concurrency,
+                args.write_ratio,
+                seed=args.seed,
+            )
+        finally:
+            server.should_exit = True
+            thread.join()
+
+    print(
+        f"{'endpoint':<40}{'requests':>10}{'errors':>8}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for endpoint, values in sorted(latencies.items()):
+        print(
+            f"{endpoint:<40}{len(values):>10,}{errors[endpoint]:>8,}"
+            f"{_percentile(values, 0.50) * 1000:>10.1f}"
+            f"{_percentile(values, 0.95) * 1000:>10.1f}"
+            f"{_percentile(values, 0.99) * 1000:>10.1f}"
+        )
+    total = sum(len(values) for values in latencies.values())
+    print(f"{total:,} requests in {seconds:.2f} s: {total / seconds:,.0f}/s")
+
+    # Every endpoint must answer every request, the writes included
+    failed = {endpoint: count for endpoint, count in errors.items() if count}
+    if failed:
+        for endpoint, count in sorted(failed.items()):
+            print(f"{endpoint}: {count:,} requests failed")
+        sys.exit(1)
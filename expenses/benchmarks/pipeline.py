@@ -0,0 +1,310 @@
+import email as email_lib
+import math
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from expenses.benchmarks.corpus import AMOUNT_FORMATS_, GoldenEmail
+from expenses.core.transaction_email import TransactionEmail
+from expenses.processors.amounts import (
+    convert_amount_to_float,
+    parse_amounts,
+)
+from expenses.processors.classifier import TRANSACTION_CLASSIFIER_
+from expenses.processors.factory import EmailProcessorFactory
+from expenses.processors.parallel import process_email, process_emails
+from expenses.processors.schemas import TransactionInfo
+
+
+@dataclass
+class StageResult:
+    """
+    This class represents the result of the benchmark of a stage of the
+    pipeline.
+    """
+
+    name: str
+    items: int
+    seconds: float
+    items_per_second: float
+    peak_bytes_per_item: float
+
+
+def _expected_matches(
+    golden: GoldenEmail, transaction: Optional[TransactionInfo]
+) -> bool:
+    """
+    This function checks if a transaction is the one expected for an email
+    of the corpus.
+
+    Parameters
+    ----------
+    golden : GoldenEmail
+        The email of the corpus.
+    transaction : Optional[TransactionInfo]
+        The transaction extracted from the email.
+
+    Returns
+    -------
+    bool
+        True if the transaction is the expected one, False otherwise.
+    """
+    if golden.transaction_type is None or transaction is None:
+        return golden.transaction_type is None and transaction is None
+
+    return (
+        transaction.transaction_type == golden.transaction_type
+        and math.isclose(transaction.amount, golden.amount, rel_tol=1e-12)
+        and transaction.merchant == golden.merchant
+        and transaction.paynment_method == golden.paynment_method
+        and transaction.datetime == golden.datetime
+        and (transaction.email_log is None) == golden.is_valid
+    )
+
+
+def check_corpus(corpus: List[GoldenEmail]) -> List[str]:
+    """
+    This function processes the corpus with the scalar and the batch paths
+    and compares the transactions with the expected ones.
+
+    Parameters
+    ----------
+    corpus : List[GoldenEmail]
+        The emails of the corpus.
+
+    Returns
+    -------
+    List[str]
+        The description of every mismatch. Empty if all the transactions
+        are the expected ones.
+    """
+    processor_factory = EmailProcessorFactory()
+    mismatches = []
+
+    for index, golden in enumerate(corpus):
+        transaction = process_email(processor_factory, golden.message)
+        if not _expected_matches(golden, transaction):
+            mismatches.append(
+                f"scalar #{index} ({golden.kind}): {transaction}"
+            )
+
+    # The batch path skips the emails that are not transactions
+    transactions = process_emails(
+        processor_factory, (golden.message for golden in corpus)
+    ).to_transactions()
+    expected = [
+        golden for golden in corpus if golden.transaction_type is not None
+    ]
+    if len(transactions) != len(expected):
+        mismatches.append(
+            f"batch: {len(transactions)} transactions, "
+            f"{len(expected)} expected"
+        )
+    for index, (golden, transaction) in enumerate(
+        zip(expected, transactions)
+    ):
+        if not _expected_matches(golden, transaction):
+            mismatches.append(
+                f"batch #{index} ({golden.kind}): {transaction}"
+            )
+
+    return mismatches
+
+
+def _measure(
+    name: str, run: Callable[[], object], items: int, repeat: int
+) -> StageResult:
+    """
+    This function measures a stage: the best time of several runs, and the
+    peak of memory allocated by a separate run traced with tracemalloc.
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage.
+    run : Callable[[], object]
+        The function that runs the stage over all the items.
+    items : int
+        The number of items processed by every run.
+    repeat : int
+        The number of timed runs.
+
+    Returns
+    -------
+    StageResult
+        The result of the stage.
+    """
+    seconds = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return StageResult(
+        name=name,
+        items=items,
+        seconds=seconds,
+        items_per_second=items / seconds if seconds > 0 else math.inf,
+        peak_bytes_per_item=peak / items if items else 0.0,
+    )
+
+
+def generate_amounts(size: int, seed: int = 0) -> List[str]:
+    """
+    This function generates string amounts in all the formats of the
+    alerts.
+
+    Parameters
+    ----------
+    size : int
+        The number of amounts.
+    seed : int, optional
+        The seed of the random generator.
+
+    Returns
+    -------
+    List[str]
+        The string amounts.
+    """
+    rng = random.Random(seed)
+    amount_formats = list(AMOUNT_FORMATS_.values())
+    return [
+        rng.choice(amount_formats)(rng.randint(0, 5_000_000))[0]
+        for _ in range(size)
+    ]
+
+
+def run_benchmarks(
+    corpus: List[GoldenEmail], amounts: List[str], repeat: int = 3
+) -> Dict[str, StageResult]:
+    """
+    This function measures every stage of the parsing pipeline over the
+    corpus. The input of every stage is prepared beforehand, so only the
+    stage is measured:
+        - mime_parsing: the raw emails to Message.
+        - html_extraction: the Message to TransactionEmail.
+        - classification: the transaction type of the messages.
+        - processing: the processor and the TransactionInfo of every email.
+        - batch_processing: EmailProcessorFactory.process_batch.
+        - end_to_end: the raw emails to columns, as the parallel workers.
+        - amount_parsing_scalar and amount_parsing_vectorized: the
+          conversion of the string amounts.
+
+    Parameters
+    ----------
+    corpus : List[GoldenEmail]
+        The emails of the corpus.
+    amounts : List[str]
+        The string amounts.
+    repeat : int, optional
+        The number of timed runs of every stage.
+
+    Returns
+    -------
+    Dict[str, StageResult]
+        The result of every stage.
+    """
+    processor_factory = EmailProcessorFactory()
+    raw_emails = [golden.message.as_bytes() for golden in corpus]
+    messages = [email_lib.message_from_bytes(raw) for raw in raw_emails]
+    transaction_emails = [TransactionEmail(message) for message in messages]
+    texts = [
+        transaction_email.str_message
+        for transaction_email in transaction_emails
+    ]
+
+    def process_one_by_one():
+        for transaction_email in transaction_emails:
+            try:
+                processor_factory.get_processor(transaction_email).process()
+            except ValueError:
+                continue
+
+    stages = {
+        "mime_parsing": (
+            lambda: [
+                email_lib.message_from_bytes(raw) for raw in raw_emails
+            ],
+            len(raw_emails),
+        ),
+        "html_extraction": (
+            lambda: [TransactionEmail(message) for message in messages],
+            len(messages),
+        ),
+        "classification": (
+            lambda: [
+                TRANSACTION_CLASSIFIER_.classify(text) for text in texts
+            ],
+            len(texts),
+        ),
+        "processing": (process_one_by_one, len(transaction_emails)),
+        "batch_processing": (
+            lambda: processor_factory.process_batch(transaction_emails),
+            len(transaction_emails),
+        ),
+        "end_to_end": (
+            lambda: process_emails(
+                processor_factory,
+                (email_lib.message_from_bytes(raw) for raw in raw_emails),
+            ),
+            len(raw_emails),
+        ),
+        "amount_parsing_scalar": (
+            lambda: [convert_amount_to_float(amount) for amount in amounts],
+            len(amounts),
+        ),
+        "amount_parsing_vectorized": (
+            lambda: parse_amounts(amounts),
+            len(amounts),
+        ),
+    }
+
+    return {
+        name: _measure(name, run, items, repeat)
+        for name, (run, items) in stages.items()
+    }
+
+
+def find_regressions(
+    results: Dict[str, StageResult],
+    baseline: Dict[str, float],
+    tolerance: float,
+) -> List[str]:
+    """
+    This function compares the throughput of every stage with a baseline.
+
+    Parameters
+    ----------
+    results : Dict[str, StageResult]
+        The result of every stage.
+    baseline : Dict[str, float]
+        The items per second of every stage in the baseline.
+    tolerance : float
+        The fraction of the baseline throughput that a stage can lose, e.g.
+        0.2 fails when a stage is more than 20% slower.
+
+    Returns
+    -------
+    List[str]
+        The description of every regression. Empty if there is none.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        minimum = baseline[name] * (1 - tolerance)
+        if result.items_per_second < minimum:
+            regressions.append(
+                f"{name}: {result.items_per_second:,.0f} items/s, "
+                f"baseline {baseline[name]:,.0f} items/s"
+            )
+    return regressions
@@ -0,0 +1,178 @@
+import argparse
+import math
+import re
+import sys
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+from expenses.benchmarks.corpus import generate_corpus
+from expenses.core.transaction_email import TransactionEmail
+from expenses.processors.base import EmailProcessor
+from expenses.processors.factory import EmailProcessorFactory
+
+
+def _best_time(run: Callable[[], object], repeat: int) -> float:
+    """
+    This function returns the best time in seconds of several runs.
+    """
+    seconds = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        seconds = min(seconds, time.perf_counter() - start)
+    return seconds
+
+
+def group_emails(
+    emails: List[TransactionEmail],
+) -> Dict[type, List[EmailProcessor]]:
+    """
+    This function builds the processor of every email that is a
+    transaction, grouped by the class of the processor.
+
+    Parameters
+    ----------
+    emails : List[TransactionEmail]
+        The emails.
+
+    Returns
+    -------
+    Dict[type, List[EmailProcessor]]
+        The processors of every class.
+    """
+    processor_factory = EmailProcessorFactory()
+    processors = defaultdict(list)
+    for email in emails:
+        try:
+            processor = processor_factory.get_processor(email)
+        except ValueError:
+            continue
+        processors[type(processor)].append(processor)
+    return processors
+
+
+def measure_processor(
+    processors: List[EmailProcessor], repeat: int
+) -> Tuple[float, float, float, List[str]]:
+    """
+    This function measures the cost per email of the processors of a class:
+    the whole processing, the match with the pattern compiled once for the
+    class and the match with the pattern string through re.search, as every
+    processor did before the patterns were compiled. Both matches must find
+    the same groups.
+
+    Parameters
+    ----------
+    processors : List[EmailProcessor]
+        The processors of the emails, all of the same class.
+    repeat : int
+        The number of timed runs.
+
+    Returns
+    -------
+    Tuple[float, float, float, List[str]]
+        The seconds per email of the processing, of the compiled match and
+        of the match with the string, and the description of every
+        mismatch.
+    """
+    processor_class = type(processors[0])
+    texts = [processor.transaction_email_text for processor in processors]
+
+    def process() -> None:
+        for processor in processors:
+            try:
+                processor.process()
+            except ValueError:
+                continue
+
+    def match_compiled() -> list:
+        return [processor_class.pattern.search(text) for text in texts]
+
+    def match_string() -> list:
+        return [
+            re.search(processor_class._set_pattern(), text) for text in texts
+        ]
+
+    mismatches = []
+    for index, (compiled, string) in enumerate(
+        zip(match_compiled(), match_string())
+    ):
+        if (compiled and compiled.groupdict()) != (
+            string and string.groupdict()
+        ):
+            mismatches.append(
+                f"{processor_class.__name__} #{index}: "
+                f"{compiled and compiled.groupdict()}, "
+                f"{string and string.groupdict()} expected"
+            )
+
+    # The instances must share the compiled pattern of the class
+    if any("pattern" in vars(processor) for processor in processors):
+        mismatches.append(
+            f"{processor_class.__name__}: the instances have their own "
+            "pattern"
+        )
+
+    return (
+        _best_time(process, repeat) / len(processors),
+        _best_time(match_compiled, repeat) / len(texts),
+        _best_time(match_string, repeat) / len(texts),
+        mismatches,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the cost per email of every processor over a "
+        "synthetic corpus, with the patterns compiled once per class and "
+        "with re.search over the pattern strings."
+    )
+    parser.add_argument(
+        "--size", type=int, default=5000, help="The number of emails."
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="The number of timed runs.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="The fraction the compiled match can be slower than the "
+        "match with the string.",
+    )
+    args = parser.parse_args()
+
+    emails = [
+        TransactionEmail(golden.message)
+        for golden in generate_corpus(args.size)
+    ]
+    results = {
+        processor_class.__name__: measure_processor(processors, args.repeat)
+        for processor_class, processors in group_emails(emails).items()
+    }
+
+    print(
+        f"{'processor':<34}{'process us':>12}"
+        f"{'compiled us':>13}{'re.search us':>14}"
+    )
+    errors = []
+    for name, (process, compiled, string, mismatches) in results.items():
+        print(
+            f"{name:<34}{process * 1e6:>12.2f}"
+            f"{compiled * 1e6:>13.2f}{string * 1e6:>14.2f}"
+        )
+        errors.extend(mismatches)
+        if compiled > string * (1 + args.tolerance):
+            errors.append(
+                f"{name}: the compiled match takes {compiled * 1e6:.2f} us "
+                f"per email, {string * 1e6:.2f} us with re.search"
+            )
+
+    if errors:
+        for error in errors[:20]:
+            print(error)
+        sys.exit(1)
@@ -1,3 +1,17 @@
+import os
+
+from dotenv import load_dotenv
+
+# Check if the file exists
+if os.path.exists("expenses/.env"):
+    load_dotenv(dotenv_path="expenses/.env")
+
+# Emails to obtain the transactions from
+EMAILS_FROM_ = [
+    "alertasynotificaciones@notificacionesbancolombia.com",
+    "alertasynotificaciones@bancolombia.com.co",
+]
+
 TRANSACTION_MESSAGES_TYPES_ = [
     "Bancolombia le informa",
     "Bancolombia te informa",
@@ -40,3 +54,21 @@ TRANSACTION_TYPES_ = {
         "implemented": True,
     },
 }
+
+
+# Rates to convert the amounts to COP, by currency. The amounts with two
+# decimals after a comma, e.g. "57,00", are assumed to be in USD. The
+# defaults can be overridden as a comma separated list of currency:rate,
+# e.g. FX_RATES=USD:3900.
+FX_RATES_ = {
+    "COP": 1.0,
+    "USD": 4000.0,
+    **{
+        currency.strip().upper(): float(rate)
+        for currency, _, rate in (
+            item.partition(":")
+            for item in os.getenv("FX_RATES", "").split(",")
+            if item.strip()
+        )
+    },
+}
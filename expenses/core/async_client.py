@@ -0,0 +1,265 @@
+import asyncio
+import datetime
+import imaplib
+import weakref
+from contextlib import asynccontextmanager
+from email.message import Message
+from typing import AsyncIterator, List, Literal, Optional, Tuple, Union
+
+from expenses.core.client import FETCH_BATCH_SIZE_, FETCH_MODE_, GmailClient
+from expenses.core.dataclasses import MailboxState
+from expenses.core.executor import BoundedExecutor
+from expenses.core.imap_pool import IMAP_EXECUTOR_, IMAP_POOL_
+from expenses.core.pool import ConnectionPool
+
+# Sentinel to identify the end of the synchronous iterators
+_END = object()
+
+# The semaphores that limit the sessions of every executor. An
+# asyncio.Semaphore is bound to the event loop that uses it, so there is one
+# per loop, created inside it.
+_SESSIONS = weakref.WeakKeyDictionary()
+
+
+def get_sessions(executor: BoundedExecutor) -> asyncio.Semaphore:
+    """
+    This function returns the semaphore that limits the sessions of an
+    executor that hold an IMAP connection at once in the running event loop.
+    It has as many permits as threads has the executor.
+
+    Parameters
+    ----------
+    executor : BoundedExecutor
+        The executor of the round trips of the sessions.
+
+    Returns
+    -------
+    asyncio.Semaphore
+        The semaphore of the sessions.
+    """
+    semaphores = _SESSIONS.setdefault(asyncio.get_running_loop(), {})
+    if executor not in semaphores:
+        semaphores[executor] = asyncio.Semaphore(executor.max_workers)
+    return semaphores[executor]
+
+
+class AsyncGmailClient:
+    """
+    This class is the asyncio version of the GmailClient. It has the same
+    search, fetch and parse contract, but every round trip to the IMAP
+    server runs in a thread of the executor, so the event loop keeps serving
+    other requests while the emails are downloaded. The emails are
+    delivered as asynchronous iterators.
+
+    The sessions that hold a connection are limited by a semaphore with as
+    many permits as threads has the executor, shared by all the clients of
+    the executor in the event loop. See get_sessions. Every session runs one
+    round trip at a time, so a session that holds a connection never waits
+    for a thread held by a session that waits for a connection.
+    """
+
+    def __init__(
+        self,
+        email,
+        fetch_mode: Literal["full", "partial"] = FETCH_MODE_,
+        pool: ConnectionPool[imaplib.IMAP4] = IMAP_POOL_,
+        executor: BoundedExecutor = IMAP_EXECUTOR_,
+        sessions: Optional[asyncio.Semaphore] = None,
+    ):
+        self._email = email
+        self.fetch_mode = fetch_mode
+        self._pool = pool
+        self._executor = executor
+        self._sessions = sessions
+
+    @property
+    def executor(self) -> BoundedExecutor:
+        """
+        This property is the executor of the round trips of the client.
+        """
+        return self._executor
+
+    @asynccontextmanager
+    async def _borrow_client(self) -> AsyncIterator[GmailClient]:
+        """
+        This function borrows a connection from the pool without blocking
+        the event loop and wraps it in a GmailClient. It waits first for a
+        free session of the executor.
+
+        Yields
+        ------
+        GmailClient
+            The client that uses the borrowed connection.
+        """
+        sessions = self._sessions or get_sessions(self._executor)
+        async with sessions:
+            context = self._pool.connection()
+            conn = await self._executor.run(context.__enter__)
+            try:
+                yield GmailClient(
+                    self._email, fetch_mode=self.fetch_mode, conn=conn
+                )
+            except BaseException as e:
+                if not await self._executor.run(
+                    context.__exit__, type(e), e, e.__traceback__
+                ):
+                    raise
+            else:
+                await self._executor.run(context.__exit__, None, None, None)
+
+    async def _iterate_in_thread(self, iterator):
+        """
+        This function consumes a blocking iterator in the threads of the
+        executor.
+
+        Parameters
+        ----------
+        iterator : Iterator
+            The blocking iterator.
+
+        Yields
+        ------
+        Any
+            The items of the iterator.
+        """
+        while True:
+            item = await self._executor.run(next, iterator, _END)
+            if item is _END:
+                return
+            yield item
+
+    async def iter_emails(
+        self,
+        email_from: Union[str, List[str]],
+        most_recents_first: True,
+        limit: int = None,
+        date_to_search: Optional[datetime.datetime] = None,
+        batch_size: int = FETCH_BATCH_SIZE_,
+    ) -> AsyncIterator[Message]:
+        """
+        This function obtains the emails from the specified email addresses
+        and yields them as soon as every batch is downloaded.
+
+        Parameters
+        ----------
+        email_from : Union[str, List[str]]
+            The email address or addresses to obtain the emails from.
+
+        most_recents_first: bool
+            If True, obtain the most recent email. If False, obtain the
+            messages from the beginning.
+
+        limit: int, optional
+            The maximum number of emails to obtain. If None, obtain all the
+            emails.
+
+        date: datetime.datetime, optional
+            The date to obtain the emails from.
+
+        batch_size: int, optional
+            The number of emails requested in every FETCH command.
+
+        Yields
+        ------
+        Message
+            The emails from the specified email addresses.
+        """
+        async with self._borrow_client() as client:
+            async for message in self._iterate_in_thread(
+                client.iter_emails(
+                    email_from,
+                    most_recents_first,
+                    limit=limit,
+                    date_to_search=date_to_search,
+                    batch_size=batch_size,
+                )
+            ):
+                yield message
+
+    async def sync_emails(
+        self,
+        email_from: Union[str, List[str]],
+        state: Optional[MailboxState] = None,
+        date_to_search: Optional[datetime.datetime] = None,
+        batch_size: int = FETCH_BATCH_SIZE_,
+    ) -> AsyncIterator[Tuple[Message, MailboxState]]:
+        """
+        This function obtains only the emails that arrived after the last
+        synchronization of the specified email addresses. See
+        GmailClient.sync_emails.
+
+        Parameters
+        ----------
+        email_from : Union[str, List[str]]
+            The email address or addresses to obtain the emails from.
+
+        state: MailboxState, optional
+            The state of the last synchronization.
+
+        date_to_search: datetime.datetime, optional
+            The date to obtain the emails from in a full resynchronization.
+
+        batch_size: int, optional
+            The number of emails requested in every FETCH command.
+
+        Yields
+        ------
+        Tuple[Message, MailboxState]
+            The email and the state of the synchronization after it.
+        """
+        async with self._borrow_client() as client:
+            async for item in self._iterate_in_thread(
+                client.sync_emails(
+                    email_from,
+                    state=state,
+                    date_to_search=date_to_search,
+                    batch_size=batch_size,
+                )
+            ):
+                yield item
+
+    async def obtain_emails(
+        self,
+        email_from: Union[str, List[str]],
+        most_recents_first: True,
+        limit: int = None,
+        date_to_search: Optional[datetime.datetime] = None,
+        batch_size: int = FETCH_BATCH_SIZE_,
+    ) -> List[Message]:
+        """
+        This function obtains the emails from the specified email addresses.
+
+        Parameters
+        ----------
+        email_from : Union[str, List[str]]
+            The email address or addresses to obtain the emails from.
+
+        most_recents_first: bool
+            If True, obtain the most recent email. If False, obtain the
+            messages from the beginning.
+
+        limit: int, optional
+            The maximum number of emails to obtain. If None, obtain all the
+            emails.
+
+        date: datetime.datetime, optional
+            The date to obtain the emails from.
+
+        batch_size: int, optional
+            The number of emails requested in every FETCH command.
+
+        Returns
+        -------
+        List[Message]
+            The emails from the specified email addresses.
+        """
+        return [
+            message
+            async for message in self.iter_emails(
+                email_from,
+                most_recents_first,
+                limit=limit,
+                date_to_search=date_to_search,
+                batch_size=batch_size,
+            )
+        ]
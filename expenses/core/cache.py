@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+Value = TypeVar("Value")
+
+
+class TTLCache(Generic[Value]):
+    """
+    This class is a bounded, thread-safe cache whose entries expire after a
+    time to live.
+
+    Every entry can have its own time to live, default_ttl otherwise. When
+    the cache is full the least recently used entry is evicted. All the
+    entries are dropped with invalidate, e.g. when the data they were
+    computed from changes. A value computed before an invalidation is not
+    stored if the generation read before computing it is passed to set.
+    """
+
+    def __init__(self, max_size: int = 256, default_ttl: float = 60):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+
+        # The entries, from the least to the most recently used, with the
+        # time they expire
+        self._entries: OrderedDict = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._hits = 0
+        self._misses = 0
+        self._expirations = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @property
+    def generation(self) -> int:
+        """
+        This property is the number of invalidations of the cache. It is
+        read before computing a value and passed to set.
+        """
+        with self._lock:
+            return self._generation
+
+    def get(self, key: Hashable) -> Optional[Value]:
+        """
+        This function returns the value of a key if it has not expired.
+
+        Parameters
+        ----------
+        key : Hashable
+            The key of the value.
+
+        Returns
+        -------
+        Optional[Value]
+            The value. None if the key is not cached or has expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry: Optional[Tuple[Value, float]] = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            value, expires = entry
+            if now >= expires:
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Value,
+        ttl: Optional[float] = None,
+        generation: Optional[int] = None,
+    ) -> None:
+        """
+        This function stores the value of a key.
+
+        Parameters
+        ----------
+        key : Hashable
+            The key of the value.
+        value : Value
+            The value to store.
+        ttl : float, optional
+            The seconds the value is valid. default_ttl if None.
+        generation : int, optional
+            The generation read before computing the value. The value is
+            not stored if the cache was invalidated since then.
+        """
+        expires = time.monotonic() + (
+            self.default_ttl if ttl is None else ttl
+        )
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self) -> None:
+        """
+        This function drops all the entries of the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self._invalidations += 1
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        This function returns the metrics of the cache.
+
+        Returns
+        -------
+        Dict[str, float]
+            The size of the cache, the hits, misses, expirations, evictions
+            and invalidations, and the ratio of hits.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "expirations": self._expirations,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+            }
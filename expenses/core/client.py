@@ -2,15 +2,47 @@ import datetime
 import email
 import imaplib
 import os
+import re
+from collections import defaultdict
 from email.message import Message
-from typing import List, Optional
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from dotenv import load_dotenv
 
+from expenses.core.dataclasses import MailboxState
+from expenses.core.email_store import EMAIL_STORE_, EmailStore
+from expenses.core.imap_parser import (
+    build_partial_message,
+    find_html_part,
+    parse_fetch_response,
+)
+
 # Check if the file exists
 if os.path.exists("expenses/.env"):
     load_dotenv(dotenv_path="expenses/.env")
 
+# Number of messages requested in every FETCH command
+FETCH_BATCH_SIZE_ = int(os.getenv("IMAP_FETCH_BATCH_SIZE", 200))
+
+# How the emails are downloaded. "partial" only downloads the headers and
+# the html part of every email, "full" downloads the whole RFC822 message.
+FETCH_MODE_ = os.getenv("IMAP_FETCH_MODE", "partial")
+
+# Headers downloaded in the partial fetch mode
+PARTIAL_FETCH_HEADERS_ = "HEADER.FIELDS (DATE FROM MESSAGE-ID)"
+
+# Regex to obtain the UID from the header of a FETCH response
+FETCH_RESPONSE_UID_ = re.compile(rb"UID (?P<uid>\d+)")
+
 
 class GmailClient:
     """
@@ -18,9 +50,21 @@ class GmailClient:
     It allows to obtain the emails from the specified email address.
     """
 
-    def __init__(self, email):
+    def __init__(
+        self,
+        email,
+        fetch_mode: Literal["full", "partial"] = FETCH_MODE_,
+        conn: Optional[imaplib.IMAP4] = None,
+        store: Optional[EmailStore] = EMAIL_STORE_,
+    ):
         self._email = email
-        self.conn = None
+        self.fetch_mode = fetch_mode
+        # The connection can be borrowed from a pool. Otherwise, it is
+        # created on the first request.
+        self.conn = conn
+        # The emails are read from the store before downloading them
+        self.store = store
+        self.uidvalidity: Optional[int] = None
 
     def _connect(self, token: str) -> None:
         """
@@ -42,20 +86,65 @@ class GmailClient:
         except imaplib.IMAP4.error as e:
             print(f"Error connecting to IMAP server: {e}")
 
+    def _select_inbox(self) -> int:
+        """
+        This function selects the inbox and stores its UIDVALIDITY. The
+        inbox is selected only once per client.
+
+        Returns
+        -------
+        int
+            The UIDVALIDITY of the inbox.
+        """
+        if self.uidvalidity is not None:
+            return self.uidvalidity
+
+        if self.conn is None:
+            self._connect(os.getenv("GMAIL_TOKEN"))
+
+        self.conn.select("Inbox")
+        _, uidvalidity = self.conn.response("UIDVALIDITY")
+        self.uidvalidity = int(uidvalidity[0])
+
+        return self.uidvalidity
+
+    @staticmethod
+    def _build_from_query(email_from: Union[str, List[str]]) -> str:
+        """
+        This function builds the search criteria for one or several senders.
+        Several senders are combined with the prefix OR operator, so the
+        senders [a, b, c] are searched as OR OR FROM "a" FROM "b" FROM "c".
+
+        Parameters
+        ----------
+        email_from : Union[str, List[str]]
+            The email address or addresses of the senders.
+
+        Returns
+        -------
+        str
+            The search criteria.
+        """
+        senders = [email_from] if isinstance(email_from, str) else email_from
+        return "OR " * (len(senders) - 1) + " ".join(
+            f'FROM "{sender}"' for sender in senders
+        )
+
     def _obtain_emails_ids(
         self,
-        email_from: str,
+        email_from: Union[str, List[str]],
         most_recents_first: True,
         date_to_search: Optional[datetime.datetime] = None,
+        min_uid: Optional[int] = None,
     ) -> List[str]:
         """
-        This function obtains the ids of the emails from the specified email
-        address.
+        This function obtains the UIDs of the emails from the specified email
+        addresses, with a single search for all of them.
 
         Parameters
         ----------
-        email_from : str
-            The email address to obtain the emails from.
+        email_from : Union[str, List[str]]
+            The email address or addresses to obtain the emails from.
 
         most_recents_first: bool
             If True, obtain the most recent email. If False, obtain the
@@ -66,16 +155,18 @@ class GmailClient:
             If None, obtain all the emails. The function receives a datetime
             object, but it only uses the date part.
 
+        min_uid: int, optional
+            The minimum UID of the emails to obtain. If None, the UIDs are
+            not filtered.
+
         Returns
         -------
         List[str]
-            The ids of the emails from the specified email address.
+            The UIDs of the emails from the specified email address.
         """
-        if self.conn is None:
-            self._connect(os.getenv("GMAIL_TOKEN"))
-
-        self.conn.select("Inbox")
-        query_search = f'(FROM "{email_from}")'
+        self._select_inbox()
+        query_from = self._build_from_query(email_from)
+        query_search = f"({query_from})"
 
         # Check if the date is not None and is a datetime object
         if date_to_search is not None and isinstance(
@@ -83,35 +174,278 @@ class GmailClient:
         ):
             # Format the date to the format that Gmail uses
             date_to_search = date_to_search.strftime("%d-%b-%Y")
-            query_search = (
-                f'(FROM "{email_from}") (SINCE "{date_to_search}")'
-            )
+            query_search = f'({query_from}) (SINCE "{date_to_search}")'
+
+        if min_uid is not None:
+            query_search = f"{query_search} (UID {min_uid}:*)"
 
-        _, msgs_ids = self.conn.search(None, query_search)
+        _, msgs_ids = self.conn.uid("SEARCH", None, query_search)
 
         # The msgs ids are returned as a list of bytes, so we need to decode
         # them to strings
         msgs_ids = [msg_id.decode("utf-8") for msg_id in msgs_ids[0].split()]
 
+        # The range "n:*" always contains the last message of the inbox,
+        # even if its UID is lower than n.
+        if min_uid is not None:
+            msgs_ids = [
+                msg_id for msg_id in msgs_ids if int(msg_id) >= min_uid
+            ]
+
         if most_recents_first:
             msgs_ids.reverse()
 
         return msgs_ids
 
-    def obtain_emails(
+    @staticmethod
+    def _build_message_set(msgs_ids: List[str]) -> str:
+        """
+        This function builds the IMAP message set for a list of UIDs. The
+        consecutive UIDs are compressed as ranges, so the UIDs
+        ["1", "2", "3", "7"] are requested as "1:3,7".
+
+        Parameters
+        ----------
+        msgs_ids : List[str]
+            The UIDs of the emails.
+
+        Returns
+        -------
+        str
+            The message set to use in the FETCH command.
+        """
+        ids = sorted(int(msg_id) for msg_id in msgs_ids)
+        ranges = []
+        start = end = ids[0]
+        for msg_id in ids[1:]:
+            if msg_id == end + 1:
+                end = msg_id
+                continue
+            ranges.append(f"{start}:{end}" if start != end else f"{start}")
+            start = end = msg_id
+        ranges.append(f"{start}:{end}" if start != end else f"{start}")
+
+        return ",".join(ranges)
+
+    def _fetch_in_batches(
+        self, msgs_ids: List[str], batch_size: int
+    ) -> Iterator[Tuple[str, Message]]:
+        """
+        This function fetches the emails in batches of UIDs, so a single
+        round trip to the server is made for every batch instead of one for
+        every email. The emails already in the store are not downloaded.
+        The emails are yielded in the same order of the UIDs, skipping the
+        ones whose Message-ID was already yielded.
+
+        Parameters
+        ----------
+        msgs_ids : List[str]
+            The UIDs of the emails to fetch.
+
+        batch_size : int
+            The number of emails requested in every FETCH command.
+
+        Yields
+        ------
+        Tuple[str, Message]
+            The UID and the email, as soon as the batch that contains them
+            arrives.
+        """
+        fetch_batch = (
+            self._fetch_partial_batch
+            if self.fetch_mode == "partial"
+            else self._fetch_full_batch
+        )
+        seen_message_ids = set()
+        for start in range(0, len(msgs_ids), batch_size):
+            end = start + batch_size
+            batch_ids = msgs_ids[start:end]
+            messages = self._read_from_store(batch_ids)
+
+            # Download only the emails that are not in the store
+            missing_ids = [
+                msg_id for msg_id in batch_ids if msg_id not in messages
+            ]
+            if missing_ids:
+                downloaded = fetch_batch(missing_ids)
+                self._save_in_store(downloaded)
+                messages.update(downloaded)
+
+            # The server returns the messages in its own order, so they
+            # are indexed by UID to yield them in the requested order.
+            for message_id in batch_ids:
+                if message_id not in messages:
+                    continue
+
+                header_message_id = messages[message_id]["Message-ID"]
+                if header_message_id in seen_message_ids:
+                    continue
+                if header_message_id is not None:
+                    seen_message_ids.add(header_message_id)
+
+                yield message_id, messages[message_id]
+
+    def _read_from_store(self, msgs_ids: List[str]) -> Dict[str, Message]:
+        """
+        This function reads the emails that are already in the store.
+
+        Parameters
+        ----------
+        msgs_ids : List[str]
+            The UIDs of the emails.
+
+        Returns
+        -------
+        Dict[str, Message]
+            The emails found in the store, indexed by UID.
+        """
+        if self.store is None or self.uidvalidity is None:
+            return {}
+
+        messages = {}
+        for msg_id in msgs_ids:
+            message = self.store.get(self.uidvalidity, msg_id)
+            if message is not None:
+                messages[msg_id] = message
+
+        return messages
+
+    def _save_in_store(self, messages: Dict[str, Message]) -> None:
+        """
+        This function saves the downloaded emails in the store.
+
+        Parameters
+        ----------
+        messages : Dict[str, Message]
+            The emails indexed by UID.
+        """
+        if self.store is None or self.uidvalidity is None:
+            return
+
+        for msg_id, message in messages.items():
+            self.store.put(self.uidvalidity, msg_id, message)
+
+    def _fetch_full_batch(self, msgs_ids: List[str]) -> Dict[str, Message]:
+        """
+        This function downloads the whole RFC822 message of every email in
+        a single FETCH command.
+
+        Parameters
+        ----------
+        msgs_ids : List[str]
+            The UIDs of the emails to fetch.
+
+        Returns
+        -------
+        Dict[str, Message]
+            The emails indexed by UID.
+        """
+        _, message_response = self.conn.uid(
+            "FETCH", self._build_message_set(msgs_ids), "(UID RFC822)"
+        )
+
+        messages = {}
+        for response in message_response:
+            if isinstance(response, tuple):
+                match = FETCH_RESPONSE_UID_.search(response[0])
+                if match:
+                    messages[
+                        match.group("uid").decode("utf-8")
+                    ] = email.message_from_bytes(response[1])
+
+        return messages
+
+    def _fetch_partial_batch(
+        self, msgs_ids: List[str]
+    ) -> Dict[str, Message]:
+        """
+        This function downloads only the headers and the html part of every
+        email. First, the BODYSTRUCTURE of the batch is requested to find the
+        section of the html part. Then, the emails are requested grouped by
+        that section, which is usually the same for all of them.
+
+        The emails without a html part are downloaded completely.
+
+        Parameters
+        ----------
+        msgs_ids : List[str]
+            The UIDs of the emails to fetch.
+
+        Returns
+        -------
+        Dict[str, Message]
+            The emails indexed by UID. The emails only contain the headers
+            and the html part.
+        """
+        _, structure_response = self.conn.uid(
+            "FETCH", self._build_message_set(msgs_ids), "(UID BODYSTRUCTURE)"
+        )
+
+        # Group the emails by their html part
+        html_parts = {}
+        ids_by_section = defaultdict(list)
+        for items in parse_fetch_response(structure_response):
+            html_part = (
+                find_html_part(items["BODYSTRUCTURE"])
+                if isinstance(items.get("BODYSTRUCTURE"), list)
+                else None
+            )
+            if "UID" in items and html_part is not None:
+                html_parts[items["UID"]] = html_part
+                ids_by_section[html_part.section].append(items["UID"])
+
+        messages = {}
+        for section, section_ids in ids_by_section.items():
+            _, message_response = self.conn.uid(
+                "FETCH",
+                self._build_message_set(section_ids),
+                f"(UID BODY.PEEK[{PARTIAL_FETCH_HEADERS_}] "
+                f"BODY.PEEK[{section}])",
+            )
+            for items in parse_fetch_response(message_response):
+                headers = next(
+                    (
+                        value
+                        for key, value in items.items()
+                        if key.startswith("BODY[HEADER")
+                    ),
+                    None,
+                )
+                html = items.get(f"BODY[{section}]")
+                if items.get("UID") in html_parts and None not in (
+                    headers,
+                    html,
+                ):
+                    messages[items["UID"]] = build_partial_message(
+                        headers, html, html_parts[items["UID"]]
+                    )
+
+        # Download completely the emails that could not be built
+        missing_ids = [
+            msg_id for msg_id in msgs_ids if msg_id not in messages
+        ]
+        if missing_ids:
+            messages.update(self._fetch_full_batch(missing_ids))
+
+        return messages
+
+    def iter_emails(
         self,
-        email_from: str,
+        email_from: Union[str, List[str]],
         most_recents_first: True,
         limit: int = None,
         date_to_search: Optional[datetime.datetime] = None,
-    ) -> List[Message]:
+        batch_size: int = FETCH_BATCH_SIZE_,
+    ) -> Iterator[Message]:
         """
-        This function obtains the emails from the specified email address.
+        This function obtains the emails from the specified email addresses
+        and yields them as soon as every batch is downloaded. The emails of
+        all the addresses are merged in arrival order.
 
         Parameters
         ----------
-        email_from : str
-            The email address to obtain the emails from.
+        email_from : Union[str, List[str]]
+            The email address or addresses to obtain the emails from.
 
         most_recents_first: bool
             If True, obtain the most recent email. If False, obtain the
@@ -124,9 +458,12 @@ class GmailClient:
         date: datetime.datetime, optional
             The date to obtain the emails from.
 
-        Returns
-        -------
-        List[Message]
+        batch_size: int, optional
+            The number of emails requested in every FETCH command.
+
+        Yields
+        ------
+        Message
             The emails from the specified email address.
         """
         if self.conn is None:
@@ -138,13 +475,113 @@ class GmailClient:
         )
         limit = len(msgs_ids) if limit is None else limit
 
-        messages = []
-        # Loop over the ids of the emails and obtain the messages
-        for message_id in msgs_ids[:limit]:
-            _, message_response = self.conn.fetch(message_id, "(RFC822)")
-            for response in message_response:
-                if isinstance(response, tuple):
-                    msg = email.message_from_bytes(response[1])
-                    messages.append(msg)
+        for _, message in self._fetch_in_batches(
+            msgs_ids[:limit], batch_size
+        ):
+            yield message
 
-        return messages
+    def sync_emails(
+        self,
+        email_from: Union[str, List[str]],
+        state: Optional[MailboxState] = None,
+        date_to_search: Optional[datetime.datetime] = None,
+        batch_size: int = FETCH_BATCH_SIZE_,
+        on_search: Optional[Callable[[int], None]] = None,
+    ) -> Iterator[Tuple[Message, MailboxState]]:
+        """
+        This function obtains only the emails that arrived after the last
+        synchronization of the specified email addresses. If there is no
+        previous state or the UIDVALIDITY of the inbox changed, a full
+        resynchronization from date_to_search is made.
+
+        The emails are obtained from the oldest to the most recent, so the
+        state yielded with every email can be persisted as a checkpoint.
+
+        Parameters
+        ----------
+        email_from : Union[str, List[str]]
+            The email address or addresses to obtain the emails from.
+
+        state: MailboxState, optional
+            The state of the last synchronization.
+
+        date_to_search: datetime.datetime, optional
+            The date to obtain the emails from in a full resynchronization.
+
+        batch_size: int, optional
+            The number of emails requested in every FETCH command.
+
+        on_search: Callable[[int], None], optional
+            The function called with the number of emails found by the
+            search, before they are downloaded, e.g. to report progress.
+
+        Yields
+        ------
+        Tuple[Message, MailboxState]
+            The email and the state of the synchronization after it.
+        """
+        uidvalidity = self._select_inbox()
+
+        if state is None or state.uidvalidity != uidvalidity:
+            msgs_ids = self._obtain_emails_ids(
+                email_from, False, date_to_search
+            )
+        else:
+            msgs_ids = self._obtain_emails_ids(
+                email_from, False, min_uid=state.last_uid + 1
+            )
+
+        if on_search is not None:
+            on_search(len(msgs_ids))
+
+        for message_id, message in self._fetch_in_batches(
+            msgs_ids, batch_size
+        ):
+            yield message, MailboxState(
+                uidvalidity=uidvalidity, last_uid=int(message_id)
+            )
+
+    def obtain_emails(
+        self,
+        email_from: Union[str, List[str]],
+        most_recents_first: True,
+        limit: int = None,
+        date_to_search: Optional[datetime.datetime] = None,
+        batch_size: int = FETCH_BATCH_SIZE_,
+    ) -> List[Message]:
+        """
+        This function obtains the emails from the specified email addresses.
+
+        Parameters
+        ----------
+        email_from : Union[str, List[str]]
+            The email address or addresses to obtain the emails from.
+
+        most_recents_first: bool
+            If True, obtain the most recent email. If False, obtain the
+            messages from the beginning.
+
+        limit: int, optional
+            The maximum number of emails to obtain. If None, obtain all the
+            emails.
+
+        date: datetime.datetime, optional
+            The date to obtain the emails from.
+
+        batch_size: int, optional
+            The number of emails requested in every FETCH command.
+
+        Returns
+        -------
+        List[Message]
+            The emails from the specified email address.
+        """
+        return list(
+            self.iter_emails(
+                email_from,
+                most_recents_first,
+                limit=limit,
+                date_to_search=date_to_search,
+                batch_size=batch_size,
+            )
+        )
@@ -0,0 +1,25 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class MailboxState:
+    """
+    This class represents the synchronization state of a sender in the
+    mailbox. The UIDs are only valid while the UIDVALIDITY of the mailbox
+    does not change.
+    """
+
+    uidvalidity: int
+    last_uid: int
+
+
+@dataclass
+class HtmlPart:
+    """
+    This class represents the html part of an email, as described by its
+    BODYSTRUCTURE.
+    """
+
+    section: str
+    encoding: str
+    charset: str
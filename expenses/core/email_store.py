@@ -0,0 +1,162 @@
+import email
+import gzip
+import os
+import tempfile
+from email.message import Message
+from typing import Iterator, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Check if the file exists
+if os.path.exists("expenses/.env"):
+    load_dotenv(dotenv_path="expenses/.env")
+
+
+class EmailStore:
+    """
+    This class is a local store of the raw emails downloaded from the IMAP
+    server. Every email is saved compressed in its own file, keyed by the
+    UIDVALIDITY of the inbox and its UID:
+
+        <root>/<uidvalidity>/<uid>.eml.gz
+
+    Since a UID is never reused while the UIDVALIDITY does not change, the
+    content of a key never changes and the emails can be read from the
+    store instead of downloading them again. When the UIDVALIDITY changes
+    the emails are saved again under the new one, so the reads of the whole
+    store skip the emails whose Message-ID was already read.
+
+    The emails are bank alerts saved unencrypted, so the store must live in
+    a private directory outside of version control.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, uidvalidity: int, uid: str) -> str:
+        """
+        This function returns the path of an email in the store.
+
+        Parameters
+        ----------
+        uidvalidity : int
+            The UIDVALIDITY of the inbox.
+        uid : str
+            The UID of the email.
+
+        Returns
+        -------
+        str
+            The path of the email.
+        """
+        return os.path.join(self.root, str(uidvalidity), f"{uid}.eml.gz")
+
+    def __contains__(self, key: Tuple[int, str]) -> bool:
+        return os.path.exists(self._path(*key))
+
+    def get(self, uidvalidity: int, uid: str) -> Optional[Message]:
+        """
+        This function reads an email from the store.
+
+        Parameters
+        ----------
+        uidvalidity : int
+            The UIDVALIDITY of the inbox.
+        uid : str
+            The UID of the email.
+
+        Returns
+        -------
+        Optional[Message]
+            The email. None if it is not in the store.
+        """
+        try:
+            with gzip.open(self._path(uidvalidity, uid), "rb") as file:
+                return email.message_from_bytes(file.read())
+        except (FileNotFoundError, EOFError, gzip.BadGzipFile):
+            return None
+
+    def put(self, uidvalidity: int, uid: str, message: Message) -> None:
+        """
+        This function saves an email in the store. The file is written
+        atomically, so a partial write is never read as an email.
+
+        Parameters
+        ----------
+        uidvalidity : int
+            The UIDVALIDITY of the inbox.
+        uid : str
+            The UID of the email.
+        message : Message
+            The email.
+        """
+        path = self._path(uidvalidity, uid)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        file_descriptor, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), suffix=".tmp"
+        )
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                file.write(gzip.compress(message.as_bytes()))
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def iter_keys(self) -> Iterator[Tuple[int, str]]:
+        """
+        This function lists the keys of the store, ordered by UIDVALIDITY
+        and UID, i.e. in arrival order.
+
+        Yields
+        ------
+        Tuple[int, str]
+            The UIDVALIDITY and the UID of every email.
+        """
+        if not os.path.isdir(self.root):
+            return
+
+        for uidvalidity in sorted(
+            (name for name in os.listdir(self.root) if name.isdigit()),
+            key=int,
+        ):
+            uids = [
+                name.removesuffix(".eml.gz")
+                for name in os.listdir(os.path.join(self.root, uidvalidity))
+                if name.endswith(".eml.gz")
+            ]
+            for uid in sorted(uids, key=int):
+                yield int(uidvalidity), uid
+
+    def iter_messages(self) -> Iterator[Message]:
+        """
+        This function reads all the emails of the store in arrival order.
+        An email saved under several UIDVALIDITY values is only read once,
+        by its Message-ID.
+
+        Yields
+        ------
+        Message
+            The emails of the store.
+        """
+        seen_message_ids = set()
+        for uidvalidity, uid in self.iter_keys():
+            message = self.get(uidvalidity, uid)
+            if message is None:
+                continue
+
+            message_id = message["Message-ID"]
+            if message_id is not None:
+                message_id = message_id.strip()
+                if message_id in seen_message_ids:
+                    continue
+                seen_message_ids.add(message_id)
+            yield message
+
+
+# Process-wide store of the downloaded emails, in the directory of
+# EMAIL_STORE_PATH. It is disabled unless EMAIL_STORE_PATH is set, since it
+# holds the bank alerts unencrypted.
+EMAIL_STORE_PATH_ = os.getenv("EMAIL_STORE_PATH", "")
+EMAIL_STORE_ = EmailStore(EMAIL_STORE_PATH_) if EMAIL_STORE_PATH_ else None
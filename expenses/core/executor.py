@@ -0,0 +1,171 @@
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
+
+Result = TypeVar("Result")
+
+
+class BoundedExecutor:
+    """
+    This class runs blocking functions, e.g. the queries of a database
+    driver, in a dedicated pool of max_workers threads, so the event loop
+    keeps serving other requests while they run. At most max_workers
+    functions run at once and the rest wait in the queue of the pool. The
+    time every function waits in the queue and runs is measured.
+    """
+
+    def __init__(self, max_workers: int, name: str):
+        self.max_workers = max_workers
+        self.name = name
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._queued = 0
+        self._max_queued = 0
+        self._active = 0
+        self._submitted = 0
+        self._started = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_queue_wait = 0.0
+        self._max_queue_wait = 0.0
+        self._total_run_time = 0.0
+        self._max_run_time = 0.0
+
+    def _call(
+        self, function: Callable[[], Result], submitted: float
+    ) -> Result:
+        """
+        This function runs a function in a thread of the pool and records
+        how long it waited in the queue and how long it ran.
+
+        Parameters
+        ----------
+        function : Callable[[], Result]
+            The function to run.
+        submitted : float
+            The time the function was submitted.
+
+        Returns
+        -------
+        Result
+            The result of the function.
+        """
+        start = time.monotonic()
+        wait = start - submitted
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+            self._started += 1
+            self._total_queue_wait += wait
+            self._max_queue_wait = max(self._max_queue_wait, wait)
+
+        failed = False
+        try:
+            return function()
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            run_time = time.monotonic() - start
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+                self._failed += failed
+                self._total_run_time += run_time
+                self._max_run_time = max(self._max_run_time, run_time)
+
+    async def run(
+        self, function: Callable[..., Result], *args: Any, **kwargs: Any
+    ) -> Result:
+        """
+        This function runs a blocking function in the pool without blocking
+        the event loop.
+
+        Parameters
+        ----------
+        function : Callable[..., Result]
+            The blocking function.
+        *args : Any
+            The positional arguments of the function.
+        **kwargs : Any
+            The keyword arguments of the function.
+
+        Returns
+        -------
+        Result
+            The result of the function.
+        """
+        with self._lock:
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+            self._submitted += 1
+        try:
+            future = self._executor.submit(
+                self._call,
+                functools.partial(function, *args, **kwargs),
+                time.monotonic(),
+            )
+        except BaseException:
+            self._discard_queued()
+            raise
+
+        # The functions cancelled before they start, e.g. by shutdown or
+        # by the cancellation of the caller, never reach _call
+        future.add_done_callback(
+            lambda future: future.cancelled() and self._discard_queued()
+        )
+        return await asyncio.wrap_future(future)
+
+    def _discard_queued(self) -> None:
+        """
+        This function removes from the queue a function that will never
+        run.
+        """
+        with self._lock:
+            self._queued -= 1
+
+    def shutdown(self) -> None:
+        """
+        This function waits for the running functions and stops the
+        threads of the pool. The queued functions are cancelled and leave
+        the queue.
+        """
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        This function returns the metrics of the executor.
+
+        Returns
+        -------
+        Dict[str, float]
+            The number of threads, the functions queued, the most ever
+            queued at once, running, submitted, completed and failed, and
+            the average and maximum seconds they waited in the queue and
+            ran.
+        """
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self._queued,
+                "max_queued": self._max_queued,
+                "active": self._active,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "avg_queue_wait": self._total_queue_wait / self._started
+                if self._started
+                else 0.0,
+                "max_queue_wait": self._max_queue_wait,
+                "avg_run_time": self._total_run_time / self._completed
+                if self._completed
+                else 0.0,
+                "max_run_time": self._max_run_time,
+            }
@@ -0,0 +1,232 @@
+import os
+from html.parser import HTMLParser
+from typing import Callable, Dict, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from dotenv import load_dotenv
+
+# Check if the file exists
+if os.path.exists("expenses/.env"):
+    load_dotenv(dotenv_path="expenses/.env")
+
+# The transaction message is the first sentence, delimited by non-breaking
+# spaces, that starts with one of these prefixes.
+ALERT_PREFIXES_ = ("Bancolombia", "Realizaste")
+
+# Tags whose content is not part of the text of the email
+SKIPPED_TAGS_ = ("script", "style", "template")
+
+# Tags whose whitespace is kept as is
+PRESERVE_WHITESPACE_TAGS_ = ("pre", "textarea")
+
+# Characters that BeautifulSoup considers whitespace
+ASCII_SPACES_ = str.maketrans("", "", "\x20\x0a\x09\x0c\x0d")
+
+
+def _find_alert_sentence(text: str) -> Optional[str]:
+    """
+    This function finds the alert sentence in a chunk of text.
+
+    Parameters
+    ----------
+    text : str
+        The text delimited by non-breaking spaces.
+
+    Returns
+    -------
+    Optional[str]
+        The stripped text if it is an alert sentence, None otherwise.
+    """
+    text = text.strip()
+    return text if text.startswith(ALERT_PREFIXES_) else None
+
+
+def extract_with_beautiful_soup(
+    body: bytes, charset: Optional[str] = None
+) -> Optional[str]:
+    """
+    This function extracts the transaction message of the html body of an
+    email with BeautifulSoup. It is the reference implementation: all the
+    text of the email is extracted before looking for the alert sentence.
+
+    Parameters
+    ----------
+    body : bytes
+        The html body of the email.
+    charset : Optional[str], optional
+        The charset of the body. BeautifulSoup detects it by itself, so it
+        is not used.
+
+    Returns
+    -------
+    Optional[str]
+        The transaction message. None if it is not found.
+    """
+    soup = BeautifulSoup(body, "html.parser")
+    text_message = soup.get_text(separator=" ")
+
+    for val in text_message.split("\xa0"):
+        sentence = _find_alert_sentence(val)
+        if sentence is not None:
+            return sentence
+
+    return None
+
+
+class _StopParsing(Exception):
+    """
+    This exception stops the parser once the alert sentence is found.
+    """
+
+
+class _AlertSentenceParser(HTMLParser):
+    """
+    This class is a streaming html parser that joins the text of the email
+    the same way BeautifulSoup.get_text(separator=" ") does, and stops as
+    soon as a complete alert sentence is found.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.sentence: Optional[str] = None
+        self._buffer = ""
+        self._has_text = False
+        self._skip_depth = 0
+        self._preserve_depth = 0
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag in SKIPPED_TAGS_:
+            self._skip_depth += 1
+        elif tag in PRESERVE_WHITESPACE_TAGS_:
+            self._preserve_depth += 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in SKIPPED_TAGS_ and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in PRESERVE_WHITESPACE_TAGS_ and self._preserve_depth:
+            self._preserve_depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_depth:
+            return
+
+        # BeautifulSoup collapses the strings that are only whitespace
+        if not self._preserve_depth and not data.translate(ASCII_SPACES_):
+            data = "\n" if "\n" in data else " "
+
+        # The strings are joined with a space, as in get_text
+        self._buffer += f" {data}" if self._has_text else data
+        self._has_text = True
+
+        # Check every sentence that is complete, i.e. followed by a
+        # non-breaking space
+        while "\xa0" in self._buffer:
+            sentence, self._buffer = self._buffer.split("\xa0", 1)
+            self.sentence = _find_alert_sentence(sentence)
+            if self.sentence is not None:
+                raise _StopParsing
+
+    def close(self) -> None:
+        super().close()
+        # The text after the last non-breaking space is a sentence too
+        self.sentence = _find_alert_sentence(self._buffer)
+
+
+def extract_with_html_parser(
+    body: bytes, charset: Optional[str] = None
+) -> Optional[str]:
+    """
+    This function extracts the transaction message of the html body of an
+    email with the html parser of the standard library. The body is parsed
+    as a stream and the parsing stops at the first alert sentence, so most
+    of the email is never processed.
+
+    Parameters
+    ----------
+    body : bytes
+        The html body of the email.
+    charset : Optional[str], optional
+        The charset of the body. If it is unknown or wrong, the body is
+        decoded as UTF-8 or, failing that, as Latin-1.
+
+    Returns
+    -------
+    Optional[str]
+        The transaction message. None if it is not found.
+    """
+    try:
+        text = body.decode(charset or "utf-8")
+    except (LookupError, UnicodeDecodeError):
+        try:
+            text = body.decode("utf-8")
+        except UnicodeDecodeError:
+            text = body.decode("latin-1")
+
+    parser = _AlertSentenceParser()
+    try:
+        parser.feed(text)
+        parser.close()
+    except _StopParsing:
+        pass
+
+    return parser.sentence
+
+
+# Engines to extract the transaction message. The first engine that parses
+# the body decides, so BeautifulSoup is only used when the html parser
+# fails, not when the email has no alert sentence.
+HTML_EXTRACTORS_: Dict[
+    str, Callable[[bytes, Optional[str]], Optional[str]]
+] = {
+    "html_parser": extract_with_html_parser,
+    "beautiful_soup": extract_with_beautiful_soup,
+}
+
+# The engines to use, in order, configurable as a comma separated list
+HTML_EXTRACTION_ENGINES_: Tuple[str, ...] = tuple(
+    engine.strip()
+    for engine in os.getenv(
+        "HTML_EXTRACTION_ENGINES", "html_parser,beautiful_soup"
+    ).split(",")
+)
+
+
+def extract_alert_message(
+    body: bytes,
+    charset: Optional[str] = None,
+    engines: Tuple[str, ...] = HTML_EXTRACTION_ENGINES_,
+) -> Optional[str]:
+    """
+    This function extracts the transaction message of the html body of an
+    email with the first engine that parses it. The next engine is only
+    tried if one raises, so the emails without alert sentence are parsed
+    once.
+
+    Parameters
+    ----------
+    body : bytes
+        The html body of the email.
+    charset : Optional[str], optional
+        The charset of the body.
+    engines : Tuple[str, ...], optional
+        The names of the engines in HTML_EXTRACTORS_ to try.
+
+    Returns
+    -------
+    Optional[str]
+        The transaction message. None if it is not found.
+
+    Raises
+    ------
+    Exception
+        The error of the last engine, if every engine fails to parse the
+        body.
+    """
+    for index, engine in enumerate(engines):
+        try:
+            return HTML_EXTRACTORS_[engine](body, charset)
+        except Exception:
+            if index == len(engines) - 1:
+                raise
+
+    return None
@@ -0,0 +1,268 @@
+import email
+import re
+from email.message import Message
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from expenses.core.dataclasses import HtmlPart
+
+# Regex to identify the beginning of the response of a message
+FETCH_MESSAGE_START_ = re.compile(rb"^\d+ \(")
+
+# Regex to identify the literal size at the end of a response line
+FETCH_LITERAL_SIZE_ = re.compile(rb"\{\d+\}$")
+
+# Regex to split the text of a response in tokens
+FETCH_TOKENS_ = re.compile(
+    rb'\s*(?:(?P<open>\()|(?P<close>\))|"(?P<quoted>(?:[^"\\]|\\.)*)"'
+    rb"|(?P<atom>[^\s()\[\"]+(?:\[[^\]]*\][^\s()]*)?))"
+)
+
+FetchValue = Union[None, bytes, str, List["FetchValue"]]
+
+
+class _Literal:
+    """
+    This class wraps the literals of a response, so they are not tokenized
+    as text.
+    """
+
+    def __init__(self, value: bytes):
+        self.value = value
+
+
+def _split_messages(
+    response: List[Union[bytes, Tuple[bytes, bytes]]]
+) -> Iterator[List[Union[bytes, _Literal]]]:
+    """
+    This function splits the response of a FETCH command in the chunks of
+    every message. imaplib returns the literals as tuples of the line that
+    announces them and their content, and the rest of the lines as bytes.
+
+    Parameters
+    ----------
+    response : List[Union[bytes, Tuple[bytes, bytes]]]
+        The response of the FETCH command.
+
+    Yields
+    ------
+    List[Union[bytes, _Literal]]
+        The text and literal chunks of every message.
+    """
+    chunks = []
+    for item in response:
+        line = item[0] if isinstance(item, tuple) else item
+        if line is None:
+            continue
+
+        if FETCH_MESSAGE_START_.match(line) and chunks:
+            yield chunks
+            chunks = []
+
+        if isinstance(item, tuple):
+            chunks.append(FETCH_LITERAL_SIZE_.sub(b"", line))
+            chunks.append(_Literal(item[1]))
+        else:
+            chunks.append(line)
+
+    if chunks:
+        yield chunks
+
+
+def _tokenize(
+    chunks: List[Union[bytes, _Literal]]
+) -> Iterator[Union[bytes, _Literal]]:
+    """
+    This function splits the chunks of a message in tokens.
+
+    Parameters
+    ----------
+    chunks : List[Union[bytes, _Literal]]
+        The text and literal chunks of the message.
+
+    Yields
+    ------
+    Union[bytes, _Literal]
+        The tokens. The parenthesis are yielded as b"(" and b")".
+    """
+    for chunk in chunks:
+        if isinstance(chunk, _Literal):
+            yield chunk
+            continue
+
+        for match in FETCH_TOKENS_.finditer(chunk):
+            if match.group("open"):
+                yield b"("
+            elif match.group("close"):
+                yield b")"
+            elif match.group("quoted") is not None:
+                yield _Literal(
+                    re.sub(rb"\\(.)", rb"\1", match.group("quoted"))
+                )
+            elif match.group("atom"):
+                yield match.group("atom")
+
+
+def _parse_tokens(tokens: Iterator[Union[bytes, _Literal]]) -> List:
+    """
+    This function builds the nested lists of a parenthesized response.
+
+    Parameters
+    ----------
+    tokens : Iterator[Union[bytes, _Literal]]
+        The tokens of the response.
+
+    Returns
+    -------
+    List
+        The values of the response. The atoms are returned as strings, the
+        quoted strings and literals as bytes and NIL as None.
+    """
+    values = []
+    for token in tokens:
+        if isinstance(token, _Literal):
+            values.append(token.value)
+        elif token == b"(":
+            values.append(_parse_tokens(tokens))
+        elif token == b")":
+            return values
+        elif token.upper() == b"NIL":
+            values.append(None)
+        else:
+            values.append(token.decode("utf-8"))
+
+    return values
+
+
+def parse_fetch_response(
+    response: List[Union[bytes, Tuple[bytes, bytes]]]
+) -> Iterator[Dict[str, FetchValue]]:
+    """
+    This function parses the response of a FETCH command.
+
+    Parameters
+    ----------
+    response : List[Union[bytes, Tuple[bytes, bytes]]]
+        The response of the FETCH command, as returned by imaplib.
+
+    Yields
+    ------
+    Dict[str, FetchValue]
+        The data items of every message, indexed by their upper case name,
+        e.g. {"UID": "10", "BODY[1]": b"..."}.
+    """
+    for chunks in _split_messages(response):
+        values = _parse_tokens(_tokenize(chunks))
+
+        # The values are the sequence number and the list of data items
+        if len(values) < 2 or not isinstance(values[1], list):
+            continue
+
+        items = values[1]
+        yield {
+            str(items[i]).upper(): items[i + 1]
+            for i in range(0, len(items) - 1, 2)
+        }
+
+
+def _decode(value: FetchValue) -> str:
+    """
+    This function decodes a value of the BODYSTRUCTURE.
+
+    Parameters
+    ----------
+    value : FetchValue
+        The value.
+
+    Returns
+    -------
+    str
+        The value as a lower case string.
+    """
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", errors="replace")
+    return str(value).lower() if value is not None else ""
+
+
+def find_html_part(
+    bodystructure: List[FetchValue], section: str = ""
+) -> Optional[HtmlPart]:
+    """
+    This function finds the first text/html part of a BODYSTRUCTURE.
+
+    Parameters
+    ----------
+    bodystructure : List[FetchValue]
+        The parsed BODYSTRUCTURE of the message.
+    section : str, optional
+        The section of the current part, by default "" (the whole message).
+
+    Returns
+    -------
+    Optional[HtmlPart]
+        The section, transfer encoding and charset of the part. None if the
+        message does not have a text/html part.
+    """
+    if not bodystructure:
+        return None
+
+    # Multipart bodies start with the list of their parts
+    if isinstance(bodystructure[0], list):
+        for i, part in enumerate(bodystructure, start=1):
+            if not isinstance(part, list):
+                break
+            html_part = find_html_part(
+                part, f"{section}.{i}" if section else f"{i}"
+            )
+            if html_part is not None:
+                return html_part
+        return None
+
+    if (
+        _decode(bodystructure[0]) != "text"
+        or _decode(bodystructure[1]) != "html"
+    ):
+        return None
+
+    params = bodystructure[2] if isinstance(bodystructure[2], list) else []
+    params = {
+        _decode(params[i]): _decode(params[i + 1])
+        for i in range(0, len(params) - 1, 2)
+    }
+
+    return HtmlPart(
+        # The body of a single part message is its section 1
+        section=section or "1",
+        encoding=_decode(bodystructure[5]) or "7bit",
+        charset=params.get("charset", "utf-8"),
+    )
+
+
+def build_partial_message(
+    headers: bytes, html: bytes, html_part: HtmlPart
+) -> Message:
+    """
+    This function builds a message from its headers and its html part.
+
+    Parameters
+    ----------
+    headers : bytes
+        The headers of the message.
+    html : bytes
+        The content of the html part, as sent by the server.
+    html_part : HtmlPart
+        The description of the html part.
+
+    Returns
+    -------
+    Message
+        The message with the headers and the html part as its only body.
+    """
+    return email.message_from_bytes(
+        headers.rstrip(b"\r\n")
+        + b"\r\nContent-Type: text/html; charset="
+        + f'"{html_part.charset}"'.encode("utf-8")
+        + b"\r\nContent-Transfer-Encoding: "
+        + html_part.encoding.encode("utf-8")
+        + b"\r\n\r\n"
+        + html
+    )
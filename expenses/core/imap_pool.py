@@ -0,0 +1,76 @@
+import imaplib
+import os
+
+from dotenv import load_dotenv
+
+from expenses.core.executor import BoundedExecutor
+from expenses.core.pool import ConnectionPool
+
+# Check if the file exists
+if os.path.exists("expenses/.env"):
+    load_dotenv(dotenv_path="expenses/.env")
+
+
+def connect_imap() -> imaplib.IMAP4_SSL:
+    """
+    This function opens a new authenticated connection to the IMAP server.
+
+    Returns
+    -------
+    imaplib.IMAP4_SSL
+        The connection to the IMAP server.
+    """
+    conn = imaplib.IMAP4_SSL("imap.gmail.com")
+    conn.login(os.getenv("EMAIL"), os.getenv("GMAIL_TOKEN"))
+    return conn
+
+
+def ping_imap(conn: imaplib.IMAP4_SSL) -> bool:
+    """
+    This function checks if the connection is alive with a NOOP command.
+
+    Parameters
+    ----------
+    conn : imaplib.IMAP4_SSL
+        The connection to check.
+
+    Returns
+    -------
+    bool
+        True if the server answered the NOOP, False otherwise.
+    """
+    status, _ = conn.noop()
+    return status == "OK"
+
+
+def close_imap(conn: imaplib.IMAP4_SSL) -> None:
+    """
+    This function logs out from the IMAP server.
+
+    Parameters
+    ----------
+    conn : imaplib.IMAP4_SSL
+        The connection to close.
+    """
+    conn.logout()
+
+
+# Process-wide pool of IMAP connections. The connections that are aborted
+# by the server while borrowed are discarded, so the next checkout
+# reconnects.
+IMAP_POOL_ = ConnectionPool(
+    connect=connect_imap,
+    ping=ping_imap,
+    close=close_imap,
+    max_size=int(os.getenv("IMAP_POOL_SIZE", 2)),
+    idle_timeout=float(os.getenv("IMAP_POOL_IDLE_TIMEOUT", 600)),
+    checkout_timeout=float(os.getenv("IMAP_POOL_CHECKOUT_TIMEOUT", 60)),
+    discard_on=(imaplib.IMAP4.abort, OSError),
+)
+
+# Process-wide threads that run the blocking IMAP round trips of the
+# asynchronous client
+IMAP_EXECUTOR_ = BoundedExecutor(
+    max_workers=int(os.getenv("IMAP_EXECUTOR_WORKERS", IMAP_POOL_.max_size)),
+    name="imap",
+)
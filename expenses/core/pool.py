@@ -0,0 +1,368 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import (
+    Callable,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+Connection = TypeVar("Connection")
+
+
+class PoolTimeoutError(Exception):
+    """
+    This exception is raised when a connection could not be borrowed from
+    the pool before the checkout timeout.
+    """
+
+
+class ConnectionPool(Generic[Connection]):
+    """
+    This class is a bounded, thread-safe pool of connections.
+
+    The connections are created lazily up to max_size, and up to
+    max_overflow more are opened when the pool is exhausted. At most
+    max_size connections are kept idle, the rest are closed when returned.
+    Every borrowed connection is checked with the ping function before being
+    handed out, the connections that raise one of the discard_on exceptions
+    while borrowed are closed instead of being returned, the connections
+    that stay idle longer than idle_timeout are evicted and the connections
+    older than max_lifetime are recycled. A max_lifetime of None keeps the
+    connections forever.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Connection],
+        ping: Callable[[Connection], bool],
+        close: Callable[[Connection], None],
+        max_size: int = 4,
+        idle_timeout: float = 300,
+        checkout_timeout: float = 30,
+        discard_on: Tuple[Type[BaseException], ...] = (),
+        max_overflow: int = 0,
+        max_lifetime: Optional[float] = None,
+    ):
+        self._connect = connect
+        self._ping = ping
+        self._close = close
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.discard_on = discard_on
+        self.max_overflow = max_overflow
+        self.max_lifetime = max_lifetime
+
+        # The idle connections and the time they were returned, and the time
+        # every open connection was created
+        self._idle: deque = deque()
+        self._created: Dict[int, float] = {}
+        self._size = 0
+        self._condition = threading.Condition()
+
+        # Metrics
+        self._hits = 0
+        self._misses = 0
+        self._reconnects = 0
+        self._evictions = 0
+        self._recycles = 0
+        self._checkout_failures = 0
+        self._checkouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _safe_close(self, conn: Connection) -> None:
+        """
+        This function closes a connection ignoring the errors, since the
+        connection could be already broken.
+
+        Parameters
+        ----------
+        conn : Connection
+            The connection to close.
+        """
+        with self._condition:
+            self._created.pop(id(conn), None)
+        try:
+            self._close(conn)
+        except Exception:
+            pass
+
+    def _is_alive(self, conn: Connection) -> bool:
+        """
+        This function checks if a connection is still alive.
+
+        Parameters
+        ----------
+        conn : Connection
+            The connection to check.
+
+        Returns
+        -------
+        bool
+            True if the connection is alive, False otherwise.
+        """
+        try:
+            return self._ping(conn)
+        except Exception:
+            return False
+
+    def _open(self) -> Connection:
+        """
+        This function opens a new connection and records when it was
+        created.
+
+        Returns
+        -------
+        Connection
+            The new connection.
+        """
+        conn = self._connect()
+        with self._condition:
+            self._created[id(conn)] = time.monotonic()
+        return conn
+
+    def _is_expired(self, conn: Connection) -> bool:
+        """
+        This function checks if a connection is older than the maximum
+        lifetime.
+
+        Parameters
+        ----------
+        conn : Connection
+            The connection to check.
+
+        Returns
+        -------
+        bool
+            True if the connection must be recycled, False otherwise.
+        """
+        if self.max_lifetime is None:
+            return False
+        with self._condition:
+            created = self._created.get(id(conn), time.monotonic())
+        return time.monotonic() - created > self.max_lifetime
+
+    def _evict_idle(self) -> List[Connection]:
+        """
+        This function removes from the pool the connections that have been
+        idle longer than the idle timeout. It must be called holding the
+        lock, and the connections must be closed after releasing it, since
+        closing a connection could block on the network.
+
+        Returns
+        -------
+        List[Connection]
+            The evicted connections, to close.
+        """
+        evicted = []
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._evictions += 1
+            evicted.append(conn)
+        return evicted
+
+    def _close_evicted(self, evicted: List[Connection]) -> None:
+        """
+        This function closes the connections removed from the pool. It must
+        be called without holding the lock.
+
+        Parameters
+        ----------
+        evicted : List[Connection]
+            The connections to close.
+        """
+        for conn in evicted:
+            self._safe_close(conn)
+
+    def _checkout(self) -> Connection:
+        """
+        This function borrows a connection from the pool. The idle
+        connections are reused before creating new ones and, if the pool and
+        the overflow are full, the function waits until a connection is
+        returned.
+
+        Returns
+        -------
+        Connection
+            The borrowed connection.
+
+        Raises
+        ------
+        PoolTimeoutError
+            If no connection is available before the checkout timeout.
+        """
+        start = time.monotonic()
+        evicted: List[Connection] = []
+        try:
+            with self._condition:
+                while True:
+                    evicted.extend(self._evict_idle())
+                    if self._idle:
+                        # Reuse the most recently returned connection
+                        conn, _ = self._idle.pop()
+                        self._hits += 1
+                        break
+                    if self._size < self.max_size + self.max_overflow:
+                        conn = None
+                        self._size += 1
+                        self._misses += 1
+                        break
+
+                    remaining = self.checkout_timeout - (
+                        time.monotonic() - start
+                    )
+                    if remaining <= 0 or not self._condition.wait(remaining):
+                        self._checkout_failures += 1
+                        raise PoolTimeoutError(
+                            "No connection available in the pool after "
+                            f"{self.checkout_timeout} seconds."
+                        )
+        finally:
+            self._close_evicted(evicted)
+
+        try:
+            if conn is None:
+                conn = self._open()
+            elif self._is_expired(conn):
+                self._safe_close(conn)
+                with self._condition:
+                    self._recycles += 1
+                conn = self._open()
+            elif not self._is_alive(conn):
+                self._safe_close(conn)
+                with self._condition:
+                    self._reconnects += 1
+                conn = self._open()
+        except BaseException:
+            self._release_slot()
+            with self._condition:
+                self._checkout_failures += 1
+            raise
+
+        wait = time.monotonic() - start
+        with self._condition:
+            self._checkouts += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+
+        return conn
+
+    def _checkin(self, conn: Connection) -> None:
+        """
+        This function returns a connection to the pool. The connection is
+        closed instead if max_size connections are already idle, so the
+        overflow shrinks when the load drops, or if it is older than the
+        maximum lifetime.
+
+        Parameters
+        ----------
+        conn : Connection
+            The connection to return.
+        """
+        with self._condition:
+            is_overflow = len(self._idle) >= self.max_size
+        if is_overflow or self._is_expired(conn):
+            with self._condition:
+                if not is_overflow:
+                    self._recycles += 1
+            self.discard(conn)
+            return
+
+        with self._condition:
+            self._idle.append((conn, time.monotonic()))
+            evicted = self._evict_idle()
+            self._condition.notify()
+        self._close_evicted(evicted)
+
+    def _release_slot(self) -> None:
+        """
+        This function frees the slot of a connection that was discarded.
+        """
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def discard(self, conn: Connection) -> None:
+        """
+        This function closes a borrowed connection that must not be reused.
+
+        Parameters
+        ----------
+        conn : Connection
+            The connection to discard.
+        """
+        self._safe_close(conn)
+        self._release_slot()
+
+    @contextmanager
+    def connection(self) -> Iterator[Connection]:
+        """
+        This function borrows a connection for the duration of the context.
+
+        Yields
+        ------
+        Connection
+            The borrowed connection.
+        """
+        conn = self._checkout()
+        try:
+            yield conn
+        except self.discard_on:
+            self.discard(conn)
+            raise
+        except BaseException:
+            self._checkin(conn)
+            raise
+        else:
+            self._checkin(conn)
+
+    def close_all(self) -> None:
+        """
+        This function closes all the idle connections of the pool.
+        """
+        with self._condition:
+            evicted = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(evicted)
+            self._condition.notify_all()
+        self._close_evicted(evicted)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        This function returns the metrics of the pool.
+
+        Returns
+        -------
+        Dict[str, float]
+            The size of the pool, the hits, misses, reconnections, evictions,
+            recycles and checkout failures, and the average and maximum
+            checkout wait in seconds.
+        """
+        with self._condition:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+                "max_overflow": self.max_overflow,
+                "hits": self._hits,
+                "misses": self._misses,
+                "reconnects": self._reconnects,
+                "evictions": self._evictions,
+                "recycles": self._recycles,
+                "checkout_failures": self._checkout_failures,
+                "avg_checkout_wait": self._total_wait / self._checkouts
+                if self._checkouts
+                else 0.0,
+                "max_checkout_wait": self._max_wait,
+            }
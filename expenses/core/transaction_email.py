@@ -2,7 +2,8 @@ from datetime import datetime
 from email.message import Message
 
 import pytz
-from bs4 import BeautifulSoup
+
+from expenses.core.html_extractors import extract_alert_message
 
 
 class TransactionEmail:
@@ -38,23 +39,25 @@ class TransactionEmail:
             1. The transaction message is the first line that starts with
                 "Bancolombia" in the entire mail.
 
+        The text is extracted with the engines of
+        expenses.core.html_extractors, which stop at the first alert
+        sentence and fall back to BeautifulSoup if the body cannot be
+        parsed.
+
         Returns
         -------
         str
             The transaction message.
         """
+        self._str_message = ""
         for part in self.body_email.walk():
             if part.get_content_type() == "text/html":
-                body = part.get_payload(decode=True)
-                soup = BeautifulSoup(body, "html.parser")
-                text_message = soup.get_text(separator=" ")
-
-                for val in text_message.split("\xa0"):
-                    if val.strip().startswith(
-                        "Bancolombia"
-                    ) or val.strip().startswith("Realizaste"):
-                        self._str_message = val.strip()
-                        break
+                message = extract_alert_message(
+                    part.get_payload(decode=True),
+                    part.get_content_charset(),
+                )
+                if message is not None:
+                    self._str_message = message
 
         return self._str_message
 
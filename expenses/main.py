@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import Depends, FastAPI
 
 from expenses.api.routers import (
@@ -5,11 +7,34 @@ from expenses.api.routers import (
     expenses_router,
     merchants_router,
     monitoring_router,
+    transactions_router,
 )
 from expenses.api.security import check_access_token
+from expenses.api.storage import DATABASE_EXECUTOR_, get_repository
+from expenses.api.utils import POPULATE_JOBS_
+from expenses.core.imap_pool import IMAP_EXECUTOR_, IMAP_POOL_
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    This function manages the pools of connections and threads of the
+    application. The connections are opened lazily by the requests, and
+    closed when the application shuts down, after the threads finish. The
+    populate jobs stop after their current chunk and can be resumed.
+    """
+    yield
+    POPULATE_JOBS_.stop()
+    DATABASE_EXECUTOR_.shutdown()
+    IMAP_EXECUTOR_.shutdown()
+    get_repository().close()
+    IMAP_POOL_.close_all()
+
 
 # Define the FastAPI app
-app = FastAPI(title="Personal expenses API", version="0.1.0")
+app = FastAPI(
+    title="Personal expenses API", version="0.1.0", lifespan=lifespan
+)
 
 
 # Create a root endpoint
@@ -23,6 +48,7 @@ app.include_router(expenses_router, tags=["Expenses"])
 app.include_router(database_router, tags=["Database"])
 app.include_router(merchants_router, tags=["Merchants"])
 app.include_router(monitoring_router, tags=["Monitoring"])
+app.include_router(transactions_router, tags=["Transactions"])
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,228 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from expenses.constants import FX_RATES_
+
+# Maximum length of the amounts parsed in the vectorized path. The longer
+# ones are parsed one by one.
+MAX_AMOUNT_LENGTH_ = 32
+
+# Maximum number of digits of the amounts parsed in the vectorized path, so
+# they are exact as float
+MAX_AMOUNT_DIGITS_ = 15
+
+# Classes of the characters of the amounts, indexed by code point. The
+# code points above 255 are clipped to 255, which is an "other" character.
+_PADDING, _DIGIT, _COMMA, _DOT, _DOLLAR, _OTHER = range(6)
+_CHARACTER_CLASSES = np.full(256, _OTHER, dtype=np.uint8)
+_CHARACTER_CLASSES[0] = _PADDING
+_CHARACTER_CLASSES[np.arange(ord("0"), ord("9") + 1)] = _DIGIT
+_CHARACTER_CLASSES[ord(",")] = _COMMA
+_CHARACTER_CLASSES[ord(".")] = _DOT
+_CHARACTER_CLASSES[ord("$")] = _DOLLAR
+
+
+def _split_amount(value_str: str) -> Tuple[str, str]:
+    """
+    This function normalizes a string amount and detects its currency.
+    There are several possible formats for the amount:
+        1. 57,000.00
+        2. 57.000,00
+        3. 57,000
+        4. 57.000
+
+    Parameters
+    ----------
+    value_str : str
+        The string amount.
+
+    Returns
+    -------
+    Tuple[str, str]
+        The amount as a string that float can read and the currency.
+    """
+    # Delete the "$" symbol
+    value_str = value_str.replace("$", "")
+
+    # Check if the comma or the dot appears first
+    if "," in value_str and "." in value_str:
+        if value_str.index(",") < value_str.index("."):
+            value_str = value_str.split(".")[0]
+        else:
+            value_str = value_str.split(",")[0]
+
+    # For the values that only have a comma or a dot, check if the
+    # number of values that are at the right of the comma are 2.
+    # If that is the case, assume that the value is in dollars.
+    # Otherwise, assume that the value is in COP.
+    if "," in value_str:
+        if len(value_str.split(",")[1]) == 2:
+            return value_str.replace(",", "."), "USD"
+
+    return value_str.replace(",", "").replace(".", ""), "COP"
+
+
+def convert_amount_to_float(
+    value_str: str, fx_rates: Dict[str, float] = FX_RATES_
+) -> float:
+    """
+    This function converts a string amount to float, in COP.
+
+    Parameters
+    ----------
+    value_str : str
+        The string amount.
+    fx_rates : Dict[str, float], optional
+        The rates to convert the amounts to COP, by currency.
+
+    Returns
+    -------
+    float
+        The float amount.
+
+    Raises
+    ------
+    ValueError
+        If the string is not an amount.
+    """
+    value_str, currency = _split_amount(value_str)
+    return float(value_str) * fx_rates[currency]
+
+
+def parse_amounts(
+    values_str: Sequence[str], fx_rates: Dict[str, float] = FX_RATES_
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    This function converts a batch of string amounts to float, in COP, with
+    the same rules as convert_amount_to_float.
+
+    The amounts are loaded in a matrix of bytes, one column per amount, and
+    scanned one character position at a time for all the amounts at once,
+    following the rules of the scalar function. The amounts with other
+    characters, or too long to be exact, are converted one by one.
+
+    Parameters
+    ----------
+    values_str : Sequence[str]
+        The string amounts.
+    fx_rates : Dict[str, float], optional
+        The rates to convert the amounts to COP, by currency.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The float amounts, NaN for the strings that are not amounts, and
+        the currency of every amount, an empty string for the strings that
+        are not amounts.
+    """
+    size = len(values_str)
+    amounts = np.full(size, np.nan)
+    currencies = np.full(size, "", dtype="U3")
+    if size == 0:
+        return amounts, currencies
+
+    lengths = np.fromiter(map(len, values_str), dtype=np.int64, count=size)
+    width = max(min(int(lengths.max()), MAX_AMOUNT_LENGTH_), 1)
+
+    # Matrix of the code points of the amounts, one row per character
+    # position and padded with zeros, and the class of every character
+    matrix = np.ascontiguousarray(
+        np.minimum(
+            np.array(values_str, dtype=f"U{width}")
+            .view(np.uint32)
+            .reshape(size, width),
+            255,
+        )
+        .astype(np.uint8)
+        .T
+    )
+    classes = _CHARACTER_CLASSES[matrix]
+
+    # Only the amounts made of digits, separators and "$" are vectorized
+    vectorized = (
+        (lengths <= width)
+        & (np.count_nonzero(matrix, axis=0) == lengths)
+        & ~(classes == _OTHER).any(axis=0)
+    )
+
+    seen_comma = np.zeros(size, dtype=bool)
+    seen_dot = np.zeros(size, dtype=bool)
+    in_decimals = np.zeros(size, dtype=bool)
+    commas = np.zeros(size, dtype=np.int64)
+    decimals = np.zeros(size, dtype=np.int64)
+    digits = np.zeros(size, dtype=np.int64)
+    numbers = np.zeros(size, dtype=np.int64)
+    for position in range(width):
+        is_comma = classes[position] == _COMMA
+        is_dot = classes[position] == _DOT
+
+        # If there are both separators, the amount is cut at the first
+        # separator of the kind that appears last
+        before_cut = ~((seen_comma | is_comma) & (seen_dot | is_dot))
+        seen_comma |= is_comma
+        seen_dot |= is_dot
+
+        # The decimals are the digits between the first and the second
+        # comma
+        is_comma &= before_cut
+        in_decimals &= ~is_comma
+        in_decimals |= is_comma & (commas == 0)
+        commas += is_comma
+
+        is_digit = (classes[position] == _DIGIT) & before_cut
+        decimals += is_digit & in_decimals
+        digits += is_digit
+        numbers = np.where(
+            is_digit,
+            numbers * 10 + (matrix[position] - ord("0")),
+            numbers,
+        )
+
+    # The amount is in USD if the comma is followed by exactly two digits.
+    # A USD amount with other commas is not a number, and a COP amount
+    # without digits neither.
+    is_usd = (commas > 0) & (decimals == 2)
+    valid = np.where(is_usd, commas == 1, digits > 0)
+    vectorized &= ~valid | (digits <= MAX_AMOUNT_DIGITS_)
+
+    fast = vectorized & valid
+    amounts[fast] = np.where(
+        is_usd, numbers / 100 * fx_rates["USD"], numbers * fx_rates["COP"]
+    )[fast]
+    currencies[fast] = np.where(is_usd, "USD", "COP")[fast]
+
+    # Convert the rest of the amounts one by one
+    for index in np.flatnonzero(~vectorized):
+        amount, currency = _convert_amount(values_str[index], fx_rates)
+        amounts[index] = amount
+        currencies[index] = currency or ""
+
+    return amounts, currencies
+
+
+def _convert_amount(
+    value_str: str, fx_rates: Dict[str, float]
+) -> Tuple[float, Optional[str]]:
+    """
+    This function converts a string amount to float and detects its
+    currency, without raising errors.
+
+    Parameters
+    ----------
+    value_str : str
+        The string amount.
+    fx_rates : Dict[str, float]
+        The rates to convert the amounts to COP, by currency.
+
+    Returns
+    -------
+    Tuple[float, Optional[str]]
+        The float amount and the currency. NaN and None if the string is
+        not an amount.
+    """
+    value_str, currency = _split_amount(value_str)
+    try:
+        return float(value_str) * fx_rates[currency], currency
+    except ValueError:
+        return np.nan, None
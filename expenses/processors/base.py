@@ -1,13 +1,19 @@
 import re
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 
-from expenses.constants import (
-    TRANSACTION_MESSAGES_TYPES_,
-    TRANSACTION_TYPES_,
-)
 from expenses.core.transaction_email import TransactionEmail
-from expenses.processors.schemas import TransactionInfo
+from expenses.processors.amounts import (
+    convert_amount_to_float,
+    parse_amounts,
+)
+from expenses.processors.classifier import (
+    TRANSACTION_CLASSIFIER_,
+    Classification,
+)
+from expenses.processors.schemas import TransactionColumns, TransactionInfo
 
 
 class EmailProcessor(ABC):
@@ -19,20 +25,38 @@ class EmailProcessor(ABC):
         - transaction_email_text: The string email.
         - transaction_type: The transaction type.
         - pattern: The regex pattern to extract the transaction information.
+
+    The transaction type, the income flag and the compiled pattern are
+    attributes of the class, so the pattern is compiled once, when the
+    processor class is defined, and shared by all its instances.
     """
 
-    def __init__(self, email: TransactionEmail):
+    transaction_type: str = None
+    _is_income: bool = None
+    pattern: re.Pattern = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not getattr(cls._set_pattern, "__isabstractmethod__", False):
+            cls.pattern = re.compile(cls._set_pattern())
+
+    def __init__(
+        self,
+        email: TransactionEmail,
+        classification: Optional[Classification] = None,
+    ):
         self.email = email
         self.transaction_email_text: str = self.email.str_message
-        self.transaction_type: str = None
-        self._is_income: bool = None
-        self.pattern: str = self._set_pattern()
+        # The classification is usually computed by the factory, so the
+        # text is not scanned again.
+        self.classification = classification
 
     def __str__(self):
         return f"{self.__class__.__name__}"
 
+    @classmethod
     @abstractmethod
-    def _set_pattern(self) -> str:
+    def _set_pattern(cls) -> str:
         """
         This abstract method sets the regex pattern to extract the
         transaction information.
@@ -45,30 +69,6 @@ class EmailProcessor(ABC):
         """
         ...
 
-    @staticmethod
-    def _has_valid_messages(messages: List[str], email_text: str) -> bool:
-        """
-        This static method checks if the email contains some of the messages
-        in the list.
-
-        Parameters
-        ----------
-        messages : List[str]
-            The list of messages to check.
-        email_text : str
-            The email text.
-
-        Returns
-        -------
-        bool
-            True if the email contains some of the messages, False otherwise.
-        """
-        return any(
-            (message in email_text)
-            or (message.lower() in email_text.lower())
-            for message in messages
-        )
-
     def _is_valid_email(self) -> bool:
         """
         This function checks if the email is valid. For that, it must
@@ -83,25 +83,12 @@ class EmailProcessor(ABC):
         bool
             True if the email is valid, False otherwise.
         """
-        # Check if the string email contains some of the messages types
-        has_valid_message_type = self._has_valid_messages(
-            TRANSACTION_MESSAGES_TYPES_, self.transaction_email_text
-        )
-
-        # Check if the string email contains some of the transaction types
-        has_valid_transaction_type = self._has_valid_messages(
-            list(TRANSACTION_TYPES_.keys()), self.transaction_email_text
-        )
-
-        # Check if the string email contains an amount with "$"
-        has_valid_amount = "$" in self.transaction_email_text
+        if self.classification is None:
+            self.classification = TRANSACTION_CLASSIFIER_.classify(
+                self.transaction_email_text
+            )
 
-        # Return True if all conditions are met, otherwise False
-        return (
-            has_valid_message_type
-            and has_valid_transaction_type
-            and has_valid_amount
-        )
+        return self.classification.is_valid
 
     @staticmethod
     def _convert_amount_to_float(value_str: str) -> float:
@@ -113,6 +100,8 @@ class EmailProcessor(ABC):
             3. 57,000
             4. 57.000
 
+        The amounts in USD are converted to COP with the rate of FX_RATES_.
+
         Parameters
         ----------
         value_str : str
@@ -123,38 +112,65 @@ class EmailProcessor(ABC):
         float
             The float amount.
         """
-        # Delete the "$" symbol
-        value_str = value_str.replace("$", "")
+        return convert_amount_to_float(value_str)
 
-        # Check if the comma or the dot appears first
-        if "," in value_str and "." in value_str:
-            if value_str.index(",") < value_str.index("."):
-                value_str = value_str.split(".")[0]
-            else:
-                value_str = value_str.split(",")[0]
+    @staticmethod
+    def _convert_amounts_to_float(values_str: List[str]) -> np.ndarray:
+        """
+        This static method converts a batch of string amounts to float, with
+        the vectorized parser of expenses.processors.amounts.
 
-        # For the values that only have a comma or a dot, check if the
-        # number of values that are at the right of the comma are 2.
-        # If that is the case, assume that the value is in dollars.
-        # Otherwise, assume that the value is in COP.
-        if "," in value_str:
-            if len(value_str.split(",")[1]) == 2:
-                value_str = value_str.replace(",", ".")
-                return float(value_str) * 4000
+        Parameters
+        ----------
+        values_str : List[str]
+            The string amounts.
 
-        value_str = value_str.replace(",", "").replace(".", "")
-        return float(value_str)
+        Returns
+        -------
+        np.ndarray
+            The float amounts. NaN for the strings that are not amounts.
+        """
+        amounts, _ = parse_amounts(values_str)
+        return amounts
 
-    def _get_match(self) -> re.Match:
+    @classmethod
+    def _extract_fields(
+        cls, text: str, classification: Classification
+    ) -> Tuple[str, str, str, Optional[str]]:
         """
-        This function returns the match object of the transaction type.
+        This function extracts the fields of a transaction message with the
+        pattern of the class.
+
+        Parameters
+        ----------
+        text : str
+            The transaction message.
+        classification : Classification
+            The classification of the message.
 
         Returns
         -------
-        re.Match
-            The match object.
+        Tuple[str, str, str, Optional[str]]
+            The string amount, the merchant, the payment method and the
+            message to log, which is None if the message is valid.
         """
-        return re.search(self.pattern, self.transaction_email_text)
+        if not classification.is_valid:
+            # If the email is not valid, set the default values and log the
+            # email.
+            return "$0.0", "unknown", "unknown", text
+
+        # Get the match object
+        match = cls.pattern.search(text)
+        if match is None:
+            return "$0.0", "unknown", "unknown", None
+
+        # Obtain the elements of the match object
+        return (
+            match.group("purchase_amount"),
+            match.group("merchant"),
+            match.group("payment_method"),
+            None,
+        )
 
     def _get_transaction_values(self) -> Dict:
         """
@@ -165,26 +181,15 @@ class EmailProcessor(ABC):
         Dict
             The transaction values in a dictionary.
         """
-        if self._is_valid_email():
-            # Get the match object
-            match = self._get_match()
-
-            # Obtain the elements of the match object
-            purchase_amount = (
-                match.group("purchase_amount") if match else "$0.0"
-            )
-            merchant = match.group("merchant") if match else "unknown"
-            paynment_method = (
-                match.group("payment_method") if match else "unknown"
-            )
-            log_email_string = None
-        else:
-            # If the email is not valid, set the default values and log the
-            # email.
-            purchase_amount = "$0.0"
-            merchant = "unknown"
-            paynment_method = "unknown"
-            log_email_string = self.transaction_email_text
+        self._is_valid_email()
+        (
+            purchase_amount,
+            merchant,
+            paynment_method,
+            log_email_string,
+        ) = self._extract_fields(
+            self.transaction_email_text, self.classification
+        )
 
         return {
             "transaction_type": self.transaction_type,
@@ -208,3 +213,94 @@ class EmailProcessor(ABC):
             The transaction info schema.
         """
         return TransactionInfo(**self._get_transaction_values())
+
+    @classmethod
+    def _process_batch(
+        cls,
+        emails: List[TransactionEmail],
+        classifications: List[Classification],
+    ) -> Tuple[TransactionColumns, List[int]]:
+        """
+        This function processes a batch of emails of the transaction type
+        of the class. See process_batch.
+
+        Parameters
+        ----------
+        emails : List[TransactionEmail]
+            The emails of the transaction type.
+        classifications : List[Classification]
+            The classification of every email.
+
+        Returns
+        -------
+        Tuple[TransactionColumns, List[int]]
+            The transactions of the emails, in order, and the positions in
+            the batch of the emails they come from.
+        """
+        columns = TransactionColumns()
+        amounts_str = []
+        for email, classification in zip(emails, classifications):
+            (
+                purchase_amount,
+                merchant,
+                paynment_method,
+                log_email_string,
+            ) = cls._extract_fields(email.str_message, classification)
+            amounts_str.append(purchase_amount)
+            columns.merchant.append(merchant)
+            columns.datetime.append(email.date_message)
+            columns.paynment_method.append(paynment_method)
+            columns.email_log.append(log_email_string)
+
+        amounts = cls._convert_amounts_to_float(amounts_str)
+        columns.amount = (amounts if cls._is_income else -amounts).tolist()
+        columns.transaction_type = [cls.transaction_type] * len(emails)
+
+        # The emails whose amount is not a number, or whose merchant or
+        # payment method is missing, are skipped, as process does by
+        # raising an error
+        positions = [
+            position
+            for position in np.flatnonzero(~np.isnan(amounts)).tolist()
+            if columns.merchant[position] is not None
+            and columns.paynment_method[position] is not None
+        ]
+        if len(positions) < len(emails):
+            columns = columns.take(positions)
+
+        return columns, positions
+
+    @classmethod
+    def process_batch(
+        cls,
+        emails: List[TransactionEmail],
+        classifications: Optional[List[Classification]] = None,
+    ) -> TransactionColumns:
+        """
+        This function processes a batch of emails of the transaction type
+        of the class. The compiled pattern runs over all the messages and
+        the amounts are converted at once, without building a processor or
+        a TransactionInfo per email. The emails that process would reject
+        are skipped.
+
+        Parameters
+        ----------
+        emails : List[TransactionEmail]
+            The emails of the transaction type.
+        classifications : Optional[List[Classification]], optional
+            The classification of every email. If None, the emails are
+            classified.
+
+        Returns
+        -------
+        TransactionColumns
+            The transactions of the emails, in order.
+        """
+        if classifications is None:
+            classifications = [
+                TRANSACTION_CLASSIFIER_.classify(email.str_message)
+                for email in emails
+            ]
+
+        columns, _ = cls._process_batch(emails, classifications)
+        return columns
@@ -0,0 +1,142 @@
+import re
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from expenses.constants import (
+    TRANSACTION_MESSAGES_TYPES_,
+    TRANSACTION_TYPES_,
+)
+
+
+@dataclass
+class Classification:
+    """
+    This class represents the result of classifying a transaction message.
+    """
+
+    transaction_type: Optional[str]
+    has_valid_message_type: bool
+    has_valid_transaction_type: bool
+    has_valid_amount: bool
+
+    @property
+    def is_valid(self) -> bool:
+        """
+        This property checks if the message is a valid transaction email:
+        it contains a message type, a transaction type and an amount.
+
+        Returns
+        -------
+        bool
+            True if the message is valid, False otherwise.
+        """
+        return (
+            self.has_valid_message_type
+            and self.has_valid_transaction_type
+            and self.has_valid_amount
+        )
+
+
+class TransactionClassifier:
+    """
+    This class identifies the transaction type of a message and checks if
+    it is valid in a single scan of the text.
+
+    All the keywords (the transaction types, the message types and the "$"
+    of the amount) are combined in one alternation regex, which is run once
+    over the lower case text. These are the rules for the overlapping
+    keywords:
+        1. The keywords are searched at every position of the text, and
+            when several of them start at the same position, the longest
+            one is matched, e.g. "recepcion transferencia" instead of
+            "transferencia". So the keywords that overlap are all found,
+            e.g. "QRetiro" contains "QR" and "Retiro".
+        2. A matched keyword also counts as every keyword it contains, e.g.
+            "realizaste una transferencia" counts as "transferencia" too.
+        3. If the message contains several transaction types, the type
+            declared first in TRANSACTION_TYPES_ wins, e.g. "recepcion
+            transferencia" wins over "Transferencia".
+    """
+
+    def __init__(
+        self,
+        transaction_types: Iterable[str] = tuple(TRANSACTION_TYPES_),
+        message_types: Iterable[str] = tuple(TRANSACTION_MESSAGES_TYPES_),
+    ):
+        # The priority of every transaction type is its declaration order
+        transaction_types = {
+            transaction_type.lower(): (priority, transaction_type)
+            for priority, transaction_type in enumerate(transaction_types)
+        }
+        message_types = {
+            message_type.lower() for message_type in message_types
+        }
+        keywords = set(transaction_types) | message_types | {"$"}
+
+        # Precompute what every keyword counts as: the best transaction
+        # type it contains and whether it contains a message type or "$"
+        self._keywords = {}
+        for keyword in keywords:
+            contained = [other for other in keywords if other in keyword]
+            self._keywords[keyword] = (
+                min(
+                    (
+                        transaction_types[other]
+                        for other in contained
+                        if other in transaction_types
+                    ),
+                    default=None,
+                ),
+                any(other in message_types for other in contained),
+                "$" in keyword,
+            )
+
+        # The lookahead matches at every position without consuming the
+        # text, so a keyword never hides the next one
+        alternation = "|".join(
+            re.escape(keyword)
+            for keyword in sorted(keywords, key=lambda k: (-len(k), k))
+        )
+        self._pattern = re.compile(f"(?=({alternation}))")
+
+    def classify(self, text: str) -> Classification:
+        """
+        This function classifies a transaction message.
+
+        Parameters
+        ----------
+        text : str
+            The transaction message.
+
+        Returns
+        -------
+        Classification
+            The transaction type and the validity flags of the message.
+        """
+        best_type = None
+        has_valid_message_type = False
+        has_valid_amount = False
+
+        for keyword in self._pattern.findall(text.lower()):
+            transaction_type, is_message_type, is_amount = self._keywords[
+                keyword
+            ]
+            has_valid_message_type = (
+                has_valid_message_type or is_message_type
+            )
+            has_valid_amount = has_valid_amount or is_amount
+            if transaction_type is not None and (
+                best_type is None or transaction_type < best_type
+            ):
+                best_type = transaction_type
+
+        return Classification(
+            transaction_type=best_type[1] if best_type else None,
+            has_valid_message_type=has_valid_message_type,
+            has_valid_transaction_type=best_type is not None,
+            has_valid_amount=has_valid_amount,
+        )
+
+
+# Classifier built once from the transaction and message types
+TRANSACTION_CLASSIFIER_ = TransactionClassifier()
@@ -1,9 +1,15 @@
 import importlib
-from typing import Dict
+from collections import defaultdict
+from typing import Dict, Iterable
 
 from expenses.constants import TRANSACTION_TYPES_
 from expenses.core.transaction_email import TransactionEmail
 from expenses.processors.base import EmailProcessor
+from expenses.processors.classifier import (
+    TRANSACTION_CLASSIFIER_,
+    Classification,
+)
+from expenses.processors.schemas import TransactionColumns
 
 
 def import_processors() -> Dict[str, EmailProcessor]:
@@ -41,7 +47,20 @@ class EmailProcessorFactory:
     """
 
     @staticmethod
-    def _identify_transaction_type(email: TransactionEmail) -> str:
+    def _classify(email: TransactionEmail) -> Classification:
+        """
+        This function identifies the transaction type of the email and
+        checks if it is valid, in a single scan of the message.
+
+        Returns
+        -------
+        Classification
+            The transaction type and the validity flags of the email.
+        """
+        return TRANSACTION_CLASSIFIER_.classify(email.str_message)
+
+    @classmethod
+    def _identify_transaction_type(cls, email: TransactionEmail) -> str:
         """
         This function identifies the transaction type of the email. It checks
         if the email contains a valid transaction type.
@@ -51,10 +70,7 @@ class EmailProcessorFactory:
         str
             The transaction type.
         """
-        str_message_lower = email.str_message.lower()
-        for transaction_type in TRANSACTION_TYPES_:
-            if transaction_type.lower() in str_message_lower:
-                return transaction_type
+        return cls._classify(email).transaction_type
 
     def get_processor(self, email: TransactionEmail) -> EmailProcessor:
         """
@@ -65,11 +81,60 @@ class EmailProcessorFactory:
         BaseEmailProcessor
             The email processor.
         """
-        transaction_type = self._identify_transaction_type(email)
+        classification = self._classify(email)
+        transaction_type = classification.transaction_type
 
         if transaction_type in TRANSACTIONS_PROCESSORS_:
-            return TRANSACTIONS_PROCESSORS_[transaction_type](email)
+            return TRANSACTIONS_PROCESSORS_[transaction_type](
+                email, classification
+            )
         else:
             raise ValueError(
                 f"The transaction type {transaction_type} is not supported"
             )
+
+    def process_batch(
+        self, emails: Iterable[TransactionEmail]
+    ) -> TransactionColumns:
+        """
+        This function processes a batch of emails. The emails are grouped by
+        transaction type and every group is processed at once by its
+        processor. The emails of unsupported transaction types are skipped.
+
+        Parameters
+        ----------
+        emails : Iterable[TransactionEmail]
+            The emails.
+
+        Returns
+        -------
+        TransactionColumns
+            The transactions of the supported emails, in the order of the
+            emails.
+        """
+        # Group the emails, their classifications and their positions by
+        # transaction type
+        groups = defaultdict(lambda: ([], [], []))
+        for position, email in enumerate(emails):
+            classification = self._classify(email)
+            if classification.transaction_type in TRANSACTIONS_PROCESSORS_:
+                group = groups[classification.transaction_type]
+                group[0].append(email)
+                group[1].append(classification)
+                group[2].append(position)
+
+        columns, positions = TransactionColumns(), []
+        for transaction_type, (
+            group_emails,
+            group_classifications,
+            group_positions,
+        ) in groups.items():
+            group_columns, kept = TRANSACTIONS_PROCESSORS_[
+                transaction_type
+            ]._process_batch(group_emails, group_classifications)
+            columns.extend(group_columns)
+            positions.extend(group_positions[i] for i in kept)
+
+        # Restore the order of the emails
+        order = sorted(range(len(positions)), key=positions.__getitem__)
+        return columns.take(order)
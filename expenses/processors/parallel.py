@@ -0,0 +1,217 @@
+import email as email_lib
+import itertools
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from email.message import Message
+from typing import Iterable, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+from expenses.core.transaction_email import TransactionEmail
+from expenses.processors.factory import EmailProcessorFactory
+from expenses.processors.schemas import TransactionColumns, TransactionInfo
+
+# Check if the file exists
+if os.path.exists("expenses/.env"):
+    load_dotenv(dotenv_path="expenses/.env")
+
+# Number of processes that parse the emails, at most 4 by default, since
+# the emails are downloaded faster than that only from a local store. With 1
+# worker the emails are parsed in the current process.
+PARSE_WORKERS_ = int(os.getenv("PARSE_WORKERS", min(os.cpu_count() or 1, 4)))
+
+# The start method of the worker processes. They are not forked from the
+# API, whose threads could hold locks, e.g. of the connection pools, at the
+# time of the fork.
+PARSE_START_METHOD_ = os.getenv(
+    "PARSE_START_METHOD",
+    "forkserver"
+    if "forkserver" in multiprocessing.get_all_start_methods()
+    else "spawn",
+)
+
+# Number of emails sent to a worker at once
+PARSE_CHUNK_SIZE_ = int(os.getenv("PARSE_CHUNK_SIZE", 64))
+
+# Batches with fewer emails than this are parsed in the current process,
+# since starting the workers costs more than parsing them
+PARSE_SERIAL_THRESHOLD_ = int(os.getenv("PARSE_SERIAL_THRESHOLD", 256))
+
+
+def process_email(
+    processor_factory: EmailProcessorFactory, email: Message
+) -> Optional[TransactionInfo]:
+    """
+    This function extracts the transaction of an email.
+
+    Parameters
+    ----------
+    processor_factory : EmailProcessorFactory
+        The factory of the email processors.
+    email : Message
+        The email.
+
+    Returns
+    -------
+    Optional[TransactionInfo]
+        The information of the transaction. None if the email is not a
+        supported transaction.
+    """
+    try:
+        return processor_factory.get_processor(
+            TransactionEmail(email)
+        ).process()
+    except ValueError:
+        return None
+
+
+def process_emails(
+    processor_factory: EmailProcessorFactory, emails: Iterable[Message]
+) -> TransactionColumns:
+    """
+    This function extracts the transactions of a batch of emails with
+    EmailProcessorFactory.process_batch. The emails whose date can not be
+    read are skipped.
+
+    Parameters
+    ----------
+    processor_factory : EmailProcessorFactory
+        The factory of the email processors.
+    emails : Iterable[Message]
+        The emails.
+
+    Returns
+    -------
+    TransactionColumns
+        The transactions of the supported emails, in order.
+    """
+    transaction_emails = []
+    for email in emails:
+        try:
+            transaction_emails.append(TransactionEmail(email))
+        except ValueError:
+            continue
+
+    return processor_factory.process_batch(transaction_emails)
+
+
+def _process_raw_chunk(raw_emails: List[bytes]) -> TransactionColumns:
+    """
+    This function extracts the transactions of a chunk of raw emails. It
+    runs in the worker processes.
+
+    Parameters
+    ----------
+    raw_emails : List[bytes]
+        The raw emails.
+
+    Returns
+    -------
+    TransactionColumns
+        The transactions of the supported emails, in order.
+    """
+    return process_emails(
+        EmailProcessorFactory(),
+        (email_lib.message_from_bytes(raw) for raw in raw_emails),
+    )
+
+
+def parse_email_chunks(
+    chunks: Iterable[List[Message]],
+    workers: int = PARSE_WORKERS_,
+    serial_threshold: int = PARSE_SERIAL_THRESHOLD_,
+) -> Iterator[TransactionColumns]:
+    """
+    This function extracts the transactions of a stream of chunks of
+    emails. The raw emails of every chunk are sent to a pool of processes,
+    so the html parsing and the regex extraction run on all the cores, and
+    the transactions are yielded in the order of the chunks.
+
+    Only a couple of chunks per worker are in flight at any time, so the
+    stream is never held in memory all at once. If there is a single worker
+    or the stream has fewer emails than serial_threshold, the emails are
+    parsed in the current process.
+
+    Parameters
+    ----------
+    chunks : Iterable[List[Message]]
+        The chunks of emails.
+    workers : int, optional
+        The number of worker processes.
+    serial_threshold : int, optional
+        The minimum number of emails to start the worker processes.
+
+    Yields
+    ------
+    TransactionColumns
+        The transactions of every chunk, even if it has none.
+    """
+    chunks = iter(chunks)
+    head, head_size = [], 0
+    for chunk in chunks:
+        head.append(chunk)
+        head_size += len(chunk)
+        if head_size >= serial_threshold:
+            break
+
+    if workers <= 1 or head_size < serial_threshold:
+        processor_factory = EmailProcessorFactory()
+        for chunk in itertools.chain(head, chunks):
+            yield process_emails(processor_factory, chunk)
+        return
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(PARSE_START_METHOD_),
+    )
+    try:
+        pending = deque()
+        for chunk in itertools.chain(head, chunks):
+            pending.append(
+                executor.submit(
+                    _process_raw_chunk, [email.as_bytes() for email in chunk]
+                )
+            )
+            # Keep every worker busy while the results are consumed
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def parse_emails(
+    emails: Iterable[Message],
+    workers: int = PARSE_WORKERS_,
+    chunk_size: int = PARSE_CHUNK_SIZE_,
+    serial_threshold: int = PARSE_SERIAL_THRESHOLD_,
+) -> Iterator[TransactionColumns]:
+    """
+    This function extracts the transactions of a stream of emails, split in
+    chunks of chunk_size emails. See parse_email_chunks.
+
+    Parameters
+    ----------
+    emails : Iterable[Message]
+        The emails.
+    workers : int, optional
+        The number of worker processes.
+    chunk_size : int, optional
+        The number of emails sent to a worker at once.
+    serial_threshold : int, optional
+        The minimum number of emails to start the worker processes.
+
+    Yields
+    ------
+    TransactionColumns
+        The transactions of every chunk of emails.
+    """
+    emails = iter(emails)
+    chunks = iter(lambda: list(itertools.islice(emails, chunk_size)), [])
+    yield from parse_email_chunks(
+        chunks, workers=workers, serial_threshold=serial_threshold
+    )
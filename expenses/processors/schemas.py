@@ -1,4 +1,8 @@
 import datetime
+import hashlib
+from dataclasses import dataclass, field, fields
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
 
 from pydantic import BaseModel
 
@@ -14,3 +18,203 @@ class TransactionInfo(BaseModel):
     datetime: datetime.datetime
     paynment_method: str
     email_log: str | None
+
+
+def get_transaction_fingerprint(
+    transaction_type: str,
+    amount: Union[float, Decimal],
+    merchant: Optional[str],
+    date: datetime.datetime,
+    paynment_method: Optional[str],
+) -> str:
+    """
+    This function computes the fingerprint of a transaction: the SHA-256 of
+    its normalized fields. Two transactions with the same type, amount,
+    merchant, datetime and payment method have the same fingerprint, even if
+    the merchant or the payment method differ in case or spaces, or the
+    datetime has time zone, or the amount is a Decimal. A missing merchant
+    or payment method, e.g. of an old row, is normalized as an empty one.
+
+    Parameters
+    ----------
+    transaction_type : str
+        The type of the transaction.
+    amount : Union[float, Decimal]
+        The amount of the transaction.
+    merchant : Optional[str]
+        The merchant of the transaction.
+    date : datetime.datetime
+        The datetime of the transaction.
+    paynment_method : Optional[str]
+        The payment method of the transaction.
+
+    Returns
+    -------
+    str
+        The fingerprint, as 64 hexadecimal characters.
+    """
+    normalized = (
+        transaction_type.strip(),
+        # The amounts read from a DECIMAL column are Decimal. Adding 0.0
+        # turns the negative zero into zero
+        f"{round(float(amount), 2) + 0.0:.2f}",
+        " ".join((merchant or "").split()).upper(),
+        date.replace(tzinfo=None).isoformat(timespec="seconds"),
+        " ".join((paynment_method or "").split()).upper(),
+    )
+    return hashlib.sha256(
+        "\x1f".join(normalized).encode("utf-8")
+    ).hexdigest()
+
+
+@dataclass
+class TransactionColumns:
+    """
+    Class that represents a batch of transactions in columns, one list per
+    field of TransactionInfo. The batches are processed, stored and
+    summarized in this form, and the TransactionInfo models are only built
+    at the boundary of the API.
+    """
+
+    transaction_type: List[str] = field(default_factory=list)
+    amount: List[float] = field(default_factory=list)
+    merchant: List[str] = field(default_factory=list)
+    datetime: List["datetime.datetime"] = field(default_factory=list)
+    paynment_method: List[str] = field(default_factory=list)
+    email_log: List[Optional[str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.transaction_type)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple]) -> "TransactionColumns":
+        """
+        This function builds the columns from rows with the fields in the
+        order of TransactionInfo, e.g. the rows read from the database.
+
+        Parameters
+        ----------
+        rows : Iterable[Tuple]
+            The rows of the transactions.
+
+        Returns
+        -------
+        TransactionColumns
+            The transactions in columns.
+        """
+        columns = cls()
+        for row in rows:
+            columns.transaction_type.append(str(row[0]))
+            columns.amount.append(float(row[1]))
+            columns.merchant.append(str(row[2]))
+            columns.datetime.append(row[3])
+            columns.paynment_method.append(str(row[4]))
+            columns.email_log.append(row[5])
+        return columns
+
+    def extend(self, other: "TransactionColumns") -> None:
+        """
+        This function appends the transactions of other batch.
+
+        Parameters
+        ----------
+        other : TransactionColumns
+            The batch to append.
+        """
+        self.transaction_type.extend(other.transaction_type)
+        self.amount.extend(other.amount)
+        self.merchant.extend(other.merchant)
+        self.datetime.extend(other.datetime)
+        self.paynment_method.extend(other.paynment_method)
+        self.email_log.extend(other.email_log)
+
+    def take(self, indices: List[int]) -> "TransactionColumns":
+        """
+        This function selects the transactions in the given positions.
+
+        Parameters
+        ----------
+        indices : List[int]
+            The positions of the transactions, in the order to take them.
+
+        Returns
+        -------
+        TransactionColumns
+            The selected transactions.
+        """
+        return TransactionColumns(
+            **{
+                column.name: [getattr(self, column.name)[i] for i in indices]
+                for column in fields(self)
+            }
+        )
+
+    def rows(self) -> Iterator[Tuple]:
+        """
+        This function returns the transactions as rows to insert into the
+        database, with the dates without time zone.
+
+        Yields
+        ------
+        Tuple
+            The fields of every transaction, in the order of
+            TransactionInfo.
+        """
+        return zip(
+            self.transaction_type,
+            self.amount,
+            self.merchant,
+            (date.replace(tzinfo=None) for date in self.datetime),
+            self.paynment_method,
+            self.email_log,
+        )
+
+    def fingerprint_rows(self) -> Iterator[Tuple]:
+        """
+        This function returns the transactions as rows to insert into the
+        database, with the fingerprint of every transaction at the end. See
+        get_transaction_fingerprint.
+
+        Yields
+        ------
+        Tuple
+            The fields of every transaction, in the order of
+            TransactionInfo, and its fingerprint.
+        """
+        for row in self.rows():
+            yield row + (get_transaction_fingerprint(*row[:5]),)
+
+    def to_transactions(self) -> List[TransactionInfo]:
+        """
+        This function builds the TransactionInfo models of the batch.
+
+        Returns
+        -------
+        List[TransactionInfo]
+            The transactions.
+        """
+        return [
+            TransactionInfo(
+                transaction_type=transaction_type,
+                amount=amount,
+                merchant=merchant,
+                datetime=date,
+                paynment_method=paynment_method,
+                email_log=email_log,
+            )
+            for (
+                transaction_type,
+                amount,
+                merchant,
+                date,
+                paynment_method,
+                email_log,
+            ) in zip(
+                self.transaction_type,
+                self.amount,
+                self.merchant,
+                self.datetime,
+                self.paynment_method,
+                self.email_log,
+            )
+        ]
@@ -1,4 +1,3 @@
-from expenses.core.transaction_email import TransactionEmail
 from expenses.processors.base import EmailProcessor
 
 
@@ -17,12 +16,11 @@ class PurchaseEmailProcessor(EmailProcessor):
 
     """
 
-    def __init__(self, email: TransactionEmail):
-        super().__init__(email)
-        self.transaction_type = "Compra"
-        self._is_income = False
+    transaction_type = "Compra"
+    _is_income = False
 
-    def _set_pattern(self) -> str:
+    @classmethod
+    def _set_pattern(cls) -> str:
         """
         This function sets the pattern of the transaction type.
 
@@ -35,7 +33,7 @@ class PurchaseEmailProcessor(EmailProcessor):
             r"(?i)Compra por (?P<purchase_amount>.*?) "
             r"en (?P<merchant>[\w\s.*\/,-]+)"
             r"(?: (?P<time>\d{2}:\d{2}). (?P<date>\d{2}/\d{2}/\d{4}))"
-            r"(?i)(?: (?P<payment_method>(?:T\.Cred|T\.Deb|compra afiliada"
+            r"(?: (?P<payment_method>(?:T\.Cred|T\.Deb|compra afiliada"
             r" a T\.Cred) \*\d+))?"
         )
         return pattern
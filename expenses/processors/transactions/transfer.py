@@ -1,4 +1,3 @@
-from expenses.core.transaction_email import TransactionEmail
 from expenses.processors.base import EmailProcessor
 
 
@@ -15,12 +14,11 @@ class TransferEmailProcessor(EmailProcessor):
 
     """
 
-    def __init__(self, email: TransactionEmail):
-        super().__init__(email)
-        self.transaction_type = "Transferencia"
-        self._is_income = False
+    transaction_type = "Transferencia"
+    _is_income = False
 
-    def _set_pattern(self) -> str:
+    @classmethod
+    def _set_pattern(cls) -> str:
         """
         This function sets the pattern of the transaction type.
 
@@ -1,4 +1,3 @@
-from expenses.core.transaction_email import TransactionEmail
 from expenses.processors.base import EmailProcessor
 
 
@@ -13,12 +12,11 @@ class QREmailProcessor(EmailProcessor):
 
     """
 
-    def __init__(self, email: TransactionEmail):
-        super().__init__(email)
-        self.transaction_type = "QR"
-        self._is_income = False
+    transaction_type = "QR"
+    _is_income = False
 
-    def _set_pattern(self) -> str:
+    @classmethod
+    def _set_pattern(cls) -> str:
         """
         This function sets the pattern of the transaction type.
 
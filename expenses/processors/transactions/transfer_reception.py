@@ -1,4 +1,3 @@
-from expenses.core.transaction_email import TransactionEmail
 from expenses.processors.base import EmailProcessor
 
 
@@ -14,12 +13,11 @@ class TransferReceptionEmailProcessor(EmailProcessor):
 
     """
 
-    def __init__(self, email: TransactionEmail):
-        super().__init__(email)
-        self.transaction_type = "Recepcion Transferencia"
-        self._is_income = True
+    transaction_type = "Recepcion Transferencia"
+    _is_income = True
 
-    def _set_pattern(self) -> str:
+    @classmethod
+    def _set_pattern(cls) -> str:
         """
         This function sets the pattern of the transaction type.
 
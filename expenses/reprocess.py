@@ -0,0 +1,75 @@
+import argparse
+from collections import Counter
+from typing import Iterator
+
+from expenses.core.email_store import EMAIL_STORE_PATH_, EmailStore
+from expenses.processors.parallel import PARSE_WORKERS_, parse_emails
+from expenses.processors.schemas import TransactionInfo
+
+
+def reprocess_emails(
+    store: EmailStore, workers: int = PARSE_WORKERS_
+) -> Iterator[TransactionInfo]:
+    """
+    This function processes again all the emails of the local store,
+    without connecting to the IMAP server. It is intended to be used after
+    changing the extraction of the transactions. The emails are parsed in
+    parallel on all the cores.
+
+    Parameters
+    ----------
+    store : EmailStore
+        The store with the downloaded emails.
+    workers : int, optional
+        The number of processes that parse the emails.
+
+    Yields
+    ------
+    TransactionInfo
+        The information of every transaction, in arrival order.
+    """
+    for columns in parse_emails(store.iter_messages(), workers=workers):
+        yield from columns.to_transactions()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Process again the emails of the local store."
+    )
+    parser.add_argument(
+        "--store",
+        default=EMAIL_STORE_PATH_,
+        help="The path of the local store of emails. EMAIL_STORE_PATH by "
+        "default.",
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="The file to write the transactions to, one JSON per line.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=PARSE_WORKERS_,
+        help="The number of processes that parse the emails.",
+    )
+    args = parser.parse_args()
+    if not args.store:
+        parser.error("Set EMAIL_STORE_PATH or pass --store.")
+
+    counts = Counter()
+    output = open(args.output, "w") if args.output else None
+    try:
+        for transaction in reprocess_emails(
+            EmailStore(args.store), workers=args.workers
+        ):
+            counts[transaction.transaction_type] += 1
+            if output is not None:
+                output.write(transaction.json() + "\n")
+    finally:
+        if output is not None:
+            output.close()
+
+    for transaction_type, count in counts.most_common():
+        print(f"{transaction_type}: {count}")
+    print(f"Total: {sum(counts.values())}")
@@ -10,6 +10,7 @@ from jinja2 import Environment, FileSystemLoader
 from numpy import average
 import matplotlib.pyplot as plt
 
+from assistantbot.utils.expenses import get_json
 from monitoring.email import send_email
 
 # Load environment variables
@@ -39,10 +40,10 @@ def get_transactions(
         "Accept": "application/json",
         "Authorization": f"Bearer {os.getenv('API_EXPENSES_TOKEN')}",
     }
-    response = requests.get(url, headers=headers)
+    status_code, json_response = get_json(url, headers)
 
     # Check if the response is 200
-    if response.status_code != 200:
+    if status_code != 200:
         return [
             {
                 "datetime": datetime.datetime.now().isoformat(),
@@ -53,7 +54,7 @@ def get_transactions(
         ]
 
     # Return the transactions as a DataFrame
-    df_transactions = pd.DataFrame(response.json())
+    df_transactions = pd.DataFrame(json_response)
     return (
         df_transactions[
             df_transactions["transaction_type"].isin(
@@ -63,7 +64,7 @@ def get_transactions(
         if return_as_pandas
         else [
             transaction
-            for transaction in response.json()
+            for transaction in json_response
             if transaction["transaction_type"]
             in ["Compra", "Transferencia", "QR", "Pago"]
         ]
@@ -139,16 +140,28 @@ def get_average_normal_values() -> float:
     -------
     float
         The median of the amount spent in a normal day.
+
+    Raises
+    ------
+    RuntimeError
+        If the API does not answer with the normal values.
     """
     headers = {
         "accept": "application/json",
         "Authorization": f"Bearer {os.getenv('API_EXPENSES_TOKEN')}",
     }
-    response = requests.get(
+    status_code, json_response = get_json(
         "https://personal-expenses.purplesky-efe9a7f4.eastus.azurecontainerapps.io/expenses/a_day_like_today/",  # noqa
-        headers=headers,
+        headers,
     )
-    return (-1) * response.json()["median_amount_of_purchases"]
+
+    # Check if the response is 200
+    if status_code != 200:
+        raise RuntimeError(
+            f"The normal values could not be obtained: status {status_code}."
+        )
+
+    return (-1) * json_response["median_amount_of_purchases"]
 
 
 def create_html_email(transactions: List[dict]) -> str: